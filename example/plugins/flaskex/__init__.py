@@ -4,6 +4,7 @@
 
 from .scripts import forms
 from .scripts import helpers
+from .scripts import tabledef
 from flask import redirect, url_for, render_template, request, session
 from flask_plugin import Plugin
 import json
@@ -12,6 +13,7 @@ plugin = Plugin(
     static_folder='static',
     template_folder='templates'
 )
+plugin.use(tabledef.engine, tabledef.sessions)
 
 # ======== Routing =========================================================== #
 # -------- Login ------------------------------------------------------------- #
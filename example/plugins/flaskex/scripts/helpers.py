@@ -2,7 +2,6 @@
 
 from . import tabledef
 from flask import session
-from sqlalchemy.orm import sessionmaker
 from contextlib import contextmanager
 import bcrypt
 
@@ -11,7 +10,6 @@ import bcrypt
 def session_scope():
     """Provide a transactional scope around a series of operations."""
     s = get_session()
-    s.expire_on_commit = False
     try:
         yield s
         s.commit()
@@ -23,7 +21,7 @@ def session_scope():
 
 
 def get_session():
-    return sessionmaker(bind=tabledef.engine)()
+    return tabledef.sessions.get()()
 
 
 def get_user():
@@ -3,6 +3,8 @@
 from sqlalchemy import create_engine
 from sqlalchemy import Column, Integer, String
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import sessionmaker
+from flask_plugin.resources import Resource
 
 # Local
 SQLALCHEMY_DATABASE_URI = 'sqlite:///accounts.db'
@@ -13,14 +15,6 @@ SQLALCHEMY_DATABASE_URI = 'sqlite:///accounts.db'
 Base = declarative_base()
 
 
-def db_connect():
-    """
-    Performs database connection using database settings from settings.py.
-    Returns sqlalchemy engine instance
-    """
-    return create_engine(SQLALCHEMY_DATABASE_URI)
-
-
 class User(Base):
     __tablename__ = "user"
 
@@ -33,5 +27,17 @@ class User(Base):
         return '<User %r>' % self.username
 
 
-engine = db_connect()  # Connect to database
-Base.metadata.create_all(engine)  # Create models
+def bind_sessions():
+    """
+    Create models and session factory bound to shared engine,
+    called once by the first session required.
+    """
+    bound = engine.get()
+    Base.metadata.create_all(bound)
+    return sessionmaker(bind=bound, expire_on_commit=False)
+
+
+# Pooled engine shared with plugins connecting to the same database,
+# disposed once unloaded, declared on plugin by ``plugin.use``
+engine = Resource('engine', create_engine, SQLALCHEMY_DATABASE_URI)
+sessions = Resource('sessions', bind_sessions)
@@ -1,7 +1,9 @@
 
 from .plugin import Plugin
 from .manager import PluginManager
-from . import signals, utils, states, config
+from . import signals, utils, states, config, transaction, static, dispatch
+from . import api, bundle, bytecode, canary, cli, dependencies, events, handlers, isolation
+from . import profiling, registry, resources, routing, templating, tracing
 
 __version__ = '.'.join(str(num) for num in (0, 1, 1))
 
@@ -10,8 +12,26 @@ __all__ = [
     '__version__',
     'Plugin',
     'PluginManager',
+    'api',
+    'bundle',
+    'bytecode',
+    'canary',
+    'cli',
     'config',
+    'dependencies',
+    'dispatch',
+    'events',
+    'handlers',
+    'isolation',
+    'profiling',
+    'registry',
+    'resources',
+    'routing',
     'signals',
     'states',
+    'static',
+    'templating',
+    'tracing',
+    'transaction',
     'utils'
 ]
@@ -0,0 +1,139 @@
+"""
+HTTP management API served on blueprint of :py:class:`.PluginManager`.
+
+Enabled by config ``api``, status of all plugins known by manager is served at
+``/{config.blueprint}/.status``, a path never used by plugins since domains cannot
+contain ``'.'``. Query arguments:
+
+- ``fields``: comma separated keys of each plugin, any of :py:const:`StatusFields`.
+- ``status``: comma separated names of :py:class:`.states.PluginStatus` to keep.
+- ``domain``: comma separated plugin domains to keep.
+- ``page`` and ``per_page``: 1-based page number and page size,
+  at most :py:const:`MaxPageSize` plugins a page.
+
+Status of plugins is collected into a :py:class:`Catalog` once for each state version
+of manager, and responses carry a strong ``ETag`` digested from catalog and query,
+so pollers revalidating with ``If-None-Match`` get ``304 Not Modified`` without
+anything serialized. Workers in the same state produce the same ``ETag``.
+"""
+
+import hashlib
+import json
+import typing as t
+
+from flask import Flask, Request, Response, abort, jsonify
+
+from .states import PluginStatus
+
+StatusFields = ('id', 'name', 'status', 'domain', 'info', 'deferred')
+"""Keys of plugin status served by API."""
+
+DefaultPageSize = 50
+"""Plugins in a page when ``per_page`` not given."""
+
+MaxPageSize = 500
+"""Max plugins in a page."""
+
+
+class Catalog(t.NamedTuple):
+    """Status of all plugins known by manager at a state version, sorted by domain."""
+    version: int
+    entries: t.Tuple[t.Dict[str, t.Any], ...]
+    digest: str
+
+
+def build_catalog(version: int, entries: t.Iterable[t.Dict[str, t.Any]]) -> Catalog:
+    """Sort ``entries`` by domain and digest them, done once for each state version."""
+    ordered = tuple(sorted(entries, key=lambda entry: (entry['domain'], entry['id'])))
+    encoded = json.dumps(ordered, sort_keys=True, separators=(',', ':'), default=str)
+    return Catalog(version, ordered, hashlib.sha1(encoded.encode()).hexdigest())
+
+
+class StatusQuery(t.NamedTuple):
+    """Parsed query arguments of status API."""
+    fields: t.Tuple[str, ...]
+    statuses: t.FrozenSet[str]
+    domains: t.FrozenSet[str]
+    page: int
+    per_page: int
+
+    @classmethod
+    def parse(cls, args: t.Mapping[str, str]) -> 'StatusQuery':
+        """
+        Raises:
+            ValueError: when given unknown field, unknown status or invalid page.
+        """
+        fields = _split(args.get('fields')) or StatusFields
+        unknown = [field for field in fields if field not in StatusFields]
+        if unknown:
+            raise ValueError(f'unknown fields: {", ".join(unknown)}')
+        names = {status.name.lower(): status.name for status in PluginStatus}
+        statuses = _split(args.get('status'))
+        unknown = [status for status in statuses if status.lower() not in names]
+        if unknown:
+            raise ValueError(f'unknown status: {", ".join(unknown)}')
+        try:
+            page = int(args.get('page', 1))
+            per_page = int(args.get('per_page', DefaultPageSize))
+        except ValueError:
+            raise ValueError('page and per_page should be integers') from None
+        if page < 1 or not 1 <= per_page <= MaxPageSize:
+            raise ValueError(f'page should be positive, per_page between 1 and {MaxPageSize}')
+        return cls(
+            tuple(dict.fromkeys(fields)),
+            frozenset(names[status.lower()] for status in statuses),
+            frozenset(_split(args.get('domain'))),
+            page, per_page
+        )
+
+    def etag(self, catalog: Catalog) -> str:
+        """Strong entity tag of response to this query on ``catalog``."""
+        key = repr((catalog.digest, self.fields, sorted(self.statuses),
+                    sorted(self.domains), self.page, self.per_page))
+        return hashlib.sha1(key.encode()).hexdigest()[:32]
+
+    def select(self, catalog: Catalog) -> t.Tuple[int, t.List[t.Dict[str, t.Any]]]:
+        """Return count of matched plugins, and matched plugins in requested page."""
+        matched = [
+            entry for entry in catalog.entries
+            if (not self.statuses or entry['status'] in self.statuses) and
+            (not self.domains or entry['domain'] in self.domains)
+        ]
+        start = (self.page - 1) * self.per_page
+        return len(matched), [
+            {field: entry[field] for field in self.fields}
+            for entry in matched[start:start + self.per_page]
+        ]
+
+
+def _split(value: t.Optional[str]) -> t.Tuple[str, ...]:
+    if not value:
+        return ()
+    return tuple(item.strip() for item in value.split(',') if item.strip())
+
+
+def status_response(app: Flask, request: Request, catalog: Catalog) -> Response:
+    """
+    Build response of status API for ``request``.
+
+    Raises:
+        BadRequest: when query arguments are invalid.
+    """
+    try:
+        query = StatusQuery.parse(request.args)
+    except ValueError as error:
+        abort(400, description=str(error))
+    etag = query.etag(catalog)
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        total, plugins = query.select(catalog)
+        response = jsonify({
+            'total': total,
+            'page': query.page,
+            'per_page': query.per_page,
+            'plugins': plugins
+        })
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
@@ -0,0 +1,242 @@
+"""
+Plugins deployed as single-file zip bundles.
+
+A bundle is a zip archive named ``<basedir>.zip`` inside plugins directory,
+containing plugin package inside a folder named as ``basedir``, like the one created by::
+
+    cd plugins && zip -r hello.zip hello
+
+Plugin module is imported with :py:mod:`zipimport`, while ``plugin.json``, templates and
+static files are read from the archive mapped into memory by :py:class:`Bundle`,
+nothing is extracted to disk. Deploying a plugin is then copying one file.
+
+Each archive is mapped once by :py:func:`open_bundle` and shared by plugin, its jinja
+loader and static files, until :py:func:`close_bundle` when plugin unloaded.
+Replace a deployed bundle by renaming new file over it, writing into a mapped archive
+in place may crash readers.
+"""
+
+import mmap
+import os
+import posixpath
+import threading
+import typing as t
+import zipfile
+
+from jinja2 import BaseLoader, Environment, TemplateNotFound
+from jinja2.loaders import split_template_path
+
+BundleSuffix = '.zip'
+"""Filename suffix of plugin bundles."""
+
+
+class _MappedFile:
+    """Minimal seekable file over a memory map, as :py:class:`zipfile.ZipFile` requires."""
+
+    def __init__(self, mapped: mmap.mmap) -> None:
+        self._mapped = mapped
+        self.read, self.seek, self.tell = mapped.read, mapped.seek, mapped.tell
+
+    def seekable(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        self._mapped.close()
+
+
+class Bundle:
+    """
+    Memory-mapped reader of a plugin bundle.
+
+    Members are addressed by paths as if the archive were a directory,
+    e.g. ``/srv/plugins/hello.zip/hello/plugin.json``, the same paths Flask
+    computes from ``__file__`` of modules imported by :py:mod:`zipimport`.
+
+    Args:
+        archive (str): path of zip archive.
+
+    Raises:
+        zipfile.BadZipFile: when archive is empty or not a zip file.
+    """
+
+    def __init__(self, archive: str) -> None:
+        self.archive = os.path.abspath(archive)
+        with open(self.archive, 'rb') as handler:
+            self.mtime = os.fstat(handler.fileno()).st_mtime
+            try:
+                mapped = mmap.mmap(handler.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise zipfile.BadZipFile(f'empty bundle: {self.archive}') from None
+        self._file = _MappedFile(mapped)
+        try:
+            self._zip = zipfile.ZipFile(self._file)  # type: ignore
+        except zipfile.BadZipFile:
+            self._file.close()
+            raise
+        self._files: t.Dict[str, zipfile.ZipInfo] = {
+            info.filename: info for info in self._zip.infolist() if not info.is_dir()
+        }
+        self._directories: t.Set[str] = set()
+        for name in self._files:
+            parent = posixpath.dirname(name)
+            while parent and parent not in self._directories:
+                self._directories.add(parent)
+                parent = posixpath.dirname(parent)
+
+    def member(self, path: str) -> str:
+        """
+        Convert ``path`` inside archive to member name, e.g.
+        ``/srv/plugins/hello.zip/hello/static`` to ``hello/static``.
+
+        Raises:
+            ValueError: when ``path`` not inside archive.
+        """
+        path = os.path.abspath(path)
+        if path == self.archive:
+            return ''
+        if not path.startswith(self.archive + os.sep):
+            raise ValueError(f'path not inside bundle {self.archive}: {path}')
+        return path[len(self.archive) + 1:].replace(os.sep, '/')
+
+    def isfile(self, name: str) -> bool:
+        return name in self._files
+
+    def isdir(self, name: str) -> bool:
+        return not name or name.rstrip('/') in self._directories
+
+    def getinfo(self, name: str) -> zipfile.ZipInfo:
+        """
+        Raises:
+            FileNotFoundError: when member not found.
+        """
+        try:
+            return self._files[name]
+        except KeyError:
+            raise FileNotFoundError(f'{self.archive}/{name}') from None
+
+    def read(self, name: str) -> bytes:
+        """
+        Read whole content of member file.
+
+        Raises:
+            FileNotFoundError: when member not found.
+        """
+        return self._zip.read(self.getinfo(name))
+
+    def open(self, name: str) -> t.IO[bytes]:
+        """
+        Open member file for streaming.
+
+        Raises:
+            FileNotFoundError: when member not found.
+        """
+        return self._zip.open(self.getinfo(name))
+
+    def walk(self, name: str) -> t.Iterator[str]:
+        """Yield names of all files inside directory ``name``, relative to it."""
+        prefix = name.rstrip('/') + '/' if name else ''
+        for filename in self._files:
+            if filename.startswith(prefix):
+                yield filename[len(prefix):]
+
+    def close(self) -> None:
+        self._zip.close()
+        self._file.close()
+
+
+_bundles: t.Dict[str, Bundle] = {}
+_lock = threading.Lock()
+
+
+def locate(path: str) -> t.Optional[str]:
+    """Return path of zip archive containing ``path``, None if not inside an archive."""
+    path = os.path.abspath(path)
+    while True:
+        if path.endswith(BundleSuffix) and os.path.isfile(path):
+            return path
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def open_bundle(path: str) -> t.Optional[Bundle]:
+    """
+    Return shared :py:class:`Bundle` of the archive containing ``path``.
+
+    Returns:
+        t.Optional[Bundle]: None if ``path`` not inside an archive.
+    """
+    archive = locate(path)
+    if archive is None:
+        return None
+    with _lock:
+        bundle = _bundles.get(archive)
+        if bundle is None:
+            bundle = _bundles[archive] = Bundle(archive)
+        return bundle
+
+
+def close_bundle(archive: str) -> None:
+    """Close shared bundle of ``archive``, next :py:func:`open_bundle` maps it again."""
+    with _lock:
+        bundle = _bundles.pop(os.path.abspath(archive), None)
+    if bundle is not None:
+        bundle.close()
+
+
+def listbundles(path: str, excludes: t.Optional[t.Container[str]] = None) -> t.Iterator[str]:
+    """
+    List all bundles inside specific path.
+
+    Args:
+        path (str): path to be explore.
+        excludes (Container[str], optional): basedir of bundles to exclude. Defaults to None.
+
+    Yields:
+        Iterator[str]: absolute path of bundles.
+    """
+    if excludes is None:
+        excludes = set()
+    for itemname in os.listdir(path):
+        fullname = os.path.join(path, itemname)
+        basedir = itemname[:-len(BundleSuffix)]
+        if itemname.endswith(BundleSuffix) and basedir not in excludes \
+                and os.path.isfile(fullname):
+            yield os.path.abspath(fullname)
+
+
+class BundleLoader(BaseLoader):
+    """
+    Jinja loader reading templates from a folder of bundle.
+
+    Templates are considered up to date while the archive is not replaced.
+
+    Args:
+        bundle (Bundle): bundle of plugin.
+        directory (str): path of template folder inside archive.
+    """
+
+    def __init__(self, bundle: Bundle, directory: str) -> None:
+        self.bundle = bundle
+        self.searchpath = directory
+        self._prefix = bundle.member(directory)
+
+    def get_source(
+        self, environment: Environment, template: str
+    ) -> t.Tuple[str, str, t.Callable[[], bool]]:
+        name = posixpath.join(self._prefix, *split_template_path(template))
+        if not self.bundle.isfile(name):
+            raise TemplateNotFound(template)
+        source = self.bundle.read(name).decode('utf-8')
+        archive, mtime = self.bundle.archive, self.bundle.mtime
+
+        def _uptodate() -> bool:
+            try:
+                return os.path.getmtime(archive) == mtime
+            except OSError:
+                return False
+        return source, posixpath.join(archive, name), _uptodate
+
+    def list_templates(self) -> t.List[str]:
+        return sorted(self.bundle.walk(self._prefix))
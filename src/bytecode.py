@@ -0,0 +1,258 @@
+"""
+Bytecode precompilation of plugins.
+
+Plugin modules are compiled on first import in each process, and when plugins directory
+is read-only, compiled bytecode cannot be written into ``__pycache__``, so every worker
+compiles all plugins again on every boot. Functions here compile plugin sources ahead,
+optionally into a separate ``pycache_prefix`` directory, laid out as
+:py:data:`sys.pycache_prefix` does.
+
+The prefix is only applied to plugin modules: :py:func:`scope` installs
+:py:class:`PluginFinder`, importing modules inside a plugins directory with
+:py:class:`PluginLoader`, which reads and writes their bytecode inside the prefix,
+so other modules of the process keep their ``__pycache__``. Scopes are keyed by
+absolute path of plugins directory, so managers of different apps sharing a package
+name keep their own prefixes.
+
+With hash-based invalidation (:pep:`552`) a ``.pyc`` file records hash of its source
+instead of mtime, so copied or checked out sources with changed mtimes
+still match their cached bytecode.
+
+Bundled plugins are imported by :py:mod:`zipimport` which never reads cached bytecode,
+they are not compiled.
+"""
+
+import importlib.abc
+import importlib.machinery
+import importlib.util
+import marshal
+import os
+import py_compile
+import sys
+import tempfile
+import typing as t
+
+Invalidations: t.Dict[str, py_compile.PycInvalidationMode] = {
+    'timestamp': py_compile.PycInvalidationMode.TIMESTAMP,
+    'checked-hash': py_compile.PycInvalidationMode.CHECKED_HASH,
+    'unchecked-hash': py_compile.PycInvalidationMode.UNCHECKED_HASH
+}
+"""Supported invalidation modes of config ``bytecode_invalidation``."""
+
+_HashBased = 0b01
+_CheckSource = 0b10
+
+
+def cache_from_source(source: str, prefix: t.Optional[str] = None) -> str:
+    """
+    Path of cached bytecode of ``source``, inside ``prefix`` mirroring absolute
+    directory of source if given, otherwise where the import system caches it.
+    """
+    cached = importlib.util.cache_from_source(source)
+    if prefix is None:
+        return cached
+    directory = os.path.splitdrive(os.path.dirname(os.path.abspath(source)))[1]
+    return os.path.join(prefix, directory.lstrip(os.sep), os.path.basename(cached))
+
+
+def sources(directory: str) -> t.Iterator[str]:
+    """Yield absolute paths of all Python sources inside ``directory``."""
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(name for name in dirs if name != '__pycache__')
+        for name in sorted(files):
+            if name.endswith('.py'):
+                yield os.path.abspath(os.path.join(root, name))
+
+
+def _matches(header: bytes, source: str, trust_unchecked: bool = False) -> bool:
+    """Check if ``header`` of cached bytecode matches ``source``."""
+    if len(header) != 16 or header[:4] != importlib.util.MAGIC_NUMBER:
+        return False
+    flags = int.from_bytes(header[4:8], 'little')
+    if flags & _HashBased:
+        if trust_unchecked and not flags & _CheckSource:
+            return True
+        with open(source, 'rb') as handler:
+            return header[8:16] == importlib.util.source_hash(handler.read())
+    stat = os.stat(source)
+    return (
+        int.from_bytes(header[8:12], 'little') == int(stat.st_mtime) & 0xFFFFFFFF and
+        int.from_bytes(header[12:16], 'little') == stat.st_size & 0xFFFFFFFF
+    )
+
+
+def is_stale(source: str, prefix: t.Optional[str] = None) -> bool:
+    """
+    Check if cached bytecode of ``source`` is missing or doesn't match source.
+
+    Location of cached file follows ``prefix``, see :py:func:`cache_from_source`.
+    Hash-based files are validated with source hash even if they are unchecked ones.
+    """
+    try:
+        with open(cache_from_source(source, prefix), 'rb') as handler:
+            header = handler.read(16)
+    except OSError:
+        return True
+    return not _matches(header, source)
+
+
+def stale(directory: str, prefix: t.Optional[str] = None) -> t.List[str]:
+    """Return sources inside ``directory`` whose cached bytecode is stale, see :py:func:`is_stale`."""
+    return [source for source in sources(directory) if is_stale(source, prefix)]
+
+
+def compile_directory(
+    directory: str, invalidation: str = 'checked-hash', force: bool = False,
+    prefix: t.Optional[str] = None
+) -> t.Tuple[t.List[str], t.List[Exception]]:
+    """
+    Compile sources inside ``directory`` whose cached bytecode is stale.
+
+    Args:
+        directory (str): plugin directory.
+        invalidation (str, optional): one of :py:const:`Invalidations`. Defaults to 'checked-hash'.
+        force (bool, optional): compile all sources even if not stale. Defaults to False.
+        prefix (str, optional): directory of cached bytecode, see :py:func:`cache_from_source`.
+
+    Returns:
+        t.Tuple[t.List[str], t.List[Exception]]: compiled sources, and errors raised
+        while compiling, e.g. :py:class:`py_compile.PyCompileError` of syntax errors
+        or :py:class:`OSError` when cache directory is not writable.
+
+    Raises:
+        ValueError: when given unknown invalidation mode.
+    """
+    if invalidation not in Invalidations:
+        raise ValueError(f'unknown bytecode invalidation mode: {invalidation}')
+    compiled, errors = [], []
+    for source in sources(directory):
+        if not force and not is_stale(source, prefix):
+            continue
+        try:
+            py_compile.compile(
+                source, cache_from_source(source, prefix), doraise=True,
+                invalidation_mode=Invalidations[invalidation])
+        except (py_compile.PyCompileError, OSError) as error:
+            errors.append(error)
+        else:
+            compiled.append(source)
+    return compiled, errors
+
+
+def _dump(code: t.Any, source: str, content: bytes, invalidation: str) -> bytes:
+    """Encode ``code`` compiled from ``content`` of ``source`` as a ``.pyc`` file."""
+    mode = Invalidations[invalidation]
+    if mode == py_compile.PycInvalidationMode.TIMESTAMP:
+        stat = os.stat(source)
+        header = (0).to_bytes(4, 'little') + \
+            (int(stat.st_mtime) & 0xFFFFFFFF).to_bytes(4, 'little') + \
+            (len(content) & 0xFFFFFFFF).to_bytes(4, 'little')
+    else:
+        flags = _HashBased
+        if mode == py_compile.PycInvalidationMode.CHECKED_HASH:
+            flags |= _CheckSource
+        header = flags.to_bytes(4, 'little') + importlib.util.source_hash(content)
+    return importlib.util.MAGIC_NUMBER + header + marshal.dumps(code)
+
+
+class PluginLoader(importlib.machinery.SourceFileLoader):
+    """
+    Source loader reading and writing cached bytecode inside ``prefix``.
+
+    Args:
+        fullname (str): name of module.
+        path (str): path of source.
+        prefix (str): directory of cached bytecode.
+        invalidation (str, optional): one of :py:const:`Invalidations`. Defaults to 'checked-hash'.
+    """
+
+    def __init__(
+        self, fullname: str, path: str, prefix: str, invalidation: str = 'checked-hash'
+    ) -> None:
+        super().__init__(fullname, path)
+        self.prefix = prefix
+        self.invalidation = invalidation
+
+    def get_code(self, fullname: str) -> t.Any:
+        source = self.get_filename(fullname)
+        cached = cache_from_source(source, self.prefix)
+        try:
+            with open(cached, 'rb') as handler:
+                data = handler.read()
+        except OSError:
+            data = b''
+        if _matches(data[:16], source, trust_unchecked=True):
+            try:
+                return marshal.loads(data[16:])
+            except (EOFError, ValueError, TypeError):
+                # Corrupt or truncated file, compiled and written again
+                pass
+
+        content = self.get_data(source)
+        code = self.source_to_code(content, source)
+        if not sys.dont_write_bytecode:
+            try:
+                os.makedirs(os.path.dirname(cached), exist_ok=True)
+                descriptor, staged = tempfile.mkstemp(dir=os.path.dirname(cached))
+                with os.fdopen(descriptor, 'wb') as handler:
+                    handler.write(_dump(code, source, content, self.invalidation))
+                os.replace(staged, cached)
+            except OSError:
+                pass
+        return code
+
+
+def scoped(
+    spec: importlib.machinery.ModuleSpec, prefix: str, invalidation: str = 'checked-hash'
+) -> importlib.machinery.ModuleSpec:
+    """Make source module of ``spec`` loaded by :py:class:`PluginLoader`, others kept."""
+    if type(spec.loader) is not importlib.machinery.SourceFileLoader or spec.origin is None:
+        return spec
+    spec.loader = PluginLoader(spec.name, spec.origin, prefix, invalidation)
+    spec.cached = cache_from_source(spec.origin, prefix)
+    return spec
+
+
+class PluginFinder(importlib.abc.MetaPathFinder):
+    """Finder of modules inside plugins directories, loaded by :py:class:`PluginLoader`."""
+
+    def __init__(self) -> None:
+        self.directories: t.Dict[str, t.Tuple[str, str, str]] = {}
+
+    def find_spec(
+        self, fullname: str, path: t.Optional[t.Sequence[str]], target: t.Any = None
+    ) -> t.Optional[importlib.machinery.ModuleSpec]:
+        scopes = [
+            (directory, prefix, invalidation)
+            for directory, (package, prefix, invalidation) in list(self.directories.items())
+            if fullname.startswith(package + '.')
+        ]
+        if not scopes:
+            return None
+        spec = importlib.machinery.PathFinder.find_spec(fullname, path, target)
+        if spec is None or spec.origin is None:
+            return None
+        origin = os.path.abspath(spec.origin)
+        for directory, prefix, invalidation in scopes:
+            if origin.startswith(directory + os.sep):
+                return scoped(spec, prefix, invalidation)
+        return None
+
+
+finder = PluginFinder()
+
+
+def scope(
+    directory: str, package: str, prefix: t.Optional[str], invalidation: str = 'checked-hash'
+) -> None:
+    """
+    Cache bytecode of modules of ``package`` inside plugins ``directory`` into ``prefix``,
+    or where the import system caches them if None.
+    """
+    directory = os.path.abspath(directory)
+    if prefix is None:
+        finder.directories.pop(directory, None)
+        return
+    finder.directories[directory] = (package, prefix, invalidation)
+    if finder not in sys.meta_path:
+        sys.meta_path.insert(0, finder)
@@ -0,0 +1,246 @@
+"""
+Canary releases of plugins.
+
+:py:meth:`.PluginManager.canary` starts a new version of a running plugin side by side,
+registered under shadow domain ``domain + CanarySuffix``. :py:class:`CanaryRouter`,
+installed before application by manager, rewrites path of requests to
+``/{config.blueprint}/{domain}/...`` into the shadow domain for a share of traffic:
+
+- header ``X-Plugin-Canary`` (or the one configured) ``1`` / ``0`` forces a version,
+- then cookie ``plugin-canary`` (or the one configured), so clients could stick to one,
+- otherwise requests go to canary with probability ``weight``.
+
+Warmup requests are passed through untouched. Latency and errors
+(status 500 and above) of other requests of each version are recorded in
+:py:class:`VersionMetrics`. With ``max_error_rate`` given, the canary trips
+once its error rate exceeds it after ``min_requests`` requests, and all traffic
+goes back to stable version at once, even forced ones.
+
+Latency is measured until application returned response, time spent on
+streaming response body is not counted. URLs built inside canary requests,
+e.g. by ``url_for``, point to the shadow domain, so clients keep on canary.
+Requests to the shadow domain are counted as canary ones, and once canary
+tripped they are rewritten back to the stable domain, like all others.
+"""
+
+import collections
+import random
+import threading
+import time
+import typing as t
+
+from werkzeug.http import parse_cookie
+
+from .routing import is_preview
+from .states import PluginStatus
+
+if t.TYPE_CHECKING:
+    from .plugin import Plugin
+
+CanarySuffix = '~canary'
+"""Suffix of shadow domain and id of canary version."""
+
+Stable = 'stable'
+Candidate = 'canary'
+
+_Forced = {'1': True, 'true': True, 'canary': True, '0': False, 'false': False, 'stable': False}
+
+
+class VersionMetrics:
+    """
+    Request count, errors and latencies of one version,
+    latest ``capacity`` latencies are kept for percentiles.
+    """
+
+    def __init__(self, capacity: int = 1024) -> None:
+        self.requests = 0
+        self.errors = 0
+        self.seconds = 0.
+        self._latencies: t.Deque[float] = collections.deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def record(
+        self, seconds: float, error: bool,
+        max_error_rate: t.Optional[float] = None, min_requests: int = 1
+    ) -> bool:
+        """
+        Record a request, return if error rate exceeds ``max_error_rate`` once
+        at least ``min_requests`` recorded, decided with counters of this request.
+        """
+        with self._lock:
+            self.requests += 1
+            self.errors += error
+            self.seconds += seconds
+            self._latencies.append(seconds)
+            return max_error_rate is not None and self.requests >= min_requests \
+                and self.errors / self.requests > max_error_rate
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.requests if self.requests else 0.
+
+    def to_dict(self) -> t.Dict[str, t.Any]:
+        """Counters, error rate and mean, p50, p95, p99 latencies in seconds."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            requests, errors, seconds = self.requests, self.errors, self.seconds
+        metrics: t.Dict[str, t.Any] = {
+            'requests': requests,
+            'errors': errors,
+            'error_rate': errors / requests if requests else 0.,
+            'mean': seconds / requests if requests else 0.
+        }
+        for name, fraction in (('p50', .5), ('p95', .95), ('p99', .99)):
+            metrics[name] = latencies[
+                min(len(latencies) - 1, int(fraction * len(latencies)))] if latencies else 0.
+        return metrics
+
+
+class Canary:
+    """
+    Traffic split between stable plugin and shadow of canary version.
+
+    Args:
+        stable (Plugin): running stable version.
+        plugin (Plugin): canary version as discovered.
+        shadow (Plugin): canary version registered under shadow domain.
+        weight (float, optional): share of traffic to canary, from 0 to 1. Defaults to 0.
+        header (str, optional): request header forcing version, None to disable.
+        cookie (str, optional): cookie choosing version, None to disable.
+        max_error_rate (float, optional): error rate tripping canary, None to disable.
+        min_requests (int, optional): canary requests before checking error rate.
+
+    Raises:
+        ValueError: when weight or max_error_rate not between 0 and 1.
+        ValueError: when min_requests less than 1.
+    """
+
+    def __init__(
+        self, stable: 'Plugin', plugin: 'Plugin', shadow: 'Plugin',
+        weight: float = 0., header: t.Optional[str] = 'X-Plugin-Canary',
+        cookie: t.Optional[str] = 'plugin-canary',
+        max_error_rate: t.Optional[float] = None, min_requests: int = 100
+    ) -> None:
+        if max_error_rate is not None and not 0 <= max_error_rate <= 1:
+            raise ValueError('max_error_rate should be between 0 and 1')
+        if min_requests < 1:
+            raise ValueError('min_requests should be at least 1')
+        self.stable = stable
+        self.plugin = plugin
+        self.shadow = shadow
+        self.weight = weight
+        self.header = 'HTTP_' + header.upper().replace('-', '_') if header else None
+        self.cookie = cookie
+        self.max_error_rate = max_error_rate
+        self.min_requests = min_requests
+        self.tripped = False
+        self.promoting = False
+        self.metrics = {Stable: VersionMetrics(), Candidate: VersionMetrics()}
+
+    @property
+    def weight(self) -> float:
+        """Share of traffic to canary, from 0 to 1."""
+        return self._weight
+
+    @weight.setter
+    def weight(self, value: float) -> None:
+        if not 0 <= value <= 1:
+            raise ValueError('canary weight should be between 0 and 1')
+        self._weight = float(value)
+
+    @property
+    def serving(self) -> bool:
+        """If canary version could serve requests, i.e. running and not tripped."""
+        if self.promoting:
+            return True
+        return not self.tripped and self.shadow.status.value == PluginStatus.Running
+
+    def choose(self, environ: t.Dict[str, t.Any]) -> str:
+        """Choose version serving request of ``environ``."""
+        if self.promoting:
+            return Candidate
+        if not self.serving:
+            return Stable
+        forced = None
+        if self.header is not None:
+            forced = _Forced.get(environ.get(self.header, '').lower())
+        if forced is None and self.cookie is not None and 'HTTP_COOKIE' in environ:
+            forced = _Forced.get(parse_cookie(environ).get(self.cookie, '').lower())
+        if forced is None:
+            forced = random.random() < self._weight
+        return Candidate if forced else Stable
+
+    def record(self, version: str, seconds: float, error: bool) -> None:
+        """Record a request served by ``version``, trip canary when erroring too much."""
+        if version != Candidate:
+            self.metrics[version].record(seconds, error)
+        elif self.metrics[version].record(
+                seconds, error, self.max_error_rate, self.min_requests):
+            self.tripped = True
+
+    def to_dict(self) -> t.Dict[str, t.Any]:
+        return {
+            'domain': self.stable.domain,
+            'stable': self.stable.basedir,
+            'canary': self.plugin.basedir,
+            'weight': self._weight,
+            'tripped': self.tripped,
+            'metrics': {version: metrics.to_dict() for version, metrics in self.metrics.items()}
+        }
+
+
+class CanaryRouter:
+    """
+    WSGI middleware splitting requests of plugins between their versions.
+
+    Args:
+        wsgi_app (t.Callable): wrapped WSGI application.
+        blueprint (str): blueprint of manager, prefix of all plugin paths.
+        canaries (t.Dict[str, Canary]): canaries by domain, shared with manager.
+    """
+
+    def __init__(
+        self, wsgi_app: t.Callable, blueprint: str, canaries: t.Dict[str, Canary]
+    ) -> None:
+        self.wsgi_app = wsgi_app
+        self._prefix = '/' + blueprint.strip('/') + '/'
+        self._canaries = canaries
+
+    def __call__(self, environ: t.Dict[str, t.Any], start_response: t.Callable) -> t.Any:
+        if not self._canaries or is_preview(environ):
+            return self.wsgi_app(environ, start_response)
+        path: str = environ.get('PATH_INFO', '')
+        if not path.startswith(self._prefix):
+            return self.wsgi_app(environ, start_response)
+        domain, slash, rest = path[len(self._prefix):].partition('/')
+        shadowed = domain.endswith(CanarySuffix)
+        if shadowed:
+            domain = domain[:-len(CanarySuffix)]
+        canary = self._canaries.get(domain)
+        if canary is None:
+            return self.wsgi_app(environ, start_response)
+
+        # Shadow domain requested directly, e.g. by URL built inside canary request
+        if shadowed:
+            version = Candidate if canary.serving else Stable
+        else:
+            version = canary.choose(environ)
+        if version == Candidate:
+            environ['PATH_INFO'] = self._prefix + domain + CanarySuffix + slash + rest
+        elif shadowed:
+            environ['PATH_INFO'] = self._prefix + domain + slash + rest
+        statuses: t.List[int] = []
+
+        def _start_response(status: str, headers: t.List, exc_info: t.Any = None) -> t.Any:
+            statuses.append(int(status[:3]))
+            return start_response(status, headers, exc_info)
+
+        began = time.perf_counter()
+        try:
+            response = self.wsgi_app(environ, _start_response)
+        except Exception:
+            canary.record(version, time.perf_counter() - began, True)
+            raise
+        canary.record(
+            version, time.perf_counter() - began, bool(statuses) and statuses[-1] >= 500)
+        return response
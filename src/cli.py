@@ -0,0 +1,229 @@
+"""
+``flask plugins`` command group.
+
+Registered into ``app.cli`` by :py:class:`.PluginManager`, commands operate the manager
+of application loaded by Flask CLI, inside the CLI process, so plugins could be installed,
+validated, timed and benchmarked by scripts without starting a server::
+
+    flask plugins list --status running
+    flask plugins install https://example.com/hello.zip
+    flask plugins start hello goodbye
+    flask plugins bench /plugins/hello/Doge -n 1000 -c 8
+
+Commands are offline tooling: plugins started by them live only as long as the command,
+servers already running never see them. So there are no commands stopping or unloading
+plugins, which would have nothing to act on in a new process.
+
+``load`` and ``start`` drive selected plugins from their current status to the target one,
+plugins already there are skipped with a message. They print seconds spent on each plugin
+including its warmups, see :py:attr:`.PluginManager.timings`. Domains are matched against
+config files first, so only plugins selected are imported. Plugins are loaded concurrently
+following their dependency graph, requests of ``warmup`` and ``bench`` are sent concurrently
+through test client.
+"""
+
+import json
+import statistics
+import time
+import typing as t
+import zipfile
+from concurrent import futures
+
+import click
+import jsonschema
+from flask import current_app
+from flask.cli import AppGroup
+
+from .states import PluginStatus
+
+if t.TYPE_CHECKING:
+    from .manager import PluginManager
+    from .plugin import Plugin
+
+plugins = AppGroup('plugins', help='Operate plugins of application.')
+
+Lifecycle: t.Dict[str, t.Tuple[t.Tuple[str, t.Tuple[PluginStatus, ...], str], ...]] = {
+    'load': (
+        ('load', (PluginStatus.Unloaded,), 'load_many'),
+    ),
+    'start': (
+        ('load', (PluginStatus.Unloaded,), 'load_many'),
+        ('start', (PluginStatus.Loaded, PluginStatus.Stopped), 'start_many')
+    ),
+}
+"""Steps driving plugins to each target: operation, status operated from, batch method."""
+
+
+def _manager() -> 'PluginManager':
+    return current_app.plugin_manager  # type: ignore
+
+
+def _select(manager: 'PluginManager', domains: t.Sequence[str]) -> t.List['Plugin']:
+    """
+    Find plugins by ``domains``, all plugins if nothing given. Domains are matched
+    against loaded plugins and config files, only plugins selected are imported.
+    """
+    found = {plugin.domain: plugin for plugin in manager.loaded}
+    if not domains:
+        found.update((plugin.domain, plugin) for plugin in manager.scan())
+        return list(found.values())
+    basedirs = [
+        basedir for basedir, manifest in manager.manifests().items()
+        if manifest.domain in domains and manifest.domain not in found
+    ]
+    found.update((plugin.domain, plugin) for plugin in manager.scan(basedirs))
+    missing = [domain for domain in domains if domain not in found]
+    if missing:
+        raise click.BadParameter(f'plugin not found: {", ".join(missing)}', param_hint='DOMAINS')
+    return [found[domain] for domain in domains]
+
+
+def _milliseconds(seconds: float) -> str:
+    return f'{seconds * 1000:.1f}ms'
+
+
+def _operate(target: str, domains: t.Sequence[str]) -> None:
+    manager = _manager()
+    selected = _select(manager, domains)
+    operable = set(
+        status for _operation, statuses, _method in Lifecycle[target] for status in statuses)
+    for plugin in selected:
+        if plugin.status.value not in operable:
+            click.echo(f'{"skip":<8}{plugin.domain:<32}{plugin.status.value.name.lower():>12}')
+    began = time.perf_counter()
+    for operation, statuses, method in Lifecycle[target]:
+        batch = [plugin for plugin in selected if plugin.status.value in statuses]
+        if not batch:
+            continue
+        try:
+            getattr(manager, method)(batch)
+        except RuntimeError as error:
+            raise click.ClickException(str(error.args[0])) from None
+        for plugin in batch:
+            timings = manager.timings.get(plugin.domain, {})
+            for timed in (operation, 'warmup') if operation == 'start' else (operation,):
+                if timed in timings:
+                    click.echo(f'{timed:<8}{plugin.domain:<32}{_milliseconds(timings[timed]):>12}')
+    click.echo(f'{target} {len(selected)} plugins in {_milliseconds(time.perf_counter() - began)}')
+
+
+@plugins.command('list')
+@click.option('--status', 'statuses', multiple=True,
+              type=click.Choice([status.name for status in PluginStatus], case_sensitive=False),
+              help='Only list plugins with status.')
+@click.option('--json', 'as_json', is_flag=True, help='Print as JSON.')
+def list_(statuses: t.Sequence[str], as_json: bool) -> None:
+    """List all plugins with their status."""
+    wanted = set(status.lower() for status in statuses)
+    entries = [
+        entry for entry in _manager().catalog().entries
+        if not wanted or entry['status'].lower() in wanted
+    ]
+    if as_json:
+        click.echo(json.dumps(entries, default=str, indent=2))
+        return
+    for entry in entries:
+        status = entry['status'] + (' (deferred)' if entry['deferred'] else '')
+        click.echo(f'{entry["domain"]:<32}{status:<20}{entry["id"]:<36}{entry["name"]}')
+
+
+@plugins.command('load')
+@click.argument('domains', nargs=-1)
+def load(domains: t.Sequence[str]) -> None:
+    """Load plugins of DOMAINS, or all plugins."""
+    _operate('load', domains)
+
+
+@plugins.command('start')
+@click.argument('domains', nargs=-1)
+def start(domains: t.Sequence[str]) -> None:
+    """Load and start plugins of DOMAINS, or all plugins."""
+    _operate('start', domains)
+
+
+@plugins.command('install')
+@click.argument('sources', nargs=-1, required=True)
+@click.option('--bundle', 'as_bundle', is_flag=True, help='Keep archives as zip bundles.')
+@click.option('--force', is_flag=True, help='Replace installed plugins.')
+def install(sources: t.Sequence[str], as_bundle: bool, force: bool) -> None:
+    """Install plugins from zip archives, given as paths or URLs."""
+    manager = _manager()
+    for source in sources:
+        began = time.perf_counter()
+        try:
+            basedir = manager.install(source, as_bundle=as_bundle, force=force)
+        except (RuntimeError, OSError, ValueError, zipfile.BadZipFile) as error:
+            raise click.ClickException(f'{source}: {error}') from None
+        except jsonschema.ValidationError as error:
+            raise click.ClickException(f'{source}: invalid plugin config - {error.message}') from None
+        click.echo(f'install {basedir:<32}{_milliseconds(time.perf_counter() - began):>12}')
+
+
+def _run_requests(
+    paths: t.Sequence[str], concurrency: int
+) -> t.List[t.Tuple[str, int, float]]:
+    """Send GET requests to ``paths`` through test client, return status and seconds."""
+    client = current_app.test_client()
+
+    def _send(path: str) -> t.Tuple[str, int, float]:
+        began = time.perf_counter()
+        response = client.get(path)
+        response.close()
+        return path, response.status_code, time.perf_counter() - began
+
+    with futures.ThreadPoolExecutor(concurrency) as executor:
+        return list(executor.map(_send, paths))
+
+
+def _index_paths(manager: 'PluginManager', selected: t.Iterable['Plugin']) -> t.List[str]:
+    """Paths of GET rules without arguments of running plugins in ``selected``."""
+    prefixes = tuple(
+        manager.domain + '.' + plugin.domain + '.' for plugin in selected
+        if plugin.status.value == PluginStatus.Running)
+    return sorted(
+        rule.rule for rule in current_app.url_map.iter_rules()
+        if rule.endpoint.startswith(prefixes) and not rule.arguments and
+        'GET' in (rule.methods or ()))
+
+
+@plugins.command('warmup')
+@click.argument('domains', nargs=-1)
+@click.option('--url', 'urls', multiple=True,
+              help='Paths to request, defaults to GET routes without arguments.')
+@click.option('-c', '--concurrency', default=4, show_default=True,
+              type=click.IntRange(1), help='Concurrent requests.')
+def warmup(domains: t.Sequence[str], urls: t.Sequence[str], concurrency: int) -> None:
+    """
+    Start plugins of DOMAINS, or all plugins, running their warmups,
+    then request their routes once.
+    """
+    _operate('start', domains)
+    manager = _manager()
+    paths = list(urls) or _index_paths(manager, _select(manager, domains))
+    for path, status, seconds in _run_requests(paths, concurrency):
+        click.echo(f'{status:<8}{path:<48}{_milliseconds(seconds):>12}')
+
+
+@plugins.command('bench')
+@click.argument('urls', nargs=-1, required=True)
+@click.option('-n', '--requests', 'count', default=100, show_default=True,
+              type=click.IntRange(1), help='Requests sent to each path.')
+@click.option('-c', '--concurrency', default=4, show_default=True,
+              type=click.IntRange(1), help='Concurrent requests.')
+@click.option('--boot/--no-boot', default=True, show_default=True,
+              help='Start all plugins before benchmarking.')
+def bench(urls: t.Sequence[str], count: int, concurrency: int, boot: bool) -> None:
+    """Benchmark URLS through test client, print latency percentiles and throughput."""
+    if boot:
+        _operate('start', ())
+    for url in urls:
+        began = time.perf_counter()
+        results = _run_requests([url] * count, concurrency)
+        elapsed = time.perf_counter() - began
+        latencies = sorted(seconds for _path, _status, seconds in results)
+        failed = sum(1 for _path, status, _seconds in results if status >= 500)
+        quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+        click.echo(
+            f'{url}: {count} requests, {failed} failed, {count / elapsed:.1f} req/s, '
+            f'p50 {_milliseconds(quantiles[49])}, p95 {_milliseconds(quantiles[94])}, '
+            f'p99 {_milliseconds(quantiles[98])}')
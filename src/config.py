@@ -52,7 +52,32 @@ DefaultConfig: t.Dict[str, t.Any] = staticdict({
     'blueprint': 'plugins',
     'directory': 'plugins',
     'excludes_directory': ['__pycache__'],
-    'temporary_directory': '.temp'
+    'temporary_directory': '.temp',
+    'static_cache_size': 64 * 1024,
+    'static_compress': True,
+    'static_offload': None,
+    'static_offload_prefix': '/plugins-static',
+    'signal_dispatch': 'sync',
+    'signal_workers': 2,
+    'signal_queue_size': 1024,
+    'load_workers': 4,
+    'memory_budget': None,
+    'isolated': [],
+    'isolation_pool_size': 8,
+    'isolation_timeout': 10.,
+    'pycache_prefix': None,
+    'precompile': False,
+    'bytecode_invalidation': 'checked-hash',
+    'api': False,
+    'events_size': 1024,
+    'events_timeout': 30.,
+    'shared_registry': False,
+    'warmup_workers': 4,
+    'warmup_timeout': 10.,
+    'trace_sink': None,
+    'slow_request_threshold': None,
+    'profile_interval': 0.005,
+    'profiles_size': 32
 })
 """
 It will be using when config item not found in ``app.config``.
@@ -62,9 +87,80 @@ It will be using when config item not found in ``app.config``.
     DefaultConfig: t.Dict[str, t.Any] = staticdict({
         'blueprint': 'plugins',
         'directory': 'plugins',
-        'excludes_directory': ['__pycache__']
+        'excludes_directory': ['__pycache__'],
+        'temporary_directory': '.temp',
+        'static_cache_size': 64 * 1024,
+        'static_compress': True,
+        'static_offload': None,
+        'static_offload_prefix': '/plugins-static',
+        'signal_dispatch': 'sync',
+        'signal_workers': 2,
+        'signal_queue_size': 1024,
+        'load_workers': 4,
+        'memory_budget': None,
+        'isolated': [],
+        'isolation_pool_size': 8,
+        'isolation_timeout': 10.,
+        'pycache_prefix': None,
+        'precompile': False,
+        'bytecode_invalidation': 'checked-hash',
+        'api': False,
+        'events_size': 1024,
+        'events_timeout': 30.,
+        'shared_registry': False,
+        'warmup_workers': 4,
+        'warmup_timeout': 10.,
+        'trace_sink': None,
+        'slow_request_threshold': None,
+        'profile_interval': 0.005,
+        'profiles_size': 32
     })
 
+Static files of plugins are prepared by :py:class:`.static.StaticFiles`:
+files not larger than ``static_cache_size`` bytes are kept in memory,
+``static_compress`` enables precompressing them, and ``static_offload`` could be
+``'x-sendfile'`` or ``'x-accel-redirect'`` for letting front server send other files,
+the later one redirects to ``static_offload_prefix/{plugin.basedir}/{static_folder}/{filename}``.
+
+Lifecycle signals are sent synchronously when ``signal_dispatch`` is ``'sync'``,
+``'async'`` delivers them with :py:class:`.dispatch.AsyncDispatcher` using
+``signal_workers`` threads, each one holds at most ``signal_queue_size`` pending signals.
+
+Plugins are imported and loaded concurrently by at most ``load_workers`` threads, each one loaded
+as soon as its dependencies are loaded, see :py:meth:`.PluginManager.boot`.
+
+When ``memory_budget`` is set to bytes, least recently requested plugins are evicted
+after activating a deferred plugin, see :py:meth:`.PluginManager.evict`.
+
+Plugins whose directory names listed in ``isolated`` run in worker processes, see
+:py:mod:`.isolation`, each worker keeps at most ``isolation_pool_size`` idle connections,
+and ``isolation_timeout`` seconds are waited for starting or responding.
+
+Cached bytecode of plugin modules is written into and read from ``pycache_prefix`` relative
+to application root when it is set, other modules of the process are not affected.
+With ``precompile`` enabled, sources of plugin directories are compiled when first discovered
+using ``bytecode_invalidation`` mode, one of ``'timestamp'``, ``'checked-hash'`` and
+``'unchecked-hash'``, see :py:mod:`.bytecode`.
+
+Management API is served on blueprint of manager when ``api`` is enabled, see :py:mod:`.api`.
+Latest ``events_size`` lifecycle events are kept for change feed, whose consumers
+wait or stream at most ``events_timeout`` seconds a request, see :py:mod:`.events`.
+
+With ``shared_registry`` enabled, plugin modules are imported once for managers of all apps
+in process also enabling it, see :py:mod:`.registry`.
+
+Warmups of plugins being started run concurrently by at most ``warmup_workers`` threads,
+and routes are published after at most ``warmup_timeout`` seconds even if unfinished,
+see :py:meth:`.PluginManager.start_many`.
+
+Spans of plugin requests and lifecycle operations are exported to ``trace_sink``, which
+could be ``'memory'`` or path of a JSON lines file relative to application root,
+nothing is traced when it is None, see :py:mod:`.tracing`.
+
+Stacks of plugin requests slower than ``slow_request_threshold`` seconds are sampled
+every ``profile_interval`` seconds, latest ``profiles_size`` profiles of each plugin
+are kept, nothing is watched when it is None, see :py:mod:`.profiling`.
+
 :meta hide-value:
 """
 
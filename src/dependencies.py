@@ -0,0 +1,155 @@
+"""
+Dependency graph of plugins.
+
+Plugins declare other plugins they depend on in ``dependencies`` of ``plugin.json``,
+mapping plugin id to a version constraint parsed with ``packaging.specifiers``,
+an empty constraint accepts any version:
+
+.. code-block:: python
+
+    {
+        "id": "blog",
+        "version": "1.2.0",
+        "dependencies": {
+            "auth": ">=1.0,<2.0"
+        }
+    }
+
+Functions here order plugins so dependencies are always operated before their dependents,
+and group them into levels whose plugins don't depend on each other.
+"""
+
+import typing as t
+
+from packaging.specifiers import SpecifierSet
+from packaging.version import InvalidVersion, Version
+
+if t.TYPE_CHECKING:
+    from .plugin import Plugin
+
+
+def satisfies(plugin: 'Plugin', constraint: str) -> bool:
+    """
+    Check if version of ``plugin`` satisfies ``constraint``.
+
+    Plugins without version only satisfy empty constraint.
+    """
+    if not constraint:
+        return True
+    if plugin.version is None:
+        return False
+    try:
+        version = Version(plugin.version)
+    except InvalidVersion:
+        return False
+    return SpecifierSet(constraint).contains(version, prereleases=True)
+
+
+def check(plugin: 'Plugin', available: t.Mapping[str, 'Plugin']) -> None:
+    """
+    Check all dependencies of ``plugin`` could be found in ``available``
+    with required versions.
+
+    Args:
+        plugin (Plugin): plugin to be checked.
+        available (t.Mapping[str, Plugin]): plugins by id.
+
+    Raises:
+        RuntimeError: when dependency missing or its version not satisfied.
+    """
+    for id_, constraint in plugin.dependencies.items():
+        dependency = available.get(id_)
+        if dependency is None:
+            raise RuntimeError(f'missing dependency of plugin {plugin.name}: {id_}')
+        if not satisfies(dependency, constraint):
+            raise RuntimeError(
+                f'dependency of plugin {plugin.name} not satisfied: '
+                f'{id_} {constraint}, found {dependency.version}')
+
+
+def _cycle(plugins: t.Mapping[str, 'Plugin']) -> t.List[str]:
+    """Return names of plugins forming a dependency cycle among ``plugins``."""
+    visiting: t.List[str] = []
+    visited: t.Set[str] = set()
+
+    def _visit(id_: str) -> t.Optional[t.List[str]]:
+        if id_ in visiting:
+            return visiting[visiting.index(id_):] + [id_]
+        if id_ in visited:
+            return None
+        visiting.append(id_)
+        for dependency in plugins[id_].dependencies:
+            if dependency in plugins:
+                found = _visit(dependency)
+                if found:
+                    return found
+        visiting.pop()
+        visited.add(id_)
+        return None
+
+    for id_ in plugins:
+        found = _visit(id_)
+        if found:
+            return [plugins[item].name for item in found]
+    return []
+
+
+def levels(plugins: t.Iterable['Plugin']) -> t.List[t.List['Plugin']]:
+    """
+    Group ``plugins`` into levels, each plugin only depends on plugins
+    in former levels. Dependencies outside ``plugins`` are ignored.
+
+    Raises:
+        RuntimeError: when found dependency cycle.
+    """
+    pending = {plugin.id_: plugin for plugin in plugins}
+    remaining: t.Dict[str, int] = {}
+    required_by: t.Dict[str, t.List[str]] = {id_: [] for id_ in pending}
+    for id_, plugin in pending.items():
+        required = [dependency for dependency in plugin.dependencies if dependency in pending]
+        remaining[id_] = len(required)
+        for dependency in required:
+            required_by[dependency].append(id_)
+
+    grouped: t.List[t.List['Plugin']] = []
+    level = [id_ for id_, count in remaining.items() if not count]
+    while level:
+        grouped.append([pending[id_] for id_ in level])
+        following = []
+        for id_ in level:
+            for dependent in required_by[id_]:
+                remaining[dependent] -= 1
+                if not remaining[dependent]:
+                    following.append(dependent)
+        level = following
+
+    if sum(len(level) for level in grouped) != len(pending):
+        unresolved = {id_: pending[id_] for id_, count in remaining.items() if count}
+        raise RuntimeError('found dependency cycle: ' + ' -> '.join(_cycle(unresolved)))
+    return grouped
+
+
+def order(plugins: t.Iterable['Plugin']) -> t.List['Plugin']:
+    """
+    Sort ``plugins`` so dependencies come before their dependents.
+
+    Raises:
+        RuntimeError: when found dependency cycle.
+    """
+    return [plugin for level in levels(plugins) for plugin in level]
+
+
+def dependents(
+    plugins: t.Iterable['Plugin'], among: t.Iterable['Plugin']
+) -> t.Iterator[t.Tuple['Plugin', 'Plugin']]:
+    """
+    Yield couples of ``(dependent, dependency)`` where dependent in ``among``
+    but not in ``plugins`` depends on dependency in ``plugins``.
+    """
+    targets = {plugin.id_: plugin for plugin in plugins}
+    for plugin in among:
+        if plugin.id_ in targets:
+            continue
+        for id_ in plugin.dependencies:
+            if id_ in targets:
+                yield plugin, targets[id_]
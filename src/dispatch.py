@@ -0,0 +1,156 @@
+"""
+Dispatchers delivering lifecycle signals in :py:mod:`.signals`.
+
+By default signals are sent synchronously inside controllers of :py:class:`.PluginManager`,
+so a slow receiver blocks the operation. Setting config ``signal_dispatch`` to ``'async'``
+delivers them from background threads with :py:class:`AsyncDispatcher` instead.
+"""
+
+import logging
+import queue
+import threading
+import time
+import typing as t
+
+if t.TYPE_CHECKING:
+    from blinker import Signal  # type: ignore
+    from .plugin import Plugin
+
+
+class SyncDispatcher:
+    """Send signals directly in caller thread, exceptions raised by receivers are propagated."""
+
+    def send(self, signal: 'Signal', sender: t.Any, plugin: 'Plugin') -> None:
+        """
+        Send ``signal`` with ``plugin`` as argument.
+
+        Args:
+            signal (Signal): signal to be sent.
+            sender (t.Any): sender, instance of :py:class:`.PluginManager`.
+            plugin (Plugin): operated plugin.
+        """
+        signal.send(sender, plugin=plugin)
+
+    def flush(self, timeout: t.Optional[float] = None) -> bool:
+        """Nothing pending for synchronous dispatcher, always return True."""
+        return True
+
+    def close(self) -> None:
+        """Nothing to release for synchronous dispatcher."""
+        return
+
+
+class AsyncDispatcher(SyncDispatcher):
+    """
+    Deliver signals through bounded queues consumed by background worker threads.
+
+    Each plugin is always dispatched by the same worker, so signals of one plugin
+    are delivered in the order they were sent, while different plugins
+    could be delivered concurrently. When queue of a worker is full, sender blocks
+    until there is room, which bounds memory used by pending signals.
+
+    Workers are started lazily at first sending.
+
+    Args:
+        workers (int, optional): number of worker threads. Defaults to 2.
+        queue_size (int, optional): max pending signals of each worker. Defaults to 1024.
+        logger (logging.Logger, optional): logger for exceptions raised by receivers.
+    """
+
+    def __init__(
+        self, workers: int = 2, queue_size: int = 1024,
+        logger: t.Optional[logging.Logger] = None
+    ) -> None:
+        if workers < 1:
+            raise ValueError('at least one signal worker required')
+        self._logger = logger or logging.getLogger(__name__)
+        self._queues: t.List[queue.Queue] = [
+            queue.Queue(maxsize=queue_size) for _ in range(workers)
+        ]
+        self._threads: t.List[threading.Thread] = []
+        self._lock = threading.Lock()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            for index, pending in enumerate(self._queues):
+                thread = threading.Thread(
+                    target=self._work, args=(pending,),
+                    name=f'plugin-signals-{index}', daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self, pending: queue.Queue) -> None:
+        while True:
+            item = pending.get()
+            try:
+                if item is None:
+                    return
+                signal, sender, plugin = item
+                try:
+                    signal.send(sender, plugin=plugin)
+                except Exception:
+                    self._logger.exception(
+                        f'failed dispatch signal: {signal.name} - {plugin.name}')
+            finally:
+                pending.task_done()
+
+    def send(self, signal: 'Signal', sender: t.Any, plugin: 'Plugin') -> None:
+        if not self._threads:
+            self._start()
+        index = hash(plugin.id_) % len(self._queues)
+        self._queues[index].put((signal, sender, plugin))
+
+    def flush(self, timeout: t.Optional[float] = None) -> bool:
+        """
+        Wait until all pending signals delivered.
+
+        Args:
+            timeout (float, optional): seconds to wait at most, wait forever if None.
+
+        Returns:
+            bool: if all signals delivered before timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for pending in self._queues:
+            with pending.all_tasks_done:
+                while pending.unfinished_tasks:
+                    if deadline is None:
+                        pending.all_tasks_done.wait()
+                        continue
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    pending.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self) -> None:
+        """Deliver pending signals, then stop all workers."""
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for pending in self._queues[:len(threads)]:
+            pending.put(None)
+        for thread in threads:
+            thread.join()
+
+
+def create_dispatcher(
+    mode: str, workers: int = 2, queue_size: int = 1024,
+    logger: t.Optional[logging.Logger] = None
+) -> SyncDispatcher:
+    """
+    Create dispatcher by config ``signal_dispatch``.
+
+    Args:
+        mode (str): ``'sync'`` or ``'async'``.
+
+    Raises:
+        ValueError: when given unknown mode.
+    """
+    if mode == 'sync':
+        return SyncDispatcher()
+    if mode == 'async':
+        return AsyncDispatcher(workers, queue_size, logger)
+    raise ValueError(f'unknown signal dispatch mode: {mode}')
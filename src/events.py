@@ -0,0 +1,184 @@
+"""
+Change feed of plugin lifecycle events.
+
+Every lifecycle signal sent by :py:class:`.PluginManager` is also appended to an
+:py:class:`EventLog`, a bounded ring buffer numbering events with monotonic sequence
+numbers, so it keeps an audit history of latest events and lets consumers outside
+the process follow changes instead of polling status.
+
+With config ``api`` enabled, the feed is served at ``/{config.blueprint}/.events``:
+
+- long-poll: ``GET .events?since=42&timeout=30`` returns events after sequence 42
+  as JSON at once, or waits at most ``timeout`` seconds for the next ones.
+- server-sent events: with ``Accept: text/event-stream`` events are streamed with their
+  sequence numbers as ``id``, browsers reconnecting with ``Last-Event-ID`` resume
+  right after the last event received. Each stream is closed after ``timeout`` seconds.
+
+Without ``since``, consumers start from events appended after the request.
+When ``since`` is older than the oldest event kept, or newer than the last one as
+sequence numbers are counted by each process, ``truncated`` is reported
+and consumers should fetch status again.
+"""
+
+import collections
+import json
+import threading
+import time
+import typing as t
+
+from flask import Flask, Request, Response, abort, jsonify
+
+
+class Event(t.NamedTuple):
+    """One lifecycle event of a plugin."""
+    seq: int
+    time: float
+    event: str
+    id: str
+    domain: str
+    name: str
+
+    def to_dict(self) -> t.Dict[str, t.Any]:
+        return self._asdict()
+
+
+class EventLog:
+    """
+    Bounded ring buffer of :py:class:`Event`, safe to use from multiple threads.
+
+    Args:
+        capacity (int, optional): max events kept, oldest are dropped. Defaults to 1024.
+
+    Raises:
+        ValueError: when capacity is not positive.
+    """
+
+    def __init__(self, capacity: int = 1024) -> None:
+        if capacity < 1:
+            raise ValueError('event log capacity should be positive')
+        self._events: t.Deque[Event] = collections.deque(maxlen=capacity)
+        self._seq = 0
+        self._condition = threading.Condition()
+
+    def reinit(self) -> None:
+        """Create a new condition, called in forked child process."""
+        self._condition = threading.Condition()
+
+    @property
+    def last(self) -> int:
+        """Sequence number of last event, 0 if nothing appended."""
+        return self._seq
+
+    def append(self, event: str, id_: str, domain: str, name: str) -> Event:
+        """Append an event numbered with next sequence number, and wake up waiters."""
+        with self._condition:
+            self._seq += 1
+            appended = Event(self._seq, time.time(), event, id_, domain, name)
+            self._events.append(appended)
+            self._condition.notify_all()
+        return appended
+
+    def since(self, seq: int, limit: t.Optional[int] = None) -> t.Tuple[t.List[Event], bool]:
+        """
+        Return events after sequence number ``seq``, oldest first.
+
+        Args:
+            seq (int): sequence number of last event seen by consumer.
+            limit (int, optional): max events returned. Defaults to None.
+
+        Returns:
+            t.Tuple[t.List[Event], bool]: events, and if events after ``seq``
+            have been dropped from buffer, or ``seq`` is unknown, e.g. numbered
+            by another process.
+        """
+        with self._condition:
+            return self._since(seq, limit)
+
+    def _since(self, seq: int, limit: t.Optional[int]) -> t.Tuple[t.List[Event], bool]:
+        if seq >= self._seq:
+            return [], seq > self._seq
+        truncated = not self._events or self._events[0].seq > seq + 1
+        events = [event for event in self._events if event.seq > seq]
+        return events[:limit], truncated
+
+    def wait(
+        self, seq: int, timeout: float, limit: t.Optional[int] = None
+    ) -> t.Tuple[t.List[Event], bool]:
+        """
+        Like :py:meth:`since`, but wait at most ``timeout`` seconds
+        until any event appended after ``seq``.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._seq != seq, timeout)
+            return self._since(seq, limit)
+
+
+def _parse_seq(value: t.Optional[str], default: int) -> int:
+    if value is None or value == '':
+        return default
+    try:
+        seq = int(value)
+    except ValueError:
+        raise ValueError('sequence number should be an integer') from None
+    if seq < 0:
+        raise ValueError('sequence number should not be negative')
+    return seq
+
+
+def events_response(
+    app: Flask, request: Request, log: EventLog, max_timeout: float
+) -> Response:
+    """
+    Build long-poll or server-sent events response of ``log`` for ``request``.
+
+    Args:
+        max_timeout (float): max seconds waiting or streaming, also default timeout.
+
+    Raises:
+        BadRequest: when query arguments are invalid.
+    """
+    try:
+        seq = _parse_seq(
+            request.args.get('since', request.headers.get('Last-Event-ID')), log.last)
+        timeout = min(float(request.args.get('timeout', max_timeout)), max_timeout)
+        limit = int(request.args.get('limit', 100))
+    except ValueError as error:
+        abort(400, description=str(error.args[0]))
+    if timeout < 0 or limit < 1:
+        abort(400, description='timeout should not be negative, limit should be positive')
+
+    if request.accept_mimetypes.best == 'text/event-stream':
+        response = app.response_class(
+            _stream(log, seq, timeout, limit), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+
+    events, truncated = log.wait(seq, timeout, limit)
+    response = jsonify({
+        'events': [event.to_dict() for event in events],
+        'next': events[-1].seq if events else log.last if truncated else seq,
+        'truncated': truncated
+    })
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+def _stream(log: EventLog, seq: int, timeout: float, limit: int) -> t.Iterator[str]:
+    deadline = time.monotonic() + timeout
+    yield 'retry: 1000\n\n'
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        events, truncated = log.wait(seq, min(remaining, 15.), limit)
+        if truncated:
+            yield 'event: truncated\ndata: {}\n\n'
+            if not events:
+                seq = log.last
+        elif not events:
+            yield ': keepalive\n\n'
+        for event in events:
+            seq = event.seq
+            data = json.dumps(event.to_dict(), separators=(',', ':'))
+            yield f'id: {event.seq}\nevent: {event.event}\ndata: {data}\n\n'
@@ -0,0 +1,131 @@
+"""
+Handler chains and error handler tables compiled by plugins.
+
+Context handlers and error handlers decorated on :py:class:`.Plugin` are compiled
+once into :py:class:`HandlerChains` when plugin loaded, and installed into application
+as one unit when started, so restarting a plugin always installs the same handlers.
+
+Error handlers of a plugin are kept in an :py:class:`ErrorHandlerTable`, which resolves
+the handler of an exception class once and answers later lookups from a flat dict
+instead of walking method resolution order of the exception every time, also when
+Flask looks up handlers itself.
+"""
+
+import typing as t
+
+from flask import Flask
+
+ContextHandlers: t.Dict[str, str] = {
+    'before_request': 'before_request_funcs',
+    'after_request': 'after_request_funcs',
+    'teardown_request': 'teardown_request_funcs',
+    'context_processor': 'template_context_processors',
+    'url_value_preprocessor': 'url_value_preprocessors',
+    'url_defaults': 'url_default_functions'
+}
+"""Decorator names of context handlers, with containers storing them in Flask."""
+
+ErrorHandlers = t.Dict[t.Optional[int], t.Dict[t.Type[Exception], t.Callable]]
+
+
+class ResolvedHandlers(dict):
+    """
+    Error handlers of one code keyed by exception class, never changed once compiled.
+
+    Flask tries ``get`` with each class in method resolution order of the exception,
+    here the first try already resolves handler of the nearest class and remembers it,
+    so later lookups of the same exception class cost one dict lookup.
+    """
+
+    def __init__(self, mapping: t.Mapping[t.Type[Exception], t.Callable]) -> None:
+        super().__init__(mapping)
+        self._resolved: t.Dict[type, t.Optional[t.Callable]] = {}
+
+    def get(self, exc_class: type, default: t.Any = None) -> t.Any:  # type: ignore
+        try:
+            handler = self._resolved[exc_class]
+        except KeyError:
+            handler = None
+            for cls in getattr(exc_class, '__mro__', (exc_class,)):
+                handler = dict.get(self, cls)
+                if handler is not None:
+                    break
+            self._resolved[exc_class] = handler
+        return default if handler is None else handler
+
+
+class ErrorHandlerTable(dict):
+    """
+    Error handlers of one plugin in the same layout as ``app.error_handler_spec[name]``:
+    ``{code: {exception class: handler}}``, never changed once compiled.
+
+    Missing codes read as empty dicts without being inserted, so Flask and
+    copy-on-write routing snapshots can read it like a ``defaultdict``.
+    """
+
+    def __init__(self, handlers: t.Optional[ErrorHandlers] = None) -> None:
+        super().__init__(
+            (code, ResolvedHandlers(mapping)) for code, mapping in (handlers or {}).items())
+
+    def __missing__(self, code: t.Optional[int]) -> t.Dict:
+        return {}
+
+    def __copy__(self) -> 'ErrorHandlerTable':
+        # Immutable, so it can be shared by all snapshots
+        return self
+
+    def lookup(self, exc_class: type, code: t.Optional[int]) -> t.Optional[t.Callable]:
+        """
+        Return handler registered for ``code`` matching ``exc_class`` or its bases.
+
+        Args:
+            exc_class (type): class of raised exception.
+            code (int, optional): HTTP code of exception, None for handlers of classes.
+        """
+        return self[code].get(exc_class)
+
+
+class HandlerChains(t.NamedTuple):
+    """All handlers of one plugin compiled by :py:func:`compile_handlers`."""
+    chains: t.Dict[str, t.Tuple[t.Callable, ...]]
+    errors: ErrorHandlerTable
+
+    def install(self, app: Flask, name: str) -> None:
+        """Install all handlers into ``app`` for blueprint ``name``, replacing existing ones."""
+        for target in ContextHandlers.values():
+            chain = self.chains.get(target)
+            if chain:
+                getattr(app, target)[name] = list(chain)
+            elif name in getattr(app, target):
+                getattr(app, target).pop(name)
+        if self.errors:
+            app.error_handler_spec[name] = self.errors  # type: ignore
+        elif name in app.error_handler_spec:
+            app.error_handler_spec.pop(name)
+
+    @staticmethod
+    def uninstall(app: Flask, name: str) -> None:
+        """Remove all handlers of blueprint ``name`` from ``app``."""
+        for target in ContextHandlers.values():
+            if name in getattr(app, target):
+                getattr(app, target).pop(name)
+        if name in app.error_handler_spec:
+            app.error_handler_spec.pop(name)
+
+
+def compile_handlers(
+    prepared: t.Mapping[str, t.Sequence[t.Callable]], errors: ErrorHandlers
+) -> HandlerChains:
+    """
+    Compile handlers decorated on plugin.
+
+    Args:
+        prepared (t.Mapping[str, t.Sequence[t.Callable]]): decorator name in
+            :py:const:`ContextHandlers` to functions in decorating order.
+        errors (ErrorHandlers): error handlers by code and exception class.
+    """
+    chains = {
+        target: tuple(prepared.get(name, ()))
+        for name, target in ContextHandlers.items()
+    }
+    return HandlerChains(chains, ErrorHandlerTable(errors))
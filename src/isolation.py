@@ -0,0 +1,477 @@
+"""
+Out-of-process execution of plugins.
+
+Plugins listed in config ``isolated`` are not registered into application when started.
+Instead :py:class:`Workers` spawns a worker process serving the plugin with its own
+Flask application and :py:class:`.PluginManager`, and requests to plugin domain are
+proxied to it over a Unix domain socket. CPU-heavy or leaky plugins then no longer
+share GIL and heap with the application.
+
+Requests and responses are sent as frames::
+
+    !II header length, body length | JSON header | body
+
+Connections to each worker are pooled and reused across requests. A request is
+never sent twice once worker may have received it, a failed or timed out worker
+responds ``502 Bad Gateway``. A worker process found exited is spawned again,
+so a crashed worker fails only requests it was serving.
+Worker processes are started by :py:meth:`.PluginManager.start` and terminated
+by :py:meth:`.PluginManager.stop`.
+"""
+
+import argparse
+import json
+import logging
+import os
+import queue
+import shutil
+import socket
+import socketserver
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import typing as t
+
+from flask import Flask, Response, request
+from werkzeug.test import EnvironBuilder, run_wsgi_app
+
+if t.TYPE_CHECKING:
+    from .plugin import Plugin
+
+FrameHeader = struct.Struct('!II')
+"""Lengths of JSON header and body leading each frame."""
+
+HopByHopHeaders = frozenset((
+    'connection', 'keep-alive', 'transfer-encoding', 'content-length'
+))
+"""Headers describing a single connection, never forwarded."""
+
+ReadyMessage = b'ready\n'
+"""Line printed by worker when it is ready to accept connections."""
+
+ForwardedEnviron = ('wsgi.url_scheme', 'REMOTE_ADDR')
+"""Keys of WSGI environ forwarded to worker, which are not carried by headers."""
+
+
+def _receive(connection: socket.socket, size: int) -> bytes:
+    chunks, remaining = [], size
+    while remaining:
+        chunk = connection.recv(min(remaining, 1024 * 1024))
+        if not chunk:
+            raise ConnectionError('connection closed by peer')
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b''.join(chunks)
+
+
+def encode_frame(header: t.Dict[str, t.Any], body: bytes) -> bytes:
+    """Encode ``header`` and ``body`` as one frame."""
+    encoded = json.dumps(header, separators=(',', ':')).encode()
+    return FrameHeader.pack(len(encoded), len(body)) + encoded + body
+
+
+def send_frame(connection: socket.socket, header: t.Dict[str, t.Any], body: bytes) -> None:
+    """Send ``header`` and ``body`` as one frame."""
+    connection.sendall(encode_frame(header, body))
+
+
+def receive_frame(connection: socket.socket) -> t.Tuple[t.Dict[str, t.Any], bytes]:
+    """
+    Receive one frame.
+
+    Raises:
+        ConnectionError: when connection closed before a whole frame received.
+    """
+    header_size, body_size = FrameHeader.unpack(_receive(connection, FrameHeader.size))
+    header = json.loads(_receive(connection, header_size))
+    return header, _receive(connection, body_size)
+
+
+def _forwarded(headers: t.Iterable[t.Tuple[str, str]]) -> t.List[t.Tuple[str, str]]:
+    return [
+        (name, value) for name, value in headers if name.lower() not in HopByHopHeaders
+    ]
+
+
+class Worker:
+    """
+    One worker process serving a plugin, with its pooled connections.
+
+    Args:
+        process (subprocess.Popen): worker process.
+        address (str): path of Unix domain socket.
+        pool_size (int): max idle connections kept.
+        timeout (float): seconds waiting for a response.
+    """
+
+    def __init__(
+        self, process: subprocess.Popen, address: str,
+        pool_size: int, timeout: float
+    ) -> None:
+        self.process, self.address = process, address
+        self._timeout = timeout
+        self._idle: queue.LifoQueue = queue.LifoQueue(maxsize=pool_size)
+
+    def _connect(self) -> t.Tuple[socket.socket, bool]:
+        """Return an idle connection still open, or a new one, and if it is reused."""
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if self._alive(connection):
+                return connection, True
+            connection.close()
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.settimeout(self._timeout)
+        connection.connect(self.address)
+        return connection, False
+
+    @staticmethod
+    def _alive(connection: socket.socket) -> bool:
+        """Idle ``connection`` is closed by worker if readable, worker sends nothing unasked."""
+        timeout = connection.gettimeout()
+        connection.setblocking(False)
+        try:
+            connection.recv(1, socket.MSG_PEEK)
+        except BlockingIOError:
+            return True
+        except OSError:
+            return False
+        finally:
+            connection.settimeout(timeout)
+        return False
+
+    def _release(self, connection: socket.socket) -> None:
+        try:
+            self._idle.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def request(
+        self, header: t.Dict[str, t.Any], body: bytes
+    ) -> t.Tuple[t.Dict[str, t.Any], bytes]:
+        """
+        Send a request frame and receive response frame with a pooled connection.
+
+        A pooled connection may have been closed by worker, so sending is retried with
+        another connection only when writing the first bytes failed, i.e. worker never
+        received the request. Failures after anything written, and timeouts, are never
+        retried, as the request may have been executed by worker.
+
+        Raises:
+            OSError: when worker unreachable, or not responding in time.
+            ConnectionError: when connection closed before a whole frame received.
+        """
+        frame = encode_frame(header, body)
+        while True:
+            connection, reused = self._connect()
+            try:
+                written = connection.send(frame)
+            except socket.timeout:
+                connection.close()
+                raise
+            except OSError:
+                connection.close()
+                if reused:
+                    continue
+                raise
+            try:
+                if written < len(frame):
+                    connection.sendall(frame[written:])
+                response = receive_frame(connection)
+            except BaseException:
+                connection.close()
+                raise
+            self._release(connection)
+            return response
+
+    def disconnect(self) -> None:
+        """Close all pooled connections."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def close(self, timeout: float) -> None:
+        """Close pooled connections, then terminate worker process."""
+        self.disconnect()
+        self.process.terminate()
+        try:
+            self.process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        if self.process.stdout is not None:
+            self.process.stdout.close()
+
+
+class Workers:
+    """
+    Worker processes of isolated plugins, keyed by plugin domain.
+
+    Args:
+        app (Flask): host application, its import name, root path and
+            configs of plugin manager are passed to workers.
+        pool_size (int, optional): max idle connections kept per worker. Defaults to 8.
+        timeout (float, optional): seconds waiting for worker starting
+            or responding. Defaults to 10.
+    """
+
+    def __init__(self, app: Flask, pool_size: int = 8, timeout: float = 10.) -> None:
+        self._app = app
+        self._pool_size, self._timeout = pool_size, timeout
+        self._workers: t.Dict[str, Worker] = {}
+        self._plugins: t.Dict[str, 'Plugin'] = {}
+        self._respawning = threading.RLock()
+        self._directory: t.Optional[str] = None
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def __contains__(self, domain: str) -> bool:
+        return domain in self._workers
+
+    def spawn(self, plugin: 'Plugin') -> Worker:
+        """
+        Start worker process serving ``plugin``, wait until it's ready.
+
+        Raises:
+            RuntimeError: when worker exits or not ready before timeout.
+        """
+        with self._lock:
+            if plugin.domain in self._workers:
+                return self._workers[plugin.domain]
+            if self._directory is None:
+                self._directory = tempfile.mkdtemp(prefix='flask-plugin-')
+        address = os.path.join(self._directory, f'{plugin.domain}.sock')
+        if os.path.exists(address):
+            os.unlink(address)
+        configs = {
+            key: value for key, value in self._app.config.items()
+            if key.startswith('PLUGINS_') and key != 'PLUGINS_ISOLATED'
+        }
+        environ = dict(os.environ)
+        environ['PYTHONPATH'] = os.pathsep.join(path for path in sys.path if path)
+        process = subprocess.Popen([
+            sys.executable, '-c', f'from {__name__} import main; main()',
+            '--socket', address,
+            '--import-name', self._app.import_name,
+            '--root-path', self._app.root_path,
+            '--basedir', t.cast(str, plugin.basedir),
+            '--config', json.dumps(configs, default=str)
+        ], stdout=subprocess.PIPE, env=environ)
+
+        # Wait for ready message printed by worker
+        ready: t.List[bytes] = []
+        reader = threading.Thread(
+            target=lambda: ready.append(t.cast(t.IO[bytes], process.stdout).readline()),
+            daemon=True)
+        reader.start()
+        reader.join(self._timeout)
+        if not ready or ready[0] != ReadyMessage:
+            process.kill()
+            process.wait()
+            t.cast(t.IO[bytes], process.stdout).close()
+            raise RuntimeError(f'failed start worker of plugin: {plugin.name}')
+        worker = Worker(process, address, self._pool_size, self._timeout)
+        with self._lock:
+            self._workers[plugin.domain] = worker
+            self._plugins[plugin.domain] = plugin
+        return worker
+
+    def respawn(self, domain: str, worker: Worker) -> t.Optional[Worker]:
+        """
+        Replace ``worker`` serving ``domain`` with a new one if its process exited.
+
+        Concurrent requests finding the same worker exited spawn it only once,
+        later ones get the new worker.
+
+        Returns:
+            t.Optional[Worker]: worker serving ``domain``, None if terminated meanwhile.
+
+        Raises:
+            RuntimeError: when new worker exits or not ready before timeout.
+        """
+        with self._respawning:
+            with self._lock:
+                current = self._workers.get(domain)
+                plugin = self._plugins.get(domain)
+            if current is not worker or worker.process.poll() is None or plugin is None:
+                return current
+            self._app.logger.warning(
+                f'worker of plugin exited: {domain} - {worker.process.returncode}')
+            self.terminate(domain)
+            return self.spawn(plugin)
+
+    @property
+    def owned(self) -> bool:
+        """
+        If workers are owned by current process. Forked children share workers
+        of their parent, but never terminate them.
+        """
+        return os.getpid() == self._pid
+
+    def disconnect(self) -> None:
+        """
+        Close pooled connections of all workers, called around forking so
+        children never share connections with their parent.
+        In child process it also creates a new lock.
+        """
+        if not self.owned:
+            self._lock, self._respawning = threading.Lock(), threading.RLock()
+        for worker in list(self._workers.values()):
+            worker.disconnect()
+
+    def terminate(self, domain: str) -> None:
+        """Terminate worker serving ``domain`` if any, only disconnect if not owned."""
+        # Waits for respawning, so a worker stopped is never spawned again
+        with self._respawning, self._lock:
+            worker = self._workers.pop(domain, None)
+            self._plugins.pop(domain, None)
+        if worker is not None and not self.owned:
+            worker.disconnect()
+        elif worker is not None:
+            worker.close(self._timeout)
+            if os.path.exists(worker.address):
+                os.unlink(worker.address)
+
+    def close(self) -> None:
+        """Terminate all workers and remove their sockets."""
+        for domain in list(self._workers):
+            self.terminate(domain)
+        if self._directory is not None and self.owned:
+            shutil.rmtree(self._directory, ignore_errors=True)
+            self._directory = None
+
+    def proxy(self, domain: str) -> t.Callable[..., Response]:
+        """Create view forwarding current request to worker serving ``domain``."""
+
+        def _proxy(**_kwargs: t.Any) -> Response:
+            worker = self._workers.get(domain)
+            if worker is not None and worker.process.poll() is not None:
+                worker = self._respawn(domain, worker)
+            if worker is None:
+                return self._app.response_class('worker not running', 503)
+            header = {
+                'method': request.method,
+                'path': request.path,
+                'query': request.query_string.decode('latin-1'),
+                'headers': _forwarded(request.headers.items()),
+                'environ': {
+                    key: request.environ[key] for key in ForwardedEnviron
+                    if key in request.environ
+                }
+            }
+            try:
+                response, body = worker.request(header, request.get_data())
+            except (OSError, struct.error, ValueError) as error:
+                self._app.logger.error(f'failed request worker of plugin: {domain} - {error!r}')
+                # Request may have crashed worker, spawn it again for later requests
+                if worker.process.poll() is not None:
+                    self._respawn(domain, worker)
+                return self._app.response_class('bad gateway', 502)
+            return self._app.response_class(
+                body, response['status'], _forwarded(response['headers']))
+        return _proxy
+
+    def _respawn(self, domain: str, worker: Worker) -> t.Optional[Worker]:
+        try:
+            return self.respawn(domain, worker)
+        except RuntimeError as error:
+            self._app.logger.error(str(error))
+            return None
+
+
+class _Handler(socketserver.StreamRequestHandler):
+
+    server: '_Server'
+
+    def handle(self) -> None:
+        while True:
+            try:
+                header, body = receive_frame(self.connection)
+            except (ConnectionError, struct.error):
+                return
+            environ = EnvironBuilder(
+                path=header['path'], method=header['method'],
+                query_string=header['query'], headers=header['headers'], data=body,
+                environ_overrides=header.get('environ')
+            ).get_environ()
+            app_iter, status, headers = run_wsgi_app(
+                self.server.app.wsgi_app, environ, buffered=True)
+            try:
+                content = b''.join(app_iter)
+            finally:
+                if hasattr(app_iter, 'close'):
+                    app_iter.close()  # type: ignore
+            send_frame(self.connection, {
+                'status': int(status.split(' ', 1)[0]),
+                'headers': list(headers.items())
+            }, content)
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    app: Flask
+
+
+def create_worker_app(
+    import_name: str, root_path: str, basedir: str, config: t.Dict[str, t.Any]
+) -> Flask:
+    """
+    Create application of worker, serving plugin inside ``basedir``
+    together with its dependencies.
+
+    Dependencies are resolved from config files, only plugins required are imported.
+    """
+    from . import dependencies
+    from .manager import PluginManager
+
+    app = Flask(import_name, root_path=root_path)
+    app.config.update(config)
+    manager = PluginManager(app)
+    manifests = manager.manifests()
+    basedirs = {manifest.id: name for name, manifest in manifests.items()}
+
+    # Collect plugin with its dependencies
+    required, pending = set(), [basedir]
+    while pending:
+        name = pending.pop()
+        required.add(name)
+        pending.extend(
+            basedirs[id_] for id_ in manifests[name].get('dependencies', {})
+            if id_ in basedirs and basedirs[id_] not in required)
+    manager.boot(dependencies.order(manager.scan(required)))
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='serve an isolated plugin')
+    parser.add_argument('--socket', required=True)
+    parser.add_argument('--import-name', required=True)
+    parser.add_argument('--root-path', required=True)
+    parser.add_argument('--basedir', required=True)
+    parser.add_argument('--config', default='{}')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    app = create_worker_app(
+        args.import_name, args.root_path, args.basedir, json.loads(args.config))
+    server = _Server(args.socket, _Handler)
+    server.app = app
+    sys.stdout.buffer.write(ReadyMessage)
+    sys.stdout.flush()
+
+    # Nobody reads stdout after ready, outputs go to stderr
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,19 +1,96 @@
 
+import atexit
+import contextlib
+import contextvars
+from concurrent import futures
+import gc
 import importlib.util as imp
+import json
 from itertools import chain
 import os.path
+import shutil
+import sys
+import threading
+import time
 import typing as t
+import weakref
+import zipfile
+import zipimport
 
 from flask import Flask
 from flask import Blueprint
+from flask import abort
 from flask import current_app
 from flask.globals import request
 from jinja2.loaders import FileSystemLoader
 
 from . import utils
+from . import api
+from . import bundle
+from . import bytecode
+from . import canary
+from . import cli
+from . import events
+from . import profiling
+from . import registry
+from . import resources
+from . import routing
 from . import signals
-from .plugin import Plugin
-from .config import DefaultConfig, ConfigPrefix
+from . import states
+from . import tracing
+from . import dependencies
+from .dispatch import create_dispatcher
+from .isolation import Workers
+from .plugin import Plugin, remove_url_rules
+from .routing import PreviewEnviron, Router, Snapshot, Staging, copy_url_map
+from .routing import is_preview, pin, previewing
+from .templating import PluginJinjaLoader, PluginTemplateCache, select_loader
+from .transaction import Transaction
+from .config import ConfigFile, DefaultConfig, ConfigPrefix, validate
+
+
+LazyEndpoint = '__lazy__'
+"""Endpoint name of placeholder rules registered for deferred plugins."""
+
+
+ProxyEndpoint = '__proxy__'
+"""Endpoint name of rules proxying requests to isolated plugins."""
+
+InflightEnviron = 'plugin_manager.inflight'
+"""Key of WSGI environ recording domain of request in flight, kept from eviction."""
+
+ProxyMethods = ['GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS']
+"""HTTP methods proxied to isolated plugins."""
+
+StatusEndpoint = '__status__'
+"""Endpoint name of status API, see :py:mod:`.api`."""
+
+EventsEndpoint = '__events__'
+"""Endpoint name of change feed, see :py:mod:`.events`."""
+
+ProfilesEndpoint = '__profiles__'
+"""Endpoint name of profiles of slow requests, see :py:mod:`.profiling`."""
+
+DeferredEvent = 'plugin-deferred'
+"""Name of events recorded when plugins deferred, others are named as signals."""
+
+TracedOperations = {
+    'load': 'plugin.load',
+    'start': 'plugin.register',
+    'stop': 'plugin.unregister',
+    'unload': 'plugin.clean',
+    'warmup': 'plugin.warmup'
+}
+"""Span names of operations timed on each plugin, see :py:mod:`.tracing`."""
+
+
+class Deferred(t.NamedTuple):
+    """Plugin deferred by :py:meth:`.PluginManager.defer`, read from its config file."""
+    basedir: str
+    id_: str
+    domain: str
+    name: str
+    info: t.Dict[str, t.Any]
 
 
 class PluginManager:
@@ -31,6 +108,7 @@ class PluginManager:
       blueprint and the corresponding ``url_prefix``.
     - directory: the plugins path relative to the application directory.
     - excludes_directory: directories that are skipped when scanning.
+    - load_workers: threads importing and loading plugins concurrently.
 
     If app not provided, you can use :py:meth:`.PluginManager.init_app` with your app
     to initialize and configure later.
@@ -38,6 +116,25 @@ class PluginManager:
 
     def __init__(self, app: t.Optional[Flask] = None) -> None:
         self._loaded: t.Dict[Plugin, str] = {}
+        self._modules: t.Dict[str, t.Dict[str, weakref.ref]] = {}
+        self._released: t.Dict[str, weakref.ref] = {}
+        self._deferred: t.Dict[str, Deferred] = {}
+        self._activating: t.Dict[str, threading.Lock] = {}
+        self._activating_lock = threading.Lock()
+        self._accessed: t.Dict[str, float] = {}
+        self._inflight: t.Dict[str, int] = {}
+        self._inflight_lock = threading.Lock()
+        self._evicting = threading.Lock()
+        self._version = 0
+        self._scanned: t.Optional[t.Dict[str, t.Dict[str, t.Any]]] = None
+        self._catalog: t.Optional[api.Catalog] = None
+        self._catalog_key: t.Optional[t.Tuple[int, int]] = None
+        self._timings: t.Dict[str, t.Dict[str, float]] = {}
+        self._origins: t.Dict[str, str] = {}
+        self._precompiled: t.Set[str] = set()
+        self._pycache_prefix: t.Optional[str] = None
+        self._registry: t.Optional[registry.PluginRegistry] = None
+        self._canaries: t.Dict[str, canary.Canary] = {}
         if not app is None:
             self.init_app(app)
 
@@ -48,11 +145,16 @@ class PluginManager:
         Blueprint named ``config.blueprint`` will be created and registered
         in ``app`` with argument ``url_prefix`` as same as ``config.blueprint``.
         
-        Blueprint will have two functioncs registered as ``before_request`` and ``after_request``:
+        ``app.jinja_env.loader`` will be wrapped by :py:class:`.templating.PluginJinjaLoader`,
+        and blueprint will have a ``before_request`` function using
+        :py:meth:`.PluginManager.dynamic_select_jinja_loader` to select :py:meth:`.Plugin.jinja_loader`
+        for templates rendered by current request only, so concurrent requests never
+        see loader of each other.
 
-        - ``before_request``: using :py:meth:`.PluginManager.dynamic_select_jinja_loader` to set
-          app global jinja_loader in ``app.jinja_env.loader`` to :py:meth:`.Plugin.jinja_loader`.
-        - ``after_request``: restore ``app.jinja_env.loader`` to raw ``app.jinja_loader``.
+        At last a :py:class:`.routing.Router` is bound to ``app``, routing changes made by
+        lifecycle operations are published as copy-on-write snapshots, see :py:mod:`.routing`,
+        and ``app.wsgi_app`` is wrapped by :py:class:`.canary.CanaryRouter`, splitting requests
+        of plugins under canary release, see :py:meth:`canary`.
 
         ``app.plugin_manager`` will be bind to reference of current manager, so it can
         be used with request context using ``current_app.plugin_manager``.
@@ -62,36 +164,146 @@ class PluginManager:
         """
         self._app = app
         self._config = config = self.load_config(app)
+        self._dispatcher = create_dispatcher(
+            config.signal_dispatch, config.signal_workers,
+            config.signal_queue_size, app.logger
+        )
+        self._workers = Workers(app, config.isolation_pool_size, config.isolation_timeout)
+        self._events = events.EventLog(config.events_size)
+        self._resources = resources.ResourcePool()
+        self._tracer = tracing.Tracer(tracing.create_sink(config.trace_sink, app.root_path))
+        self._profiler = profiling.Profiler(
+            config.slow_request_threshold, config.profile_interval, config.profiles_size)
+        if config.shared_registry:
+            self._registry = registry.shared
+            self._resources = resources.shared
+
+        # Cached bytecode of plugin modules only is written into and read from ``pycache_prefix``
+        if config.bytecode_invalidation not in bytecode.Invalidations:
+            raise ValueError(
+                f'unknown bytecode invalidation mode: {config.bytecode_invalidation}')
+        if config.pycache_prefix:
+            self._pycache_prefix = os.path.join(app.root_path, config.pycache_prefix)
+        bytecode.scope(
+            self.basedir, self._package(), self._pycache_prefix, config.bytecode_invalidation)
+        atexit.register(self._workers.close)
 
         # Register Bluprint for plugin
         url_prefix = '/' + config.blueprint.lstrip('/')
         self._blueprint = Blueprint(config.blueprint, __name__)
 
-        # Replace and restore global `jinja_loader` in `app.jinja_env`
+        # Trace requests of plugins, before any other request function, see `.tracing`
+        tracing.instrument(app, self._blueprint, self._tracer, self._request_attributes)
+
+        # Sample stacks of slow requests of plugins, see `.profiling`
         @self._blueprint.before_request
-        def _replace_jinja_loader():
-            app.jinja_env.loader = self.dynamic_select_jinja_loader()
-            searchpath = app.jinja_env.loader.searchpath if app.jinja_env.loader else ''
-            app.logger.debug(
-                f'switched into plugin jinja loader: {searchpath}')
-
-        @self._blueprint.after_request
-        def _restore_jinja_loader(response):
-            app.jinja_env.loader = app.jinja_loader
-            searchpath = app.jinja_loader.searchpath if app.jinja_loader else ''
-            app.logger.debug(f'switched to app jinja loader: {searchpath}')
-            return response
+        def _watch_request():
+            names = request.blueprints
+            if self._profiler.enabled and len(names) == 2 and not is_preview(request.environ):
+                self._profiler.begin(
+                    utils.startstrip(names[0], config.blueprint + '.'),
+                    request.method, request.path, request.endpoint)
+
+        @self._blueprint.teardown_request
+        def _finish_request(_error):
+            self._profiler.finish()
+
+        # Select plugin `jinja_loader` for each request, global loader is never replaced
+        loader = app.jinja_env.loader = PluginJinjaLoader(app.jinja_env.loader)
+        if app.jinja_env.cache is not None:
+            app.jinja_env.cache = PluginTemplateCache(app.jinja_env.cache, loader)
+
+        # Record last access time and requests in flight of plugins for eviction
+        @self._blueprint.before_request
+        def _record_access():
+            names = request.blueprints
+            if len(names) == 2 and not is_preview(request.environ):
+                domain = utils.startstrip(names[0], config.blueprint + '.')
+                self._accessed[domain] = time.monotonic()
+                with self._inflight_lock:
+                    self._inflight[domain] = self._inflight.get(domain, 0) + 1
+                request.environ[InflightEnviron] = domain
+
+        @self._blueprint.teardown_request
+        def _finish_access(_error):
+            # Kept in environ, requests dispatched again after activation share ``g``
+            domain = request.environ.pop(InflightEnviron, None)
+            if domain is None:
+                return
+            with self._inflight_lock:
+                remaining = self._inflight.get(domain, 0) - 1
+                if remaining > 0:
+                    self._inflight[domain] = remaining
+                else:
+                    self._inflight.pop(domain, None)
+
+        @self._blueprint.before_request
+        def _select_jinja_loader():
+            with self._tracer.span('plugin.select_loader') as span:
+                loader = self.dynamic_select_jinja_loader()
+                span.set_attribute('template.searchpath', str(getattr(loader, 'searchpath', '')))
+            select_loader(loader)
+            searchpath = getattr(loader, 'searchpath', '')
+            app.logger.debug(f'selected plugin jinja loader: {searchpath}')
+
+        # Management API, see `.api`
+        if config.api:
+            @self._blueprint.route('/.status', endpoint=StatusEndpoint)
+            def _status():
+                return api.status_response(app, request, self.catalog())
+
+            @self._blueprint.route('/.events', endpoint=EventsEndpoint)
+            def _events():
+                return events.events_response(
+                    app, request, self._events, config.events_timeout)
+
+            @self._blueprint.route('/.profiles', endpoint=ProfilesEndpoint)
+            def _profiles():
+                return profiling.profiles_response(app, request, self._profiler)
 
         # Register blueprint into app
         app.register_blueprint(self._blueprint, url_prefix=url_prefix)
 
-        # Register ``app.plugin_manager``
+        # Register ``app.plugin_manager`` and ``flask plugins`` commands
         app.plugin_manager = self  # type: ignore
+        app.cli.add_command(cli.plugins)
+
+        # Routing changes are published as snapshots from now on
+        self._router = Router(app)
+
+        # Split requests between versions of plugins under canary release, see `.canary`
+        app.wsgi_app = canary.CanaryRouter(  # type: ignore
+            app.wsgi_app, config.blueprint, self._canaries)
+
+    def _request_attributes(self) -> t.Dict[str, t.Any]:
+        """Tracing attributes of plugin requested by current request."""
+        domain = utils.startstrip(request.blueprints[0], self._config.blueprint + '.')
+        attributes = {'plugin.domain': domain}
+        for plugin in list(self._loaded):
+            if plugin.domain == domain:
+                attributes['plugin.id'] = plugin.id_
+        return attributes
+
+    @property
+    def profiler(self) -> profiling.Profiler:
+        """
+        Profiler sampling stacks of slow plugin requests, set its ``threshold``
+        to enable or disable it, see :py:mod:`.profiling`.
+        """
+        return self._profiler
+
+    @property
+    def tracer(self) -> tracing.Tracer:
+        """
+        Tracer of plugin requests and lifecycle operations, set its ``sink``
+        to enable or disable tracing, see :py:mod:`.tracing`.
+        """
+        return self._tracer
 
     @staticmethod
     def dynamic_select_jinja_loader() -> t.Optional[FileSystemLoader]:
         """
-        Dynamic switch plugin ``jinja_loader`` to replace ``app.jinja_env.loader``.
+        Dynamic select plugin ``jinja_loader`` used by templates of current request.
         
         If routing to an exist plugin, ``request.blueprints`` will be a list like:
         ``['plugins.PLUGIN_DOMAIN', 'plugins']``.
@@ -99,7 +311,9 @@ class PluginManager:
         So select first blueprint and using ``.lstrip(self._config.blueprint + '.')``
         to get current plugin domain.
 
-        Then iter ``self._loaded`` plugins to find which domain are registered into it.
+        Then look up loader of running plugin registered at the domain in routing snapshot
+        pinned by current request, see :py:mod:`.routing`, so requests never see
+        plugins stopped or unloaded concurrently, nor wait for writers.
         And becasue ``Plugin`` inherit from ``Scaffold``, it can handle ``plugin.jinja_loader``
         correctly, just return it.
 
@@ -122,10 +336,8 @@ class PluginManager:
         domain = utils.startstrip(names[0], manager._config.blueprint + '.')
 
         # Dynamic switch plugin ``jinja_loader``
-        for plugin in manager._loaded:
-            if plugin.domain == domain:
-                return plugin.jinja_loader
-        return None
+        app = current_app._get_current_object()  # type: ignore
+        return routing.current(app).jinja_loaders.get(domain)
 
     @property
     def status(self) -> t.List[t.Dict]:
@@ -139,6 +351,60 @@ class PluginManager:
             plugin.export_status_to_dict() for plugin in self.plugins
         ]
 
+    @property
+    def state_version(self) -> int:
+        """
+        Counter increased whenever plugins known by manager or their status changed:
+        after each lifecycle operation, deferring, or scanning found different plugins.
+        """
+        return self._version
+
+    def _changed(self) -> None:
+        """Increase :py:attr:`state_version`, called with writer lock of router held."""
+        self._version += 1
+
+    def catalog(self) -> api.Catalog:
+        """
+        Return status of all plugins known by manager: loaded ones, deferred ones,
+        and unloaded ones found in plugins directory. Unloaded plugins are described
+        by their config files, so nothing is imported.
+
+        Catalog is built once for each :py:attr:`state_version` and version of routing
+        snapshots, and cached, so frequent polling of status API costs nothing more
+        than a lookup.
+
+        Returns:
+            api.Catalog: status of plugins at current state version.
+        """
+        # Versions are read first, catalog built on a changing state is rebuilt next time
+        key = (self._version, self._router.version)
+        catalog = self._catalog
+        if catalog is not None and self._catalog_key == key:
+            return catalog
+
+        loaded, deferred = self._loaded.copy(), list(self._deferred.values())
+        basedirs = set(loaded.values()).union(item.basedir for item in deferred)
+        entries = [dict(plugin.export_status_to_dict(), deferred=False) for plugin in loaded]
+        entries.extend({
+            'id': item.id_,
+            'name': item.name,
+            'status': states.PluginStatus.Unloaded.name,
+            'domain': item.domain,
+            'info': item.info,
+            'deferred': True
+        } for item in deferred)
+        entries.extend({
+            'id': manifest.id,
+            'name': manifest.plugin.name,
+            'status': states.PluginStatus.Unloaded.name,
+            'domain': manifest.domain,
+            'info': dict(manifest.plugin),
+            'deferred': False
+        } for basedir, manifest in self.manifests().items() if basedir not in basedirs)
+        catalog = self._catalog = api.build_catalog(key[0], entries)
+        self._catalog_key = key
+        return catalog
+
     @property
     def domain(self) -> str:
         """PluginMangaer domain bound to blueprint name and url_prefix."""
@@ -149,6 +415,11 @@ class PluginManager:
         """Return working dir for plugin manager."""
         return os.path.join(self._app.root_path, self._config.directory)
 
+    @property
+    def loaded(self) -> t.List[Plugin]:
+        """Plugins loaded by manager, dependencies first."""
+        return list(self._loaded)
+
     @property
     def plugins(self) -> t.Iterable[Plugin]:
         """
@@ -187,7 +458,7 @@ class PluginManager:
                 return plugin
         return None
 
-    def scan(self) -> t.Iterable[Plugin]:
+    def scan(self, basedirs: t.Optional[t.Iterable[str]] = None) -> t.Iterable[Plugin]:
         """
         Scan all unloaded plugin configured in ``config.directory``.
 
@@ -199,50 +470,365 @@ class PluginManager:
         
         ``app.import_name + '.' + config.directory + '.' + plugin.basedir``.
 
+        Plugins deployed as zip bundles named ``basedir + '.zip'`` are imported with
+        :py:mod:`zipimport`, see :py:mod:`.bundle`, a directory with the same name
+        takes precedence over bundle.
+
+        Plugins deferred by :py:meth:`defer` are skipped, they will be imported
+        when activated.
+
+        Args:
+            basedirs (t.Iterable[str], optional): directory names of plugins to be imported,
+                defaults to all unloaded plugins. Select them by :py:meth:`manifests`,
+                so plugins not needed are never imported.
+
         Yields:
             Iterator[t.Iterable[t.Tuple[Plugin, str]]]: couple :py:class:`.Plugin` with plugin dirname.
         """
-        excludes_directory: t.List[str] = self._config.excludes_directory
-        excludes_directory.append(self._config.temporary_directory)
-        for directory in utils.listdir(
-            self.basedir,
-            excludes=excludes_directory
-        ):
-            try:
-                # Variable ``modname`` represents ``module.__name__`` which will be pass
-                # into ``Plugin`` first parameter. Flask uses this variable for locating
-                # ``Scaffold.root_path``, so it starts with ``self._config.direcotry``
-                # and ends with plugin's direcorty name.
-                basedir = os.path.basename(directory)
-                if basedir in self._loaded.values():
-                    continue
+        scanned = {}
+        for location in self._unloaded(basedirs):
+            plugin = self._scan_location(location)
+            scanned[plugin.basedir] = plugin.export_status_to_dict()
+            yield plugin
+        if basedirs is None:
+            self._record_scanned(scanned)
 
-                # Define modname when load from app module
-                modname = self._config.directory + '.' + basedir
-                if self._app.import_name != '__main__':
-                    modname = self._app.import_name + '.' + modname
-                file = directory.rstrip('/') + '/__init__.py'
-
-                # Load module using ``importlib``
-                spec = imp.spec_from_file_location(modname, file)
-                if not spec or not spec.loader:
-                    raise ImportError('invalid direcotry.')
-                module = imp.module_from_spec(spec)
-                spec.loader.exec_module(module)
-
-                # Check if plugin module contains ``plugin`` variable
-                if not hasattr(module, 'plugin'):
-                    raise ImportError('module does not have plugin instance.')
-            except Exception as error:
-                self._app.logger.warn(
-                    f'failed import plugin: {os.path.basename(directory)} - {str(error.args[0])}'
-                )
-                raise
+    def _scan_concurrently(self) -> t.List[Plugin]:
+        """
+        Import all unloaded plugins like :py:meth:`scan`, by at most ``config.load_workers``
+        threads. Plugin modules are executed without each other in ``sys.modules``,
+        so they never depend on importing order.
+        """
+        locations = list(self._unloaded())
+        workers = min(self._config.load_workers, len(locations))
+        if workers <= 1:
+            return list(self.scan())
+        with futures.ThreadPoolExecutor(workers, thread_name_prefix='plugin-scan') as executor:
+            tasks = [
+                executor.submit(contextvars.copy_context().run, self._scan_location, location)
+                for location in locations
+            ]
+        plugins = [task.result() for task in tasks]
+        self._record_scanned({
+            t.cast(str, plugin.basedir): plugin.export_status_to_dict() for plugin in plugins
+        })
+        return plugins
+
+    def _unloaded(self, basedirs: t.Optional[t.Iterable[str]] = None) -> t.Iterator[str]:
+        """Yield locations of plugins neither loaded nor deferred, in ``basedirs`` if given."""
+        selected = None if basedirs is None else set(basedirs)
+        excludes = set(deferred.basedir for deferred in self._deferred.values())
+        for location in self._locations(excludes):
+            basedir = self._basedir_of(location)
+            if basedir in self._loaded.values():
+                continue
+            if selected is None or basedir in selected:
+                yield location
+
+    def _scan_location(self, location: str) -> Plugin:
+        with self._tracer.span(
+                'plugin.scan', **{'plugin.basedir': self._basedir_of(location)}) as span:
+            plugin = self._import(location)
+            for key, value in tracing.plugin_attributes(plugin).items():
+                span.set_attribute(key, value)
+        return plugin
+
+    def _record_scanned(self, scanned: t.Dict[str, t.Dict]) -> None:
+        """Record unloaded plugins found by a complete scanning for status API."""
+        with self._router.lock:
+            if scanned != self._scanned:
+                self._scanned = scanned
+                self._changed()
+
+    def manifests(self) -> t.Dict[str, utils.attrdict]:
+        """
+        Read config files of all plugins without importing them.
+
+        Returns:
+            t.Dict[str, utils.attrdict]: config of plugins keyed by directory name.
+        """
+        return {
+            self._basedir_of(location): self._read_config(location)
+            for location in self._locations()
+        }
+
+    def _locations(self, excludes: t.Iterable[str] = ()) -> t.Iterator[str]:
+        """Yield absolute paths of plugin directories and bundles, except ``excludes``."""
+        excludes_directory = set(self._config.excludes_directory)
+        excludes_directory.add(self._config.temporary_directory)
+        excludes_directory.update(excludes)
+        directories = list(utils.listdir(self.basedir, excludes=excludes_directory))
+        excludes_directory.update(os.path.basename(directory) for directory in directories)
+        yield from directories
+        yield from bundle.listbundles(self.basedir, excludes=excludes_directory)
+
+    @staticmethod
+    def _basedir_of(location: str) -> str:
+        basedir = os.path.basename(location)
+        if basedir.endswith(bundle.BundleSuffix) and os.path.isfile(location):
+            basedir = basedir[:-len(bundle.BundleSuffix)]
+        return basedir
+
+    def _locate(self, basedir: str) -> str:
+        """Return path of plugin directory or bundle named ``basedir``."""
+        directory = os.path.join(self.basedir, basedir)
+        archive = directory + bundle.BundleSuffix
+        if not os.path.isdir(directory) and os.path.isfile(archive):
+            return os.path.abspath(archive)
+        return os.path.abspath(directory)
+
+    def _import(self, location: str) -> Plugin:
+        """
+        Import plugin module inside directory or bundle ``location``, bind its ``basedir``.
+
+        With config ``shared_registry``, module is imported once for all managers
+        of process, and plugin returned is a copy made by :py:meth:`.Plugin.bind`,
+        see :py:mod:`.registry`.
+        """
+        basedir = self._basedir_of(location)
+        try:
+            if self._registry is not None:
+                module, imported = self._registry.module(location, self._exec_module)
+            else:
+                module, imported = self._exec_module(location)
+            self._track_modules(basedir, module, imported)
+        except Exception as error:
+            self._app.logger.warn(
+                f'failed import plugin: {basedir} - {str(error.args[0])}'
+            )
+            raise
+
+        # Bind ``basedir`` into plugin module
+        module.plugin.basedir = basedir
+        self._origins[basedir] = location
+        if self._registry is not None:
+            return module.plugin.bind()
+        return module.plugin
+
+    def _exec_module(self, location: str) -> t.Tuple[t.Any, t.Set[str]]:
+        """
+        Execute plugin module inside ``location``, return it with names of modules imported.
+
+        Module is put into ``sys.modules`` only while executing, so Flask could
+        locate root path of plugin from its ``__file__``, even inside a bundle.
+        """
+        basedir = self._basedir_of(location)
+
+        # Variable ``modname`` represents ``module.__name__`` which will be pass
+        # into ``Plugin`` first parameter. Flask uses this variable for locating
+        # ``Scaffold.root_path``, so it starts with ``self._config.direcotry``
+        # and ends with plugin's direcorty name.
+        modname = self._modname(basedir)
+        if basedir != os.path.basename(location):
+            importer = zipimport.zipimporter(location)
+            importer.invalidate_caches()
+            spec = importer.find_spec(modname)
+        else:
+            if self._config.precompile and location not in self._precompiled:
+                self._precompile(location)
+            file = location.rstrip('/') + '/__init__.py'
+            spec = imp.spec_from_file_location(modname, file)
+            if spec is not None and self._pycache_prefix is not None:
+                spec = bytecode.scoped(
+                    spec, self._pycache_prefix, self._config.bytecode_invalidation)
+
+        # Load module using ``importlib``, recording its module tree
+        if not spec or not spec.loader:
+            raise ImportError('invalid direcotry.')
+        module = imp.module_from_spec(spec)
+        existed = set(sys.modules)
+        sys.modules[modname] = module
+        try:
+            spec.loader.exec_module(module)
+
+            # Check if plugin module contains ``plugin`` variable
+            if not hasattr(module, 'plugin'):
+                raise ImportError('module does not have plugin instance.')
+        finally:
+            sys.modules.pop(modname, None)
+        self._app.logger.info(f'imported plugin: {module.plugin.name}')
+        return module, set(sys.modules) - existed
+
+    def _precompile(self, location: str, force: bool = False) -> t.List[Exception]:
+        """
+        Compile stale sources inside plugin directory, logging errors.
+
+        Directories compiled once are not compiled again when imported by next scanning,
+        sources changed later are compiled by the import system when imported.
+        """
+        basedir = os.path.basename(location)
+        self._precompiled.add(location)
+        compiled, errors = bytecode.compile_directory(
+            location, self._config.bytecode_invalidation, force, self._pycache_prefix)
+        if compiled:
+            self._app.logger.info(f'compiled plugin: {basedir} - {len(compiled)} files')
+        for error in errors:
+            self._app.logger.warning(f'failed compile plugin: {basedir} - {error}')
+        return errors
+
+    def precompile(
+        self, basedirs: t.Optional[t.Iterable[str]] = None, force: bool = False
+    ) -> t.Dict[str, t.List[Exception]]:
+        """
+        Compile sources of plugin directories without importing them, e.g. when
+        building image of application, so workers never compile plugins at boot.
+
+        Bytecode is written beside sources, or into ``config.pycache_prefix``,
+        and validated with ``config.bytecode_invalidation`` mode. Bundles are skipped,
+        see :py:mod:`.bytecode`.
+
+        Args:
+            basedirs (t.Iterable[str], optional): directory names of plugins,
+                defaults to all plugins.
+            force (bool, optional): compile sources even if bytecode not stale. Defaults to False.
+
+        Returns:
+            t.Dict[str, t.List[Exception]]: errors by plugin directory name,
+            e.g. syntax errors, empty if all sources compiled.
+        """
+        selected = None if basedirs is None else set(basedirs)
+        failed = {}
+        for location in self._locations():
+            basedir = os.path.basename(location)
+            if not os.path.isdir(location) or (selected is not None and basedir not in selected):
+                continue
+            errors = self._precompile(location, force)
+            if errors:
+                failed[basedir] = errors
+        return failed
+
+    def stale_bytecode(self) -> t.Dict[str, t.List[str]]:
+        """
+        Report sources of plugin directories whose cached bytecode is missing
+        or doesn't match source, see :py:func:`.bytecode.is_stale`.
+
+        Returns:
+            t.Dict[str, t.List[str]]: stale sources by plugin directory name,
+            plugins with all bytecode valid are omitted.
+        """
+        report = {}
+        for location in self._locations():
+            if os.path.isdir(location):
+                sources = bytecode.stale(location, self._pycache_prefix)
+                if sources:
+                    report[os.path.basename(location)] = sources
+        return report
+
+    def _package(self) -> str:
+        """Name of package containing plugin modules."""
+        package = self._config.directory
+        if self._app.import_name != '__main__':
+            package = self._app.import_name + '.' + package
+        return package
+
+    def _modname(self, basedir: str) -> str:
+        """Define modname of plugin module when load from app module."""
+        return self._package() + '.' + basedir
+
+    def _track_modules(
+        self, basedir: str, module: t.Any, imported: t.Iterable[str]
+    ) -> None:
+        """
+        Record plugin module and its submodules imported while executing it.
+
+        Only modules inside plugin package are tracked, third-party libraries
+        imported by plugin are shared with the app and will never be purged.
+        """
+        prefix = module.__name__ + '.'
+        tracked = self._modules.setdefault(basedir, {})
+        tracked[module.__name__] = weakref.ref(module)
+        for name in imported:
+            if name.startswith(prefix) and sys.modules.get(name) is not None:
+                tracked[name] = weakref.ref(sys.modules[name])
+
+    def modules(self, plugin: Plugin) -> t.List[str]:
+        """
+        Return names of modules imported by plugin, including plugin module itself.
+
+        Args:
+            plugin (Plugin): plugin scanned by manager.
+
+        Returns:
+            t.List[str]: module names.
+        """
+        return sorted(self._modules.get(plugin.basedir, {}))
+
+    def _purge_modules(self, plugin: Plugin) -> None:
+        """
+        Remove plugin module tree from ``sys.modules``, so next scanning
+        imports plugin freshly and old modules could be garbage collected.
+
+        Purged modules are still watched with weakrefs, see :py:meth:`leaks`.
+        Bundle of plugin is closed with importers cached for paths inside it,
+        so a replaced bundle is read freshly.
+        """
+        # Shared module may be imported by manager of another app, named after it
+        modname = next(iter(self._modules.get(plugin.basedir, {})), self._modname(plugin.basedir))
+        for name in list(sys.modules):
+            if name == modname or name.startswith(modname + '.'):
+                module = sys.modules.pop(name, None)
+
+                # Parent package keeps imported submodule as its attribute
+                parent, _, child = name.rpartition('.')
+                if getattr(sys.modules.get(parent), child, None) is module:
+                    delattr(sys.modules[parent], child)
+        self._released.update(self._modules.pop(plugin.basedir, {}))
+        if plugin.bundle is not None:
+            archive = plugin.bundle.archive
+            for path in list(sys.path_importer_cache):
+                if path == archive or path.startswith(archive + os.sep):
+                    sys.path_importer_cache.pop(path, None)
+            bundle.close_bundle(archive)
+
+    def _release(self, plugin: Plugin, finalize: bool = True) -> None:
+        """
+        Execute finalizers of plugin no longer loaded and purge its modules,
+        skipped when its module is shared with managers still having it loaded,
+        or with another version of plugin loaded, see :py:meth:`canary`.
+        """
+        if plugin.basedir in self._loaded.values():
+            return
+        location = self._origins.pop(plugin.basedir, None)
+        if self._registry is not None and location is not None and \
+                not self._registry.release(location, self):
+            self._modules.pop(plugin.basedir, None)
+            return
+        if finalize:
+            for error in plugin.finalize():
+                self._app.logger.error(
+                    f'failed finalize plugin: {plugin.name} - {error!r}')
+        self._purge_modules(plugin)
+
+    @property
+    def resources(self) -> resources.ResourcePool:
+        """
+        Pool of resources declared by plugins, see :py:mod:`.resources`,
+        shared by managers with config ``shared_registry`` enabled.
+        """
+        return self._resources
+
+    @property
+    def registry(self) -> t.Optional[registry.PluginRegistry]:
+        """Registry sharing plugin modules, None unless config ``shared_registry`` enabled."""
+        return self._registry
+
+    def leaks(self) -> t.List[str]:
+        """
+        Report modules of unloaded plugins which are still reachable.
 
-            # Bind ``basedir`` into plugin module
-            module.plugin.basedir = basedir
-            self._app.logger.info(f'imported plugin: {module.plugin.name}')
-            yield module.plugin
+        After unloading, the module tree of plugin has been removed from
+        ``sys.modules``, if anything still holds them (e.g. a receiver of signals
+        or a global cache keeping plugin functions) they cannot be freed.
+        This runs a full garbage collection, so don't call it in request path.
+
+        Returns:
+            t.List[str]: names of modules still alive after unloading.
+        """
+        gc.collect()
+        for name, ref in list(self._released.items()):
+            if ref() is None:
+                self._released.pop(name)
+        return sorted(self._released)
 
     def load_config(self, app: Flask) -> utils.staticdict:
         """
@@ -277,24 +863,7 @@ class PluginManager:
             RuntimeError: when plugin not scanned by :py:class:`.PluginManager`, 
                           which means have invalid attribute :py:obj:`.Plugin.basedir`.
         """
-        plugin.status.assert_allow('load')
-
-        # Check if duplicated plugin id
-        if plugin.id_ in [_.id_ for _ in self._loaded]:
-            raise RuntimeError(f'duplicated plugin id: {plugin.id_}')
-
-        # Check if duplicated plugin domain
-        if plugin.domain in [_.domain for _ in self._loaded]:
-            raise RuntimeError(f'duplicated plugin domain: {plugin.domain}')
-
-        # Check if plugin scaned by manager
-        if plugin.basedir is None:
-            raise RuntimeError('cannot get plugin basedir')
-
-        plugin.load(self._app, self._config)
-        self._loaded[plugin] = plugin.basedir
-        self._app.logger.info(f'loaded plugin: {plugin.name}')
-        signals.loaded.send(self, plugin=plugin)
+        self.load_many((plugin,))
 
     def start(self, plugin: Plugin) -> None:
         """
@@ -303,10 +872,7 @@ class PluginManager:
         Raises:
             RuntimeError: when plugin status not allowed to start.
         """
-        plugin.status.assert_allow('start')
-        plugin.register(self._app, self._config)
-        self._app.logger.info(f'started plugin: {plugin.name}')
-        signals.started.send(self, plugin=plugin)
+        self.start_many((plugin,))
 
     def stop(self, plugin: Plugin) -> None:
         """
@@ -315,10 +881,7 @@ class PluginManager:
         Raises:
             RuntimeError: when plugin status not allowed to stop.
         """
-        plugin.status.assert_allow('stop')
-        plugin.unregister(self._app, self._config)
-        self._app.logger.info(f'stopped plugin: {plugin.name}')
-        signals.stopped.send(self, plugin=plugin)
+        self.stop_many((plugin,))
 
     def unload(self, plugin: Plugin) -> None:
         """
@@ -327,8 +890,998 @@ class PluginManager:
         Raises:
             RuntimeError: when plugin status not allowed to unload.
         """
-        plugin.status.assert_allow('unload')
-        plugin.clean(self._app, self._config)
-        self._loaded.pop(plugin)
-        self._app.logger.info(f'unloaded plugin: {plugin.name}')
-        signals.unloaded.send(self, plugin=plugin)
+        self.unload_many((plugin,))
+
+    def _send(self, signal: t.Any, plugins: t.Iterable[Plugin]) -> None:
+        """
+        Send lifecycle ``signal`` for each plugin through configured dispatcher,
+        and record it in :py:attr:`events`.
+        """
+        for plugin in plugins:
+            self._events.append(signal.name, plugin.id_, plugin.domain, plugin.name)
+            self._dispatcher.send(signal, self, plugin)
+
+    @property
+    def events(self) -> events.EventLog:
+        """Change feed of lifecycle events, see :py:mod:`.events`."""
+        return self._events
+
+    def flush_signals(self, timeout: t.Optional[float] = None) -> bool:
+        """
+        Wait until all lifecycle signals delivered to receivers.
+
+        Only useful when config ``signal_dispatch`` is ``'async'``, e.g. in tests
+        checking receivers after an operation.
+
+        Args:
+            timeout (float, optional): seconds to wait at most, wait forever if None.
+
+        Returns:
+            bool: if all signals delivered before timeout.
+        """
+        return self._dispatcher.flush(timeout)
+
+    def _timed(
+        self, plugin: Plugin, operation: str,
+        function: t.Callable[..., t.Any], *args: t.Any, **kwargs: t.Any
+    ) -> t.Any:
+        """
+        Call ``function`` inside a span named by :py:data:`TracedOperations`,
+        and record seconds spent into :py:attr:`timings`.
+        """
+        began = time.perf_counter()
+        try:
+            with self._tracer.span(
+                    TracedOperations[operation], **tracing.plugin_attributes(plugin)):
+                return function(*args, **kwargs)
+        finally:
+            self._timings.setdefault(plugin.domain, {})[operation] = \
+                time.perf_counter() - began
+
+    @property
+    def timings(self) -> t.Dict[str, t.Dict[str, float]]:
+        """
+        Seconds spent by last ``'load'``, ``'start'``, ``'stop'`` and ``'unload'``
+        operation of each plugin, keyed by plugin domain. Only time spent on plugin
+        itself is counted, validating and publishing shared by the batch are not.
+        """
+        return self._timings
+
+    # Batched controllers
+    @staticmethod
+    def _assert_allow_all(plugins: t.Sequence[Plugin], operation: str) -> None:
+        """
+        Check every plugin allows ``operation`` before any of them is touched.
+
+        Raises:
+            RuntimeError: when any plugin status not allowed to ``operation``,
+                          or the same plugin given more than once.
+        """
+        if len(set(plugins)) != len(plugins):
+            raise RuntimeError(f'duplicated plugin in batch: {operation}')
+        for plugin in plugins:
+            plugin.status.assert_allow(operation)
+
+    def _assert_dependencies(self, plugins: t.Sequence[Plugin], operation: str) -> None:
+        """
+        Check dependencies of plugins allow ``operation``, see :py:mod:`.dependencies`.
+
+        Loading and starting require dependencies already loaded or running,
+        or inside the batch; stopping and unloading require no dependent left
+        running or loaded outside the batch.
+
+        Raises:
+            RuntimeError: when dependency missing, version not satisfied
+                          or dependents still working.
+        """
+        if operation in ('load', 'start'):
+            available = {
+                plugin.id_: plugin for plugin in self._loaded
+                if operation == 'load' or plugin.status.value == states.PluginStatus.Running
+            }
+            available.update((plugin.id_, plugin) for plugin in plugins)
+            for plugin in plugins:
+                dependencies.check(plugin, available)
+            return
+        among = (
+            plugin for plugin in self._loaded
+            if operation == 'unload' or plugin.status.value == states.PluginStatus.Running
+        )
+        for dependent, plugin in dependencies.dependents(plugins, among):
+            raise RuntimeError(
+                f'cannot {operation} plugin {plugin.name}: required by {dependent.name}')
+
+    @contextlib.contextmanager
+    def _operate(
+        self, plugins: t.Sequence[Plugin], operation: str
+    ) -> t.Iterator[Staging]:
+        """
+        Hold writer lock of router, validate the batch and yield a :py:class:`.routing.Staging`
+        for applying routing changes, which will be published as one snapshot when done.
+
+        Changes on plugins and manager are recorded in a :py:class:`.Transaction`,
+        so failure inside the batch rolls them back, and the staging is discarded.
+        """
+        with self._router.update() as staging, \
+                self._tracer.span('plugins.' + operation, **{'plugins.count': len(plugins)}):
+            self._assert_allow_all(plugins, operation)
+            self._assert_dependencies(plugins, operation)
+            transaction = Transaction(self._app)
+            transaction.record(self._loaded)
+            transaction.record(self._deferred)
+            for plugin in plugins:
+                transaction.record_plugin(plugin)
+            with transaction:
+                yield staging
+            self._changed()
+
+    def load_many(self, plugins: t.Iterable[Plugin]) -> None:
+        """
+        Load a batch of plugins.
+
+        All plugins are validated before any of them is loaded, and changes are made
+        inside a :py:class:`.Transaction`, so either all of them get loaded or none.
+        Signals are sent after the whole batch is done.
+
+        Plugins are loaded concurrently by at most ``config.load_workers`` threads,
+        each one as soon as its own dependencies inside the batch are loaded,
+        so a slow plugin only delays its dependents.
+
+        Raises:
+            RuntimeError: when any plugin status not allowed to load.
+            RuntimeError: when dependencies missing, not satisfied or forming a cycle.
+            RuntimeError: when found deplicated plugin id or domain, 
+                          among loaded plugins or inside the batch.
+            RuntimeError: when plugin not scanned by :py:class:`.PluginManager`.
+        """
+        batch = list(plugins)
+        with self._operate(batch, 'load') as staging:
+            ids = set(plugin.id_ for plugin in self._loaded)
+            domains = set(plugin.domain for plugin in self._loaded)
+            for plugin in batch:
+                # Check if duplicated plugin id
+                if plugin.id_ in ids:
+                    raise RuntimeError(f'duplicated plugin id: {plugin.id_}')
+
+                # Check if duplicated plugin domain, also with deferred plugins
+                if plugin.domain in domains:
+                    raise RuntimeError(f'duplicated plugin domain: {plugin.domain}')
+                deferred = self._deferred.get(plugin.domain)
+                if deferred and deferred.basedir != plugin.basedir:
+                    raise RuntimeError(f'duplicated plugin domain: {plugin.domain}')
+
+                # Check if plugin scaned by manager
+                if plugin.basedir is None:
+                    raise RuntimeError('cannot get plugin basedir')
+                ids.add(plugin.id_)
+                domains.add(plugin.domain)
+
+            try:
+                plugins = self._load_graph(staging, batch)
+                for plugin in plugins:
+                    self._loaded[plugin] = plugin.basedir
+            except Exception:
+                for plugin in batch:
+                    plugin.release_resources()
+                raise
+        for plugin in plugins:
+            if self._registry is not None:
+                self._registry.acquire(self._origins[plugin.basedir], self)
+            self._app.logger.info(f'loaded plugin: {plugin.name}')
+        self._send(signals.loaded, plugins)
+        self.evict(keep=[plugin.domain for plugin in plugins])
+
+    def _load_graph(self, staging: Staging, batch: t.Sequence[Plugin]) -> t.List[Plugin]:
+        """
+        Load plugins concurrently, each one submitted once its dependencies inside
+        ``batch`` are loaded. After a failure nothing more is submitted, and
+        the first exception is re-raised after running ones finished.
+
+        Returns:
+            t.List[Plugin]: plugins in order they were loaded, dependencies first.
+        """
+        ordered = dependencies.order(batch)
+        workers = min(self._config.load_workers, len(ordered))
+        if workers <= 1:
+            for plugin in ordered:
+                self._timed(plugin, 'load', plugin.load, staging, self._config, self._resources)
+            return ordered
+
+        pending = {plugin.id_: plugin for plugin in ordered}
+        remaining = {
+            id_: set(plugin.dependencies).intersection(pending) for id_, plugin in pending.items()
+        }
+        loaded: t.List[Plugin] = []
+        error: t.Optional[BaseException] = None
+        with futures.ThreadPoolExecutor(workers, thread_name_prefix='plugin-load') as executor:
+            running: t.Dict[futures.Future, Plugin] = {}
+
+            def _submit(plugin: Plugin) -> None:
+                running[executor.submit(
+                    contextvars.copy_context().run, self._timed, plugin, 'load', plugin.load,
+                    staging, self._config, self._resources)] = plugin
+
+            for plugin in ordered:
+                if not remaining[plugin.id_]:
+                    _submit(plugin)
+            while running:
+                done, _ = futures.wait(running, return_when=futures.FIRST_COMPLETED)
+                for task in done:
+                    plugin = running.pop(task)
+                    if task.exception() is not None:
+                        error = error or task.exception()
+                        continue
+                    loaded.append(plugin)
+                    for id_, required in remaining.items():
+                        if error is None and plugin.id_ in required:
+                            required.discard(plugin.id_)
+                            if not required:
+                                _submit(pending[id_])
+        if error is not None:
+            raise error
+        return loaded
+
+    def boot(self, plugins: t.Optional[t.Iterable[Plugin]] = None) -> None:
+        """
+        Import, load and start plugins following their dependency graph.
+
+        Without ``plugins`` given, unloaded plugins are imported concurrently. All plugins
+        are then loaded as one batch by :py:meth:`load_many`, each one as soon as its own
+        dependencies are loaded, and started as one batch by :py:meth:`start_many`, which
+        registers them into one routing staging published once. So time spent follows the
+        longest dependency chain instead of the number of plugins.
+
+        Args:
+            plugins (t.Iterable[Plugin], optional): plugins to boot,
+                defaults to all unloaded plugins found by :py:meth:`scan`.
+
+        Raises:
+            RuntimeError: when found duplicated plugin id or domain.
+            RuntimeError: when dependencies missing, not satisfied or forming a cycle.
+        """
+        plugins = list(self._scan_concurrently() if plugins is None else plugins)
+
+        # Graph of dependencies is keyed by id, duplicates must not be dropped silently
+        ids, domains = set(), set()
+        for plugin in plugins:
+            if plugin.id_ in ids:
+                raise RuntimeError(f'duplicated plugin id: {plugin.id_}')
+            if plugin.domain in domains:
+                raise RuntimeError(f'duplicated plugin domain: {plugin.domain}')
+            ids.add(plugin.id_)
+            domains.add(plugin.domain)
+        self.load_many(plugins)
+        self.start_many(plugins)
+
+    def shutdown(self) -> None:
+        """Stop all running plugins and unload all loaded plugins, dependents go first."""
+        self.stop_many([
+            plugin for plugin in self._loaded
+            if plugin.status.value == states.PluginStatus.Running
+        ])
+        self.unload_many(list(self._loaded))
+
+    def start_many(self, plugins: t.Iterable[Plugin]) -> None:
+        """
+        Start a batch of plugins.
+
+        Routes and handlers of all plugins are published together as one routing snapshot.
+        When any deferred registering function raises, all changes made by the batch
+        are discarded and the exception is re-raised.
+
+        Dependencies are started before their dependents.
+
+        Before publishing, functions and urls registered by :py:meth:`.Plugin.warmup`
+        and :py:meth:`.Plugin.add_warmup_url` are executed concurrently against the new
+        routing snapshot, at most ``config.warmup_timeout`` seconds, so the first real
+        requests never pay for lazy initializations. Failed warmups are only logged,
+        timed out ones are left running in background until they return.
+
+        Raises:
+            RuntimeError: when any plugin status not allowed to start.
+            RuntimeError: when dependencies not running nor inside the batch.
+        """
+        plugins = list(plugins)
+        with self._operate(plugins, 'start') as staging:
+            plugins = dependencies.order(plugins)
+            activated = [
+                plugin.domain for plugin in plugins
+                if plugin.domain in self._deferred
+            ]
+            self._remove_placeholders(staging, activated)
+            for domain in activated:
+                self._deferred.pop(domain)
+            spawned = []
+            try:
+                for plugin in plugins:
+                    if not self.isolated(plugin):
+                        self._timed(plugin, 'start', plugin.register, staging, self._config)
+                        staging.jinja_loaders[plugin.domain] = plugin.jinja_loader
+                        continue
+                    self._timed(plugin, 'start', self._workers.spawn, plugin)
+                    spawned.append(plugin.domain)
+                    self._register_proxy(staging, plugin)
+            except Exception:
+                for domain in spawned:
+                    self._workers.terminate(domain)
+                raise
+            self._warmup(staging, plugins)
+        for plugin in plugins:
+            self._app.logger.info(f'started plugin: {plugin.name}')
+        self._send(signals.started, plugins)
+        self.evict(keep=[plugin.domain for plugin in plugins])
+
+    def _warmup(self, staging: Staging, plugins: t.Sequence[Plugin]) -> None:
+        """
+        Run warmups of ``plugins`` concurrently against routing snapshot not published yet,
+        waiting at most ``config.warmup_timeout`` seconds. Failures are only logged.
+
+        Threads cannot be interrupted, warmups timed out keep running in background
+        until they return, and their results are dropped. Requests of warmup urls carry
+        :py:data:`.routing.PreviewEnviron`, so they are not counted as real traffic.
+        """
+        plugins = [plugin for plugin in plugins if plugin.warmups or plugin.warmup_urls]
+        if not plugins:
+            return
+        snapshot = self._router.preview(staging)
+        executor = futures.ThreadPoolExecutor(
+            min(self._config.warmup_workers, len(plugins)), thread_name_prefix='plugin-warmup')
+        tasks = {
+            executor.submit(
+                contextvars.copy_context().run,
+                self._timed, plugin, 'warmup', self._run_warmup, snapshot, plugin): plugin
+            for plugin in plugins
+        }
+        done, pending = futures.wait(tasks, timeout=self._config.warmup_timeout)
+        executor.shutdown(wait=False, cancel_futures=True)
+        for task in pending:
+            self._app.logger.warning(f'warmup timed out: {tasks[task].name}')
+        for task in done:
+            failure = task.exception()
+            for error in [failure] if failure is not None else task.result():
+                self._app.logger.warning(f'failed warmup plugin: {tasks[task].name} - {error!r}')
+
+    def _run_warmup(self, snapshot: Snapshot, plugin: Plugin) -> t.List[Exception]:
+        """Run warmup functions and request warmup urls of plugin with ``snapshot`` pinned."""
+        errors = []
+        prefix = '/' + self._config.blueprint + '/' + plugin.domain
+        with pin(self._app, snapshot), self._app.app_context():
+            if not self.isolated(plugin):
+                errors.extend(plugin.run_warmups())
+            client = self._app.test_client()
+            for path in plugin.warmup_urls:
+                response = client.get(prefix + path, environ_base={PreviewEnviron: True})
+                response.close()
+                if response.status_code >= 500:
+                    errors.append(RuntimeError(f'{path} responded {response.status}'))
+        return errors
+
+    def stop_many(self, plugins: t.Iterable[Plugin]) -> None:
+        """
+        Stop a batch of plugins.
+
+        Dependents are stopped before their dependencies.
+
+        Raises:
+            RuntimeError: when any plugin status not allowed to stop.
+            RuntimeError: when running dependents not inside the batch.
+        """
+        plugins = list(plugins)
+        with self._operate(plugins, 'stop') as staging:
+            plugins = dependencies.order(plugins)[::-1]
+            for plugin in plugins:
+                staging.jinja_loaders.pop(plugin.domain, None)
+                if not self.isolated(plugin):
+                    self._timed(plugin, 'stop', plugin.unregister, staging, self._config)
+                    continue
+                staging.view_functions[self._proxy_endpoint(plugin.domain)] = plugin.notfound
+                plugin.status.value = states.PluginStatus.Stopped
+        for plugin in plugins:
+            if self.isolated(plugin):
+                self._workers.terminate(plugin.domain)
+            self._app.logger.info(f'stopped plugin: {plugin.name}')
+        self._send(signals.stopped, plugins)
+
+    def unload_many(self, plugins: t.Iterable[Plugin]) -> None:
+        """
+        Unload a batch of plugins.
+
+        Unloading a single plugin rebuilds whole ``app.url_map``, here all url rules
+        of the batch are removed with only one rebuild using :py:func:`.plugin.remove_url_rules`.
+
+        After routing changes are published, finalizers of plugins are executed
+        with :py:meth:`.Plugin.finalize` and their module trees are removed from ``sys.modules``.
+
+        Dependents are unloaded before their dependencies.
+
+        Raises:
+            RuntimeError: when any plugin status not allowed to unload.
+            RuntimeError: when loaded dependents not inside the batch.
+        """
+        plugins = list(plugins)
+        with self._operate(plugins, 'unload') as staging:
+            plugins = dependencies.order(plugins)[::-1]
+            for plugin in plugins:
+                errors = self._timed(
+                    plugin, 'unload', plugin.clean, staging, self._config,
+                    excludes=('clean_url_rule',))
+                for error in errors:
+                    self._app.logger.error(
+                        f'failed dispose resource of plugin: {plugin.name} - {error!r}')
+                staging.jinja_loaders.pop(plugin.domain, None)
+                self._loaded.pop(plugin)
+            remove_url_rules(
+                staging, self._config, [plugin.domain for plugin in plugins])  # type: ignore
+        for plugin in plugins:
+            self._release(plugin)
+            self._app.logger.info(f'unloaded plugin: {plugin.name}')
+        self._send(signals.unloaded, plugins)
+
+    # Lazy activation
+    @property
+    def deferred(self) -> t.List[str]:
+        """Domains of plugins deferred by :py:meth:`defer` and not activated yet."""
+        return list(self._deferred)
+
+    def _placeholder_endpoint(self, domain: str) -> str:
+        return '.'.join((self._config.blueprint, domain, LazyEndpoint))
+
+    def _remove_placeholders(self, staging: Staging, domains: t.Collection[str]) -> None:
+        """Remove placeholder rules and views of ``domains`` registered by :py:meth:`defer`."""
+        endpoints = set(self._placeholder_endpoint(domain) for domain in domains)
+        if not endpoints:
+            return
+        staging.url_map = copy_url_map(staging.url_map, (
+            rule for rule in staging.url_map.iter_rules() if rule.endpoint not in endpoints
+        ), self._app.url_map_class)
+        for endpoint in endpoints:
+            staging.view_functions.pop(endpoint, None)
+
+    def defer(self, basedirs: t.Optional[t.Iterable[str]] = None) -> t.List[str]:
+        """
+        Defer activation of unloaded plugins until the first request to their domains.
+
+        Only config files of plugins are read, and a placeholder url rule is registered
+        for each domain. The first request reaching a placeholder activates the plugin
+        with :py:meth:`activate`, then it is dispatched again and served by the plugin.
+        So plugins never requested cost neither importing nor registering.
+
+        Args:
+            basedirs (t.Iterable[str], optional): directory names of plugins to be deferred,
+                defaults to all unloaded plugins.
+
+        Returns:
+            t.List[str]: domains deferred.
+
+        Raises:
+            RuntimeError: when found duplicated plugin domain.
+        """
+        selected = None if basedirs is None else set(basedirs)
+        deferred: t.Dict[str, Deferred] = {}
+        for location in self._locations():
+            basedir = self._basedir_of(location)
+            if selected is not None and basedir not in selected:
+                continue
+            config = self._read_config(location)
+            if config.domain in deferred:
+                raise RuntimeError(f'duplicated plugin domain: {config.domain}')
+            deferred[config.domain] = Deferred(
+                basedir, config.id, config.domain, config.plugin.name, dict(config.plugin))
+
+        with self._router.update() as staging:
+            loaded = set(self._loaded.values())
+            domains = set(plugin.domain for plugin in self._loaded)
+            for domain, item in list(deferred.items()):
+                if item.basedir in loaded or self._deferred.get(domain) == item:
+                    deferred.pop(domain)
+                elif domain in domains or domain in self._deferred:
+                    raise RuntimeError(f'duplicated plugin domain: {domain}')
+            for domain in deferred:
+                view = self._placeholder(domain)
+                url = '/' + self._config.blueprint + '/' + domain
+                endpoint = self._placeholder_endpoint(domain)
+                staging.add_url_rule(url + '/', endpoint, view)
+                staging.add_url_rule(url + '/<path:_path>', endpoint, view)
+            self._deferred.update(deferred)
+            if deferred:
+                self._changed()
+        for domain, item in deferred.items():
+            self._events.append(DeferredEvent, item.id_, domain, item.name)
+            self._app.logger.info(f'deferred plugin: {domain}')
+        return list(deferred)
+
+    def _read_config(self, location: str) -> utils.attrdict:
+        """Read and validate config file of plugin directory or bundle without importing it."""
+        if self._registry is not None:
+            return self._registry.manifest(location, self._parse_config)
+        return self._parse_config(location)
+
+    def _parse_config(self, location: str) -> utils.attrdict:
+        if os.path.isfile(location):
+            reader = bundle.Bundle(location)
+            try:
+                member = self._basedir_of(location) + '/' + ConfigFile
+                content = reader.read(member).decode('utf-8')
+            finally:
+                reader.close()
+        else:
+            with open(os.path.join(location, ConfigFile)) as handler:
+                content = handler.read()
+        config = json.loads(content, object_pairs_hook=lambda o: utils.attrdict(o))
+        validate(config)
+        return config
+
+    def _placeholder(self, domain: str) -> t.Callable[..., t.Any]:
+        """Create view of placeholder rules, activating plugin and dispatching again."""
+
+        def _activate_and_dispatch(**_kwargs: t.Any) -> t.Any:
+            # Requests warming up another plugin cannot wait for writer lock held by it
+            if previewing(self._app):
+                abort(503)
+            self.activate(domain)
+            environ = dict(request.environ)
+            environ.pop('werkzeug.request', None)
+            return self._app.response_class.from_app(self._app.wsgi_app, environ)
+        return _activate_and_dispatch
+
+    def activate(self, domain: str) -> t.Optional[Plugin]:
+        """
+        Import, load and start a plugin deferred by :py:meth:`defer`,
+        deferred dependencies of it are activated first.
+
+        Each domain is activated under its own lock, so concurrent first requests
+        activate the plugin only once, later ones just find it running.
+
+        Args:
+            domain (str): domain of deferred plugin.
+
+        Returns:
+            t.Optional[Plugin]: activated plugin, None if domain was never deferred.
+
+        Raises:
+            RuntimeError: when dependencies cannot be satisfied.
+        """
+        plugin = self._activate(domain, ())
+        self.evict(keep=[domain])
+        return plugin
+
+    def _activate(self, domain: str, chain: t.Tuple[str, ...]) -> t.Optional[Plugin]:
+        if domain in chain:
+            raise RuntimeError('found dependency cycle: ' + ' -> '.join(chain + (domain,)))
+        with self._activating_lock:
+            lock = self._activating.setdefault(domain, threading.Lock())
+        with lock:
+            deferred = self._deferred.get(domain)
+            if deferred is None:
+                for plugin in self._loaded:
+                    if plugin.domain == domain:
+                        return plugin
+                return None
+
+            # Activate deferred dependencies first
+            plugin = self._import(self._locate(deferred.basedir))
+            try:
+                loaded = set(item.id_ for item in self._loaded)
+                for id_ in plugin.dependencies:
+                    if id_ in loaded:
+                        continue
+                    for item in list(self._deferred.values()):
+                        if item.id_ == id_:
+                            self._activate(item.domain, chain + (domain,))
+                self.boot((plugin,))
+            except Exception:
+                if plugin not in self._loaded:
+                    self._release(plugin, finalize=False)
+                raise
+            self._app.logger.info(f'activated plugin: {plugin.name}')
+            return plugin
+
+    # Eviction
+    def memory(self, plugin: Plugin) -> int:
+        """
+        Approximate bytes held by plugin: shallow sizes of objects in its modules
+        and static files cached in memory. Objects shared with others are also counted,
+        so it's only useful for comparing plugins.
+
+        Args:
+            plugin (Plugin): plugin scanned by manager.
+
+        Returns:
+            int: approximate bytes.
+        """
+        size = 0
+        for ref in self._modules.get(plugin.basedir, {}).values():
+            module = ref()
+            if module is None:
+                continue
+            namespace = vars(module)
+            size += sys.getsizeof(namespace)
+            size += sum(sys.getsizeof(value) for value in namespace.values())
+        if plugin._static is not None:
+            size += plugin._static.memory
+        return size
+
+    def usage(self) -> t.Dict[str, t.Dict[str, t.Any]]:
+        """
+        Return usage of loaded plugins keyed by domain: seconds since last request
+        (None if never requested) and approximate memory from :py:meth:`memory`.
+        """
+        now = time.monotonic()
+        usage = {}
+        for plugin in list(self._loaded):
+            accessed = self._accessed.get(plugin.domain)
+            usage[plugin.domain] = {
+                'idle': None if accessed is None else now - accessed,
+                'memory': self.memory(plugin)
+            }
+        return usage
+
+    def evict(
+        self, budget: t.Optional[int] = None, keep: t.Iterable[str] = ()
+    ) -> t.List[str]:
+        """
+        Evict least recently requested plugins until approximate memory of
+        loaded plugins fits ``budget``.
+
+        Evicted plugins are stopped and unloaded with full module cleanup, then deferred
+        by :py:meth:`defer`, so they will be activated again by their next request.
+        Plugins still required by other loaded plugins are evicted after their dependents.
+        Plugins under canary release, serving requests in flight, or listed in ``keep``
+        are never evicted, so budget may stay exceeded.
+        Only one eviction runs at a time, calls during it return immediately.
+
+        Called after :py:meth:`load_many`, :py:meth:`start_many` and :py:meth:`activate`
+        keeping plugins just operated.
+
+        Args:
+            budget (int, optional): bytes allowed, defaults to ``config.memory_budget``,
+                nothing evicted if both are None.
+            keep (t.Iterable[str], optional): domains not to be evicted.
+
+        Returns:
+            t.List[str]: domains of evicted plugins.
+        """
+        budget = self._config.memory_budget if budget is None else budget
+        if budget is None or not self._evicting.acquire(blocking=False):
+            return []
+        try:
+            canaried = set(chain.from_iterable(
+                (item.stable, item.shadow) for item in self._canaries.values()))
+            with self._inflight_lock:
+                kept = set(keep) | set(self._inflight)
+            loaded = list(self._loaded)
+            sizes = {plugin: self.memory(plugin) for plugin in loaded}
+            total, evicted = sum(sizes.values()), []
+            for plugin in loaded:
+                if plugin in canaried or plugin.domain in kept:
+                    sizes.pop(plugin)
+            while total > budget and sizes:
+                victims = sorted(sizes, key=lambda plugin: self._accessed.get(plugin.domain, 0.))
+                victim = next((
+                    plugin for plugin in victims
+                    if not any(dependencies.dependents((plugin,), self._loaded))
+                ), None)
+                if victim is None:
+                    break
+                if victim.status.value == states.PluginStatus.Running:
+                    self.stop(victim)
+                self.unload(victim)
+                self.defer([t.cast(str, victim.basedir)])
+                total -= sizes.pop(victim)
+                self._accessed.pop(victim.domain, None)
+                evicted.append(victim.domain)
+                self._app.logger.info(f'evicted plugin: {victim.name}')
+            return evicted
+        finally:
+            self._evicting.release()
+
+    # Canary releases
+    @property
+    def canaries(self) -> t.Dict[str, canary.Canary]:
+        """Plugins under canary release keyed by domain, see :py:meth:`canary`."""
+        return dict(self._canaries)
+
+    def canary(
+        self, plugin: Plugin, weight: float = 0.,
+        header: t.Optional[str] = 'X-Plugin-Canary', cookie: t.Optional[str] = 'plugin-canary',
+        max_error_rate: t.Optional[float] = None, min_requests: int = 100
+    ) -> canary.Canary:
+        """
+        Start another version of a running plugin side by side, and split its requests
+        between both versions, see :py:mod:`.canary`.
+
+        ``plugin`` is scanned from another directory with the same domain, a copy of it made by
+        :py:meth:`.Plugin.bind` is loaded and started under domain and id suffixed by
+        :py:data:`.canary.CanarySuffix`, so it never conflicts with stable version.
+        Change weight of returned canary to move traffic, then finish the release by
+        :py:meth:`promote` or :py:meth:`rollback`.
+
+        Args:
+            plugin (Plugin): unloaded new version of plugin.
+            weight (float, optional): share of traffic to canary, from 0 to 1. Defaults to 0.
+            header (str, optional): request header forcing version, None to disable.
+            cookie (str, optional): cookie choosing version, None to disable.
+            max_error_rate (float, optional): error rate of canary which stops sending
+                traffic to it, None to disable.
+            min_requests (int, optional): canary requests before checking error rate.
+
+        Returns:
+            canary.Canary: traffic split and metrics of both versions.
+
+        Raises:
+            RuntimeError: when no running plugin of the domain, or it has a canary already.
+            RuntimeError: when plugin not unloaded, isolated, or is the stable version itself.
+            ValueError: when weight or max_error_rate not between 0 and 1.
+            ValueError: when min_requests less than 1.
+        """
+        with self._router.lock:
+            stable = next((
+                item for item in self._loaded if item.domain == plugin.domain and
+                item.status.value == states.PluginStatus.Running
+            ), None)
+            if stable is None:
+                raise RuntimeError(f'no running plugin to canary: {plugin.domain}')
+            if plugin.domain in self._canaries:
+                raise RuntimeError(f'plugin already has a canary: {plugin.domain}')
+            if plugin.status.value != states.PluginStatus.Unloaded or \
+                    plugin.basedir is None or plugin.basedir == stable.basedir:
+                raise RuntimeError(f'cannot canary plugin: {plugin.basedir}')
+            if self.isolated(plugin) or self.isolated(stable):
+                raise RuntimeError(f'cannot canary isolated plugin: {plugin.domain}')
+
+            shadow = plugin.bind(
+                plugin.domain + canary.CanarySuffix, plugin.id_ + canary.CanarySuffix)
+            released = canary.Canary(
+                stable, plugin, shadow, weight, header, cookie, max_error_rate, min_requests)
+            # Registered first, so eviction after loading keeps both versions
+            self._canaries[plugin.domain] = released
+            try:
+                self.load_many((shadow,))
+            except Exception:
+                self._canaries.pop(plugin.domain)
+                raise
+            try:
+                self.start_many((shadow,))
+            except Exception:
+                self._canaries.pop(plugin.domain)
+                self.unload_many((shadow,))
+                raise
+        self._app.logger.info(f'started canary of plugin: {plugin.name} - {plugin.basedir}')
+        return released
+
+    def rollback(self, domain: str) -> None:
+        """
+        Send all requests of ``domain`` to stable version at once,
+        then stop and unload canary version.
+
+        Raises:
+            RuntimeError: when no canary of ``domain``.
+        """
+        with self._router.lock:
+            released = self._canaries.pop(domain, None)
+            if released is None:
+                raise RuntimeError(f'no canary of plugin: {domain}')
+            self._retire(released.shadow)
+        self._app.logger.info(f'rolled back canary of plugin: {released.plugin.name}')
+
+    def promote(self, domain: str) -> Plugin:
+        """
+        Replace stable version of ``domain`` by its canary.
+
+        All requests go to canary while stable version is unloaded and new version is loaded
+        and started under the domain, then canary copy is unloaded, so the domain never
+        stops serving. On failure all requests go back to stable version if still running.
+
+        Returns:
+            Plugin: new version running under ``domain``.
+
+        Raises:
+            RuntimeError: when no canary of ``domain``.
+            RuntimeError: when stable version is required by other loaded plugins.
+        """
+        with self._router.lock:
+            released = self._canaries.get(domain)
+            if released is None:
+                raise RuntimeError(f'no canary of plugin: {domain}')
+            released.promoting = True
+            try:
+                self._retire(released.stable)
+                self.boot((released.plugin,))
+            except Exception:
+                # Keep sending requests to canary if stable version is gone
+                released.promoting = released.stable.status.value == states.PluginStatus.Unloaded
+                raise
+            self._canaries.pop(domain)
+            self._retire(released.shadow)
+        self._app.logger.info(f'promoted canary of plugin: {released.plugin.name}')
+        return released.plugin
+
+    def _retire(self, plugin: Plugin) -> None:
+        """Stop plugin if running, then unload it."""
+        if plugin.status.value == states.PluginStatus.Running:
+            self.stop_many((plugin,))
+        self.unload_many((plugin,))
+
+    # Isolation
+    def isolated(self, plugin: Plugin) -> bool:
+        """If ``plugin`` runs in a worker process, configured by ``config.isolated``."""
+        return plugin.basedir in self._config.isolated
+
+    def _proxy_endpoint(self, domain: str) -> str:
+        return '.'.join((self._config.blueprint, domain, ProxyEndpoint))
+
+    def _register_proxy(self, staging: Staging, plugin: Plugin) -> None:
+        """
+        Register rules proxying all requests of plugin domain to its worker,
+        see :py:mod:`.isolation`, instead of executing deferred registering functions.
+        """
+        endpoint = self._proxy_endpoint(plugin.domain)
+        view = self._workers.proxy(plugin.domain)
+        if endpoint in staging.view_functions:
+            staging.view_functions[endpoint] = view
+        else:
+            url = '/' + self._config.blueprint + '/' + plugin.domain
+            for rule in (url + '/', url + '/<path:_path>'):
+                staging.add_url_rule(rule, endpoint, view, methods=ProxyMethods)
+        plugin.status.value = states.PluginStatus.Running
+
+    # Installation
+    def install(self, source: str, as_bundle: bool = False, force: bool = False) -> str:
+        """
+        Install plugin from a zip archive, given as path or URL downloaded
+        into ``config.temporary_directory`` first.
+
+        Archive should contain the plugin directory, like bundles, see :py:mod:`.bundle`.
+        The plugin is extracted into plugins directory and compiled with :py:meth:`precompile`,
+        or kept as a bundle with ``as_bundle``. Files are moved into place by renaming,
+        so concurrent scanning never sees a half-written plugin.
+        Installed plugin is only discovered, never loaded.
+
+        Args:
+            source (str): path or URL of zip archive.
+            as_bundle (bool, optional): keep archive as bundle. Defaults to False.
+            force (bool, optional): replace installed plugin with the same directory name,
+                it must not be loaded. Defaults to False.
+
+        Returns:
+            str: directory name of installed plugin.
+
+        Raises:
+            RuntimeError: when archive has no plugin directory inside, or plugin installed
+                and not replaceable.
+            jsonschema.ValidationError: when config file of plugin not valid.
+        """
+        temporary = os.path.join(self.basedir, self._config.temporary_directory)
+        os.makedirs(temporary, exist_ok=True)
+        archive, downloaded = source, source.startswith(('http://', 'https://'))
+        if downloaded:
+            archive = os.path.join(temporary, os.path.basename(source.split('?')[0]) or 'plugin.zip')
+            for _progress in utils.download(source, archive):
+                pass
+        try:
+            with zipfile.ZipFile(archive) as handler:
+                names = handler.namelist()
+                tops = set(name.split('/', 1)[0] for name in names)
+                basedir = tops.pop() if len(tops) == 1 else ''
+                if not basedir or basedir + '/' + ConfigFile not in names:
+                    raise RuntimeError(f'no plugin directory inside archive: {source}')
+                self._assert_plain_basedir(basedir)
+                validate(json.loads(
+                    handler.read(basedir + '/' + ConfigFile),
+                    object_pairs_hook=lambda o: utils.attrdict(o)))
+                if basedir in self._loaded.values():
+                    raise RuntimeError(f'cannot replace loaded plugin: {basedir}')
+                directory = os.path.join(self.basedir, basedir)
+                target = directory + bundle.BundleSuffix if as_bundle else directory
+                for path in (directory, target):
+                    if os.path.dirname(os.path.realpath(path)) != os.path.realpath(self.basedir):
+                        raise RuntimeError(f'invalid plugin directory name: {basedir}')
+                for existed in (directory, directory + bundle.BundleSuffix):
+                    if os.path.exists(existed) and not force:
+                        raise RuntimeError(f'plugin already installed: {basedir}')
+
+                # Move prepared plugin into place by renaming
+                staged = os.path.join(temporary, f'{basedir}.{os.getpid()}.{time.time_ns()}')
+                if as_bundle:
+                    shutil.copyfile(archive, staged)
+                else:
+                    handler.extractall(staged)
+                    staged = os.path.join(staged, basedir)
+                for existed in (directory, directory + bundle.BundleSuffix):
+                    if existed == target and as_bundle:
+                        continue
+                    if os.path.isdir(existed):
+                        utils.rmdir(existed)
+                    elif os.path.exists(existed):
+                        os.unlink(existed)
+                os.replace(staged, target)
+                if not as_bundle:
+                    shutil.rmtree(os.path.dirname(staged), ignore_errors=True)
+        finally:
+            if downloaded and os.path.exists(archive):
+                os.unlink(archive)
+        if not as_bundle:
+            self.precompile([basedir])
+        self._app.logger.info(f'installed plugin: {basedir}')
+        return basedir
+
+    def _assert_plain_basedir(self, basedir: str) -> None:
+        """
+        Check ``basedir`` from archive is a plain directory name,
+        so installing never replaces anything outside plugins directory.
+
+        Raises:
+            RuntimeError: when ``basedir`` is not a plain directory name.
+        """
+        separators = set(filter(None, (os.sep, os.altsep, '/', '\\')))
+        if basedir in ('', '.', '..') or any(sep in basedir for sep in separators) or \
+                basedir != os.path.basename(basedir) or \
+                basedir == self._config.temporary_directory:
+            raise RuntimeError(f'invalid plugin directory name: {basedir}')
+
+    # Preload and fork
+    def prefork(self, freeze: bool = True) -> None:
+        """
+        Prepare for forking worker processes, called once in parent process
+        after plugins are preloaded, e.g. by ``pre_fork`` hook of gunicorn.
+
+        Functions registered by :py:meth:`.Plugin.before_fork` are executed,
+        resources declared by plugins are disposed and created again in workers,
+        pending signals are delivered and dispatcher threads are stopped,
+        pooled connections to isolated workers are closed.
+
+        With ``freeze``, garbage collector is disabled and all objects are moved
+        into permanent generation by :py:func:`gc.freeze`, so children never touch
+        memory pages of preloaded objects while collecting, and pages keep shared
+        copy-on-write. Collector is enabled again in children by :py:meth:`postfork`,
+        parent keeps it disabled as recommended by Python documentation.
+
+        Args:
+            freeze (bool, optional): freeze all objects by gc. Defaults to True.
+        """
+        for plugin in self._loaded:
+            for error in plugin.prefork():
+                self._app.logger.error(
+                    f'failed prefork plugin: {plugin.name} - {error!r}')
+        for error in self._resources.reset():
+            self._app.logger.error(f'failed dispose resource: {error!r}')
+        self._dispatcher.flush()
+        self._dispatcher.close()
+        self._workers.disconnect()
+        if freeze:
+            gc.disable()
+            gc.freeze()
+
+    def postfork(self) -> None:
+        """
+        Re-initialize per-process states in forked child process,
+        e.g. by ``post_fork`` hook of gunicorn.
+
+        Locks which may have been held by other threads of parent while forking
+        are recreated, with signal dispatcher and template cache.
+        Garbage collector is enabled, frozen objects are kept in permanent generation.
+        At last functions registered by :py:meth:`.Plugin.after_fork` are executed,
+        where plugins re-initialize their pooled resources.
+        """
+        config = self._config
+        self._router.reinit()
+        self._events.reinit()
+        self._profiler.reinit()
+        self._activating, self._activating_lock = {}, threading.Lock()
+        self._evicting = threading.Lock()
+        self._dispatcher = create_dispatcher(
+            config.signal_dispatch, config.signal_workers,
+            config.signal_queue_size, self._app.logger
+        )
+        self._workers.disconnect()
+        loader = self._app.jinja_env.loader
+        if isinstance(loader, PluginJinjaLoader):
+            loader.reinit()
+        cache = self._app.jinja_env.cache
+        if isinstance(cache, PluginTemplateCache):
+            cache.reinit()
+        gc.enable()
+        for plugin in self._loaded:
+            for error in plugin.postfork():
+                self._app.logger.error(
+                    f'failed postfork plugin: {plugin.name} - {error!r}')
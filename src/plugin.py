@@ -1,19 +1,70 @@
 
+import copy
 import json
 import inspect
+import posixpath
 import typing as t
 from os import path
 
 import flask.typing as ft
-from flask import abort
+from flask import abort, send_file
 from flask.app import Flask
 from flask.scaffold import Scaffold
 from flask.wrappers import Response
+from jinja2 import BaseLoader
 from jsonschema import ValidationError
+from packaging.specifiers import InvalidSpecifier, SpecifierSet
+from werkzeug.security import safe_join
+from werkzeug.utils import cached_property
 
 from . import utils
 from . import states
+from .bundle import Bundle, BundleLoader, open_bundle
 from .config import ConfigFile, validate
+from .handlers import ContextHandlers, ErrorHandlers, HandlerChains, compile_handlers
+from .resources import Resource, ResourcePool
+from .routing import copy_url_map
+from .static import StaticFiles
+
+
+def _rebind(
+    function: t.Optional[t.Callable], source: t.Any, target: t.Any
+) -> t.Optional[t.Callable]:
+    """Bind ``function`` to ``target`` if it is a method bound to ``source``."""
+    if getattr(function, '__self__', None) is source:
+        return getattr(function, '__func__').__get__(target)
+    return function
+
+
+def remove_url_rules(
+    app: Flask, config: utils.staticdict, domains: t.Collection[str]
+) -> None:
+    """
+    Remove all url rules belonging to plugins in ``domains`` from ``app.url_map``.
+
+    Rules cannot be taken out of a ``werkzeug.routing.Map`` once bound,
+    so a new map is built from the remaining rules. It costs a full rebuild
+    of the routing map, so when cleaning several plugins together
+    all of their domains should be passed in a single call.
+
+    Args:
+        app (Flask): Flask application.
+        config (utils.staticdict): plugin manager config.
+        domains (t.Collection[str]): domains of plugins to be cleaned.
+    """
+    prefixes = tuple(domain + '.' for domain in domains)
+    if not prefixes:
+        return
+
+    def _belong_to_plugins(rule) -> bool:
+        plugin_endpoint = utils.startstrip(rule.endpoint, config.blueprint + '.')
+        return plugin_endpoint.startswith(prefixes)
+
+    filtered = filter(
+        lambda url_rule: not _belong_to_plugins(url_rule),
+        app.url_map.iter_rules()
+    )
+    app.url_map = copy_url_map(app.url_map, filtered, app.url_map_class)
 
 
 class Plugin(Scaffold):
@@ -58,15 +109,19 @@ class Plugin(Scaffold):
     :ivar id\\_: plugin id.
     :ivar domain: plugin domain.
     :ivar info: plugin info :py:class:`utils.attrdict`.
-    :ivar basedir: plugin dirname.
+    :ivar basedir: plugin dirname, or filename without ``.zip`` of a bundle.
     :ivar status: plugin status machine.
     :ivar name: plugin name.
+    :ivar version: plugin version, None if not declared.
+    :ivar dependencies: ids of plugins required, with version constraints.
     """
 
     id_ = utils.property_('id', type_=str)
     domain = utils.property_('domain', type_=str)
     info = utils.property_('info', type_=utils.attrdict)
     basedir = utils.property_('basedir', type_=str, writable=True)
+    version = utils.property_('version', type_=t.Optional[str])
+    dependencies = utils.property_('dependencies', type_=t.Dict[str, str])
 
     def __init__(
         self,
@@ -91,10 +146,18 @@ class Plugin(Scaffold):
                          static_url_path=static_url_path, root_path=root_path,
                          template_folder=template_folder)
 
+        # Plugin deployed as a zip bundle is read from archive, see `.bundle`
+        self._bundle = open_bundle(self.root_path)
+
         # Patch information from `.config.ConfigFile`
         try:
-            with open(path.join(self.root_path, ConfigFile)) as handler:
-                config = json.load(handler, object_pairs_hook=lambda o: utils.attrdict(o))
+            if self._bundle is not None:
+                config = json.loads(
+                    self._bundle.read(self._bundle.member(path.join(self.root_path, ConfigFile))),
+                    object_pairs_hook=lambda o: utils.attrdict(o))
+            else:
+                with open(path.join(self.root_path, ConfigFile)) as handler:
+                    config = json.load(handler, object_pairs_hook=lambda o: utils.attrdict(o))
             validate(config)
         except (FileNotFoundError, ValidationError):
             raise
@@ -104,12 +167,34 @@ class Plugin(Scaffold):
         # Other info
         self._domain = config.domain
         self._id, self._basedir = config.id, None
-        self.status = states.StateMachine(states.TransferTable)
         if '.' in self._domain:
             raise ValueError("plugin 'domain' cannot contain '.'")
         if not self._domain:
             raise ValueError("empty plugin 'domain' not allowed")
 
+        # Dependencies with version constraints
+        self._version = config.get('version')
+        self._dependencies = dict(config.get('dependencies', {}))
+        for constraint in self._dependencies.values():
+            try:
+                SpecifierSet(constraint)
+            except InvalidSpecifier:
+                raise ValueError(f'invalid dependency constraint: {constraint}') from None
+
+        # Hooks releasing resources of module, shared by copies of plugin
+        self._finalizers: t.List[t.Callable[[], None]] = []
+        self._prefork_hooks: t.List[t.Callable[[], None]] = []
+        self._postfork_hooks: t.List[t.Callable[[], None]] = []
+        self._resources: t.List[Resource] = []
+        self._warmups: t.List[t.Callable[[], None]] = []
+        self._warmup_urls: t.List[str] = []
+        self._setup_registration()
+
+    def _setup_registration(self) -> None:
+        """Create registration state owned by each plugin, also each copy of :py:meth:`bind`."""
+        self.status = states.StateMachine(states.TransferTable)
+        self._recorded: t.Optional[t.List[t.Callable[['Plugin'], None]]] = None
+
         # Deferred function, executing when registering into Manager
         self._register: t.List[t.Callable[[
             Flask, utils.staticdict], None]] = []
@@ -117,29 +202,27 @@ class Plugin(Scaffold):
             Flask, utils.staticdict], None]] = []
         self._clean: t.Dict[str, t.Callable[[
             Flask, utils.staticdict], None]] = {}
+        self._static: t.Optional[StaticFiles] = None
         self._endpoints = set()
 
         # Add static file sending support
-        if static_folder:
+        if self.static_folder is not None:
             self.add_url_rule(
                 f'{self.static_url_path}/<path:filename>',
                 endpoint='static',
                 view_func=self.send_static_file
             )
 
-        # Add context handlers manager
-        context_handlers_and_preprocessors = {
-            'before_request': 'before_request_funcs',
-            'after_request': 'after_request_funcs',
-            'teardown_request': 'teardown_request_funcs',
-            'context_processor': 'template_context_processors',
-            'url_value_preprocessor': 'url_value_preprocessors',
-            'url_defaults': 'url_default_functions'
-        }
-        for handler_name, target in context_handlers_and_preprocessors.items():
+        # Add context handlers and error handlers, compiled when loading
+        self._prepared_error_handlers: ErrorHandlers = {}
+        self._handlers: t.Optional[HandlerChains] = None
+        for handler_name in ContextHandlers:
             self._decorable_setter(handler_name, prefix='_prepared_handlers_')
-            self._manage_context_handlers_and_processors(
-                handler_name, target, prefix='_prepared_handlers_')
+        self._register.append(self._install_handlers)
+        self._record_clean_function('clean_handlers', self._uninstall_handlers)
+
+        # Routes decorated on plugin from now on are replayed on copies of :py:meth:`bind`
+        self._recorded = []
 
     def __repr__(self) -> str:
         return f'<Plugin registered at {self._domain} - {self.status.value.name}>'
@@ -147,6 +230,51 @@ class Plugin(Scaffold):
     def __hash__(self) -> int:
         return hash(self._id)
 
+    def bind(self, domain: t.Optional[str] = None, id_: t.Optional[str] = None) -> 'Plugin':
+        """
+        Create a copy of plugin with its own registration state, i.e. status, routes,
+        handlers and static files, sharing module, config and decorated functions.
+
+        Used when one plugin module is registered by managers of several apps,
+        see :py:mod:`.registry`, or registered again under another domain as a canary,
+        see :py:mod:`.canary`. Finalizers, fork hooks, warmups and declared resources
+        are shared with copies, as they belong to the module.
+
+        Args:
+            domain (str, optional): domain of copy, defaults to domain of plugin.
+            id_ (str, optional): id of copy, defaults to id of plugin.
+
+        Returns:
+            Plugin: unloaded copy of plugin.
+        """
+        plugin = copy.copy(self)
+        plugin._domain = self._domain if domain is None else domain
+        plugin._id = self._id if id_ is None else id_
+        plugin._setup_registration()
+        for handler_name in ContextHandlers:
+            getattr(plugin, '_prepared_handlers_' + handler_name).extend(
+                getattr(self, '_prepared_handlers_' + handler_name))
+        for code, handlers in self._prepared_error_handlers.items():
+            plugin._prepared_error_handlers[code] = dict(handlers)
+        for replay in self._recorded or ():
+            replay(plugin)
+        return plugin
+
+    @property
+    def bundle(self) -> t.Optional[Bundle]:
+        """Zip bundle containing plugin, None if plugin deployed as a directory."""
+        return self._bundle
+
+    @cached_property
+    def jinja_loader(self) -> t.Optional[BaseLoader]:  # type: ignore
+        """
+        Jinja loader of plugin templates, reading from archive
+        with :py:class:`.bundle.BundleLoader` if plugin deployed as a bundle.
+        """
+        if self._bundle is not None and self.template_folder is not None:
+            return BundleLoader(self._bundle, path.join(self.root_path, self.template_folder))
+        return super().jinja_loader
+
     @property
     def endpoints(self) -> t.Set[str]:
         """
@@ -214,6 +342,176 @@ class Plugin(Scaffold):
         if not key in self._clean:
             self._clean[key] = function
 
+    def _record(self, replay: t.Callable[['Plugin'], None]) -> None:
+        """Record routing decorated after setup, replayed on copies of :py:meth:`bind`."""
+        if self._recorded is not None:
+            self._recorded.append(replay)
+
+    def resource(
+        self, name: str, factory: t.Callable[..., t.Any], *args: t.Any,
+        dispose: t.Optional[t.Callable[[t.Any], None]] = None, **kwargs: t.Any
+    ) -> Resource:
+        """
+        Declare a resource created lazily by ``factory(*args, **kwargs)``, shared with
+        plugins declaring the same one and disposed when unloaded, see :py:mod:`.resources`.
+
+        Args:
+            name (str): name of resource, for reporting.
+            factory (t.Callable[..., t.Any]): function creating resource.
+            dispose (t.Callable[[t.Any], None], optional): function releasing resource.
+                Defaults to None, calling its ``dispose()`` or ``close()`` method.
+
+        Returns:
+            Resource: handle, whose :py:meth:`.Resource.get` returns resource once loaded.
+        """
+        resource = Resource(name, factory, *args, dispose=dispose, **kwargs)
+        self.use(resource)
+        return resource
+
+    def use(self, *resources: Resource) -> None:
+        """Declare ``resources`` created elsewhere, e.g. in submodules of plugin."""
+        self._resources.extend(resources)
+
+    @property
+    def resources(self) -> t.List[Resource]:
+        """Resources declared by plugin."""
+        return list(self._resources)
+
+    def release_resources(self) -> t.List[Exception]:
+        """
+        Release declared resources, disposed if no other plugin uses them,
+        in reversed declaring order.
+
+        Returns:
+            t.List[Exception]: exceptions raised while disposing.
+        """
+        errors = []
+        for resource in reversed(self._resources):
+            errors.extend(resource.release(self))
+        return errors
+
+    def finalizer(self, function: t.Callable[[], None]) -> t.Callable[[], None]:
+        """
+        Register a function releasing resources held by plugin module,
+        e.g. disposing a database engine. Finalizers run in registering order
+        once plugin unloaded, see :py:meth:`finalize`.
+
+        Args:
+            function (t.Callable[[], None]): finalizer.
+
+        Returns:
+            t.Callable[[], None]: function itself, so it can be used as decorator.
+        """
+        self._finalizers.append(function)
+        return function
+
+    def finalize(self) -> t.List[Exception]:
+        """
+        Execute all finalizers registered by :py:meth:`finalizer`.
+
+        A failed finalizer should not stop others releasing their resources,
+        so exceptions are collected and returned instead of raising.
+
+        Returns:
+            t.List[Exception]: exceptions raised by finalizers.
+        """
+        return self._run_hooks(self._finalizers)
+
+    @staticmethod
+    def _run_hooks(functions: t.Iterable[t.Callable[[], None]]) -> t.List[Exception]:
+        """Execute all ``functions``, collecting exceptions instead of raising."""
+        errors = []
+        for function in functions:
+            try:
+                function()
+            except Exception as error:
+                errors.append(error)
+        return errors
+
+    def before_fork(self, function: t.Callable[[], None]) -> t.Callable[[], None]:
+        """
+        Register a function running in parent process before forking workers,
+        e.g. closing connections which should not be shared with children,
+        see :py:meth:`prefork`.
+
+        Returns:
+            t.Callable[[], None]: function itself, so it can be used as decorator.
+        """
+        self._prefork_hooks.append(function)
+        return function
+
+    def after_fork(self, function: t.Callable[[], None]) -> t.Callable[[], None]:
+        """
+        Register a function running in each worker process after forking,
+        e.g. disposing pooled connections of a database engine created
+        by plugin module, see :py:meth:`postfork`.
+
+        Returns:
+            t.Callable[[], None]: function itself, so it can be used as decorator.
+        """
+        self._postfork_hooks.append(function)
+        return function
+
+    def warmup(self, function: t.Callable[[], None]) -> t.Callable[[], None]:
+        """
+        Register a function warming up plugin when starting, e.g. compiling templates
+        or filling caches, executed inside application context after routes registered
+        and before they are published, see :py:meth:`.PluginManager.start_many`.
+
+        Returns:
+            t.Callable[[], None]: function itself, so it can be used as decorator.
+        """
+        self._warmups.append(function)
+        return function
+
+    def add_warmup_url(self, path: str) -> None:
+        """
+        Request ``path`` of plugin with ``GET`` through test client when starting,
+        before routes are published, so the first real request never pays for
+        anything initialized lazily.
+
+        Args:
+            path (str): path relative to plugin, e.g. ``'/'`` for index of plugin.
+        """
+        self._warmup_urls.append('/' + path.lstrip('/'))
+
+    @property
+    def warmup_urls(self) -> t.List[str]:
+        """Paths registered by :py:meth:`add_warmup_url`."""
+        return list(self._warmup_urls)
+
+    @property
+    def warmups(self) -> t.List[t.Callable[[], None]]:
+        """Functions registered by :py:meth:`warmup`."""
+        return list(self._warmups)
+
+    def run_warmups(self) -> t.List[Exception]:
+        """
+        Execute all functions registered by :py:meth:`warmup`.
+
+        Returns:
+            t.List[Exception]: exceptions raised by them.
+        """
+        return self._run_hooks(self._warmups)
+
+    def prefork(self) -> t.List[Exception]:
+        """
+        Execute all functions registered by :py:meth:`before_fork`.
+
+        Returns:
+            t.List[Exception]: exceptions raised by them.
+        """
+        return self._run_hooks(self._prefork_hooks)
+
+    def postfork(self) -> t.List[Exception]:
+        """
+        Execute all functions registered by :py:meth:`after_fork`.
+
+        Returns:
+            t.List[Exception]: exceptions raised by them.
+        """
+        return self._run_hooks(self._postfork_hooks)
+
     def add_url_rule(
             self, rule: str,
             endpoint: t.Optional[str] = None,
@@ -223,6 +521,10 @@ class Plugin(Scaffold):
     ) -> None:
         if endpoint and "." in endpoint:
             raise ValueError("'endpoint' may not contain a dot '.' character.")
+        self._record(
+            lambda plugin, endpoint=endpoint, view_func=view_func: plugin.add_url_rule(
+                rule, endpoint, _rebind(view_func, self, plugin),
+                provide_automatic_options, **options))
 
         # Add url rule locally
         if endpoint is None:
@@ -247,21 +549,7 @@ class Plugin(Scaffold):
                     config.blueprint + '.' + endpoint] = self.notfound
 
         def _clean_url_rule(app: Flask, config: utils.staticdict) -> None:
-            # Remove URL Rule from app.url_map
-            def _belong_to_plugin(rule):
-                plugin_endpoint = utils.startstrip(
-                    rule.endpoint, config.blueprint + '.')
-                if plugin_endpoint.startswith(self._domain + '.'):
-                    return True
-                return False
-
-            filtered = map(
-                lambda url_rule: url_rule.empty(), filter(
-                    lambda url_rule: not _belong_to_plugin(url_rule),
-                    app.url_map.iter_rules()
-                )
-            )
-            app.url_map = app.url_map_class(filtered)
+            remove_url_rules(app, config, (self._domain,))
 
         def _clean_view_function(app: Flask, config: utils.staticdict) -> None:
             # Endpoints cleaner should be call here, againist user 
@@ -293,6 +581,7 @@ class Plugin(Scaffold):
             raise ValueError("'endpoint' may not contain a dot '.' character.")
 
         def _decorator(function: t.Callable):
+            self._record(lambda plugin: plugin.endpoint(endpoint)(function))
             self._endpoints.add(self._domain + '.' + endpoint)
 
             # Deferred functions
@@ -333,60 +622,28 @@ class Plugin(Scaffold):
                 " instead."
             ) from None
 
-        # Register and clean deferred functions.
-        def _register_error_handler(app: Flask, config: utils.staticdict) -> None:
-            endpoint = config.blueprint + '.' + self._domain
-            app.error_handler_spec[endpoint][code][exc_class] = t.cast(
-                ft.ErrorHandlerCallable, f)
-
-        def _clean_error_handler(app: Flask, config: utils.staticdict) -> None:
-            endpoint = config.blueprint + '.' + self._domain
-            if endpoint in app.error_handler_spec:
-                app.error_handler_spec.pop(endpoint)
+        self._prepared_error_handlers.setdefault(code, {})[exc_class] = f
 
-        self._register.append(_register_error_handler)
-        self._record_clean_function(
-            'clean_error_handler', _clean_error_handler)
-
-    def _manage_context_handlers_and_processors(
-            self, name: str, target: str, prefix: str = '_handler_') -> None:
+    def compile_handlers(self) -> HandlerChains:
         """
-        Manage register and unregister deferred behaviours for context related functions.
-       
-        In flask we could use: ``before_request``, ``after_request`` and ``teardown_request`` for 
-        adding action inner context.
-        
-        These context handler functions storage at ``app.before_request_funcs``, 
-        ``app.after_request_funcs`` and ``app.teardown_request_funcs``.
-       
-        Here add deferred function to check if handlers above set in ``Plugin`` instance. if so,
-        add/remove it.
-        
-        Processor and preprocessor can also been set this way, they are: ``context_processor``,
-        ``url_value_preprocessor`` and ``url_defaults``.
+        Compile context handlers and error handlers decorated on plugin into
+        :py:class:`.handlers.HandlerChains`, called once when loading.
 
-        Args:
-            name (str): context handler name, like `'before_request'`
-            target (str): attribute name going to be used in Flask, e.g. ``before_request_funcs``
-            prefix (str, optional): prefix adding before variable of storing context handler.
-                Defaults to '_handler_'.
+        Returns:
+            HandlerChains: compiled handlers.
         """
+        prepared = {
+            name: getattr(self, '_prepared_handlers_' + name) for name in ContextHandlers
+        }
+        return compile_handlers(prepared, self._prepared_error_handlers)
 
-        def _register_context_handler(app: Flask, config: utils.staticdict) -> None:
-            endpoint = config.blueprint + '.' + self._domain
-            handlers = getattr(self, prefix + name, None)
-            if handlers and isinstance(handlers, list):
-                getattr(app, target).setdefault(
-                    endpoint, []).append(getattr(self, prefix + name).pop())
-
-        def _clean_context_handler(app: Flask, config: utils.staticdict) -> None:
-            endpoint = config.blueprint + '.' + self._domain
-            if endpoint in getattr(app, target):
-                getattr(app, target).pop(endpoint)
+    def _install_handlers(self, app: Flask, config: utils.staticdict) -> None:
+        """Install compiled handlers as one unit, replacing ones installed before."""
+        if self._handlers is not None:
+            self._handlers.install(app, config.blueprint + '.' + self._domain)
 
-        self._register.append(_register_context_handler)
-        self._record_clean_function(
-            'clean_context_handler', _clean_context_handler)
+    def _uninstall_handlers(self, app: Flask, config: utils.staticdict) -> None:
+        HandlerChains.uninstall(app, config.blueprint + '.' + self._domain)
 
     def export_status_to_dict(self) -> t.Dict:
         """
@@ -414,15 +671,82 @@ class Plugin(Scaffold):
     def _check_setup_finished(self, f_name: str) -> None:
         return
 
+    def send_static_file(self, filename: str) -> Response:
+        """
+        Send file inside plugin static folder.
+
+        Once plugin loaded, files are served by prepared :py:class:`.static.StaticFiles`
+        with precomputed ETag, in-memory cache and precompressed variants.
+        Files of plugin deployed as a bundle are read from archive.
+
+        Args:
+            filename (str): plain or fingerprinted filename, see :py:meth:`static_filename`.
+        """
+        if self._static is not None:
+            return self._static.send(filename)
+        if self._bundle is None:
+            return super().send_static_file(filename)
+
+        # Read from archive before static files prepared
+        location = safe_join(t.cast(str, self.static_folder), filename)
+        if location is None:
+            abort(404)
+        name = self._bundle.member(location)
+        if not self._bundle.isfile(name):
+            abort(404)
+        return send_file(
+            self._bundle.open(name), download_name=posixpath.basename(name),
+            max_age=self.get_send_file_max_age(filename)
+        )
+
+    def static_filename(self, filename: str) -> str:
+        """
+        Return fingerprinted filename which will be served as immutable,
+        use it when building url of static files:
+
+        >>> url_for('.static', filename=plugin.static_filename('css/style.css'))
+
+        Args:
+            filename (str): filename relative to static folder.
+
+        Returns:
+            str: fingerprinted filename, or ``filename`` itself if plugin not loaded.
+        """
+        if self._static is None:
+            return filename
+        return self._static.fingerprint(filename)
+
     # Controllers
-    def load(self, app: Flask, config: utils.staticdict) -> None:
+    def load(
+        self, app: Flask, config: utils.staticdict,
+        resources: t.Optional[ResourcePool] = None
+    ) -> None:
         """
         Load plugin.
 
-        All routes inside plugin module are prepard in deferred registering functions.
+        All routes inside plugin module are prepard in deferred registering functions,
+        static files are prepared by :py:class:`.static.StaticFiles`,
+        and handlers are compiled by :py:meth:`compile_handlers`.
+        Declared resources are bound to ``resources`` pool of manager.
         
         Set current plugin status to :py:const:`states.PluginStatus.Loaded`.
         """
+        if resources is not None:
+            for resource in self._resources:
+                resource.bind(resources, self)
+        if self.has_static_folder and self._basedir is not None:
+            static_folder = path.relpath(t.cast(str, self.static_folder), self.root_path)
+            self._static = StaticFiles(
+                t.cast(str, self.static_folder),
+                cache_size=config.static_cache_size,
+                compress=config.static_compress,
+                offload=config.static_offload,
+                offload_prefix=posixpath.join(
+                    config.static_offload_prefix, self._basedir,
+                    static_folder.replace(path.sep, '/')),
+                bundle=self._bundle
+            )
+        self._handlers = self.compile_handlers()
         self.status.value = states.PluginStatus.Loaded
 
     def register(self, app: Flask, config: utils.staticdict) -> None:
@@ -447,14 +771,31 @@ class Plugin(Scaffold):
             defferd(app, config)
         self.status.value = states.PluginStatus.Stopped
 
-    def clean(self, app: Flask, config: utils.staticdict) -> None:
+    def clean(
+        self, app: Flask, config: utils.staticdict,
+        excludes: t.Container[str] = ()
+    ) -> t.List[Exception]:
         """
         Clean plugin resource and unload module.
 
         Deferred clean fucntions will be executed to remove all url rule
         in ``app.url_rules`` which used by plugin, also pop all preprocessors
-        and error handler registered in ``app``.
+        and error handler registered in ``app``. Declared resources are released
+        with :py:meth:`release_resources`.
+
+        Args:
+            excludes (t.Container[str], optional): keys of clean functions to skip,
+                e.g. ``'clean_url_rule'`` when caller rebuilds ``app.url_map`` itself
+                with :py:func:`remove_url_rules`. Defaults to ().
+
+        Returns:
+            t.List[Exception]: exceptions raised while disposing resources.
         """
-        for _key, function in self._clean.items():
+        for key, function in self._clean.items():
+            if key in excludes:
+                continue
             function(app, config)
+        self._static = None
+        self._handlers = None
         self.status.value = states.PluginStatus.Unloaded
+        return self.release_resources()
@@ -0,0 +1,253 @@
+"""
+Sampling profiles of slow plugin requests.
+
+With config ``slow_request_threshold`` set to seconds, :py:class:`.PluginManager` watches
+every request routed to a plugin. A single sampler thread sleeps until the oldest watched
+request passes the threshold, then samples stacks of slow requests from
+:py:func:`sys._current_frames` every ``profile_interval`` seconds until they finish.
+Fast requests only register and unregister their thread, nothing is sampled.
+
+A :py:class:`Profile` is kept for each request slower than the threshold, latest
+``profiles_size`` ones of each plugin, see :py:attr:`.PluginManager.profiler`.
+With config ``api`` enabled, they are served at ``/{config.blueprint}/.profiles``:
+
+- ``GET .profiles?domain=hello`` returns profiles of plugins as JSON, newest first,
+  with most sampled stacks of each.
+- ``GET .profiles?format=folded`` returns stacks in folded format, one
+  ``frame;frame;frame count`` a line, read by flame graph tools.
+"""
+
+import collections
+import sys
+import threading
+import time
+import typing as t
+
+from flask import Flask, Request, Response, abort, jsonify
+
+Stack = t.Tuple[str, ...]
+
+MaxStacks = 100
+"""Most sampled stacks of each profile served as JSON."""
+
+
+class Profile(t.NamedTuple):
+    """Sampled stacks of one slow request."""
+    domain: str
+    method: str
+    path: str
+    endpoint: t.Optional[str]
+    started: float
+    duration: float
+    interval: float
+    stacks: t.Dict[Stack, int]
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def to_dict(self, limit: t.Optional[int] = MaxStacks) -> t.Dict[str, t.Any]:
+        stacks = sorted(self.stacks.items(), key=lambda item: item[1], reverse=True)
+        return {
+            'domain': self.domain,
+            'method': self.method,
+            'path': self.path,
+            'endpoint': self.endpoint,
+            'started': self.started,
+            'duration': self.duration,
+            'interval': self.interval,
+            'samples': self.samples,
+            'stacks': [{'frames': list(stack), 'count': count} for stack, count in stacks[:limit]]
+        }
+
+    def folded(self) -> t.List[str]:
+        """Stacks in folded format, root frame first."""
+        return [f'{";".join(stack)} {count}' for stack, count in self.stacks.items()]
+
+
+class _Watch:
+    """Request being watched, sampled once slower than threshold."""
+
+    __slots__ = ('domain', 'method', 'path', 'endpoint', 'started', 'clock', 'stacks')
+
+    def __init__(self, domain: str, method: str, path: str, endpoint: t.Optional[str]) -> None:
+        self.domain = domain
+        self.method = method
+        self.path = path
+        self.endpoint = endpoint
+        self.started = time.time()
+        self.clock = time.monotonic()
+        self.stacks: t.Counter[Stack] = collections.Counter()
+
+
+def _stack(frame: t.Any, depth: int) -> Stack:
+    """Frames of stack from ``frame`` upwards, root frame first, at most ``depth`` frames."""
+    frames = []
+    while frame is not None and len(frames) < depth:
+        code = frame.f_code
+        frames.append(f'{code.co_name} ({code.co_filename}:{frame.f_lineno})')
+        frame = frame.f_back
+    return tuple(reversed(frames))
+
+
+class Profiler:
+    """
+    Watch requests and sample stacks of slow ones by a daemon thread,
+    started by first watched request.
+
+    Args:
+        threshold (float, optional): seconds after which a request is sampled,
+            nothing watched when None.
+        interval (float, optional): seconds between samples. Defaults to 0.005.
+        size (int, optional): profiles kept for each plugin. Defaults to 32.
+        depth (int, optional): max frames of each stack. Defaults to 64.
+
+    Raises:
+        ValueError: when interval or size is not positive.
+    """
+
+    def __init__(
+        self, threshold: t.Optional[float], interval: float = 0.005,
+        size: int = 32, depth: int = 64
+    ) -> None:
+        if interval <= 0 or size < 1:
+            raise ValueError('profile interval and size should be positive')
+        self.threshold = threshold
+        self.interval = interval
+        self.depth = depth
+        self._size = size
+        self._watches: t.Dict[int, _Watch] = {}
+        self._profiles: t.Dict[str, t.Deque[Profile]] = {}
+        self._lock = threading.Lock()
+        self._pending = threading.Event()
+        self._thread: t.Optional[threading.Thread] = None
+        self._closed = False
+
+    def reinit(self) -> None:
+        """Recreate locks and forget sampler thread, called in forked child process."""
+        self._lock = threading.Lock()
+        self._pending = threading.Event()
+        self._watches = {}
+        self._thread = None
+
+    def close(self) -> None:
+        """Stop sampler thread."""
+        self._closed = True
+        self._pending.set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold is not None
+
+    def begin(self, domain: str, method: str, path: str, endpoint: t.Optional[str]) -> None:
+        """Watch request handled by current thread."""
+        if self.threshold is None:
+            return
+        self._watches[threading.get_ident()] = _Watch(domain, method, path, endpoint)
+        if self._thread is None:
+            self._start()
+        if not self._pending.is_set():
+            self._pending.set()
+
+    def finish(self) -> t.Optional[Profile]:
+        """
+        Stop watching request handled by current thread.
+
+        Returns:
+            t.Optional[Profile]: profile kept if request slower than threshold.
+        """
+        watch = self._watches.pop(threading.get_ident(), None)
+        if watch is None:
+            return None
+        duration = time.monotonic() - watch.clock
+        threshold = self.threshold
+        if threshold is None or duration < threshold:
+            return None
+        with self._lock:
+            stacks = dict(watch.stacks)
+        profile = Profile(
+            watch.domain, watch.method, watch.path, watch.endpoint,
+            watch.started, duration, self.interval, stacks)
+        ring = self._profiles.get(watch.domain)
+        if ring is None:
+            ring = self._profiles.setdefault(
+                watch.domain, collections.deque(maxlen=self._size))
+        ring.append(profile)
+        return profile
+
+    def profiles(self, domain: t.Optional[str] = None) -> t.Dict[str, t.List[Profile]]:
+        """Profiles kept keyed by plugin domain, newest first, only of ``domain`` if given."""
+        return {
+            key: list(reversed(ring)) for key, ring in list(self._profiles.items())
+            if domain is None or key == domain
+        }
+
+    def clear(self) -> None:
+        self._profiles.clear()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name='plugin-profiler', daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._closed:
+            if not self._watches:
+                self._pending.clear()
+                if not self._watches:
+                    self._pending.wait()
+                continue
+            threshold = self.threshold
+            if threshold is None:
+                time.sleep(self.interval)
+                continue
+
+            # Sleep until the oldest request becomes slow
+            now = time.monotonic()
+            watches = list(self._watches.items())
+            slow = [(ident, watch) for ident, watch in watches if now - watch.clock >= threshold]
+            if not slow:
+                oldest = min(watch.clock for _ident, watch in watches)
+                time.sleep(max(oldest + threshold - now, self.interval))
+                continue
+
+            frames = sys._current_frames()
+            with self._lock:
+                for ident, watch in slow:
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        watch.stacks[_stack(frame, self.depth)] += 1
+            del frames, frame
+            time.sleep(self.interval)
+
+
+def profiles_response(app: Flask, request: Request, profiler: Profiler) -> Response:
+    """
+    Build response of profiles of slow requests for ``request``.
+
+    Raises:
+        BadRequest: when format is unknown.
+    """
+    selected = profiler.profiles(request.args.get('domain') or None)
+    format_ = request.args.get('format', 'json')
+    if format_ == 'folded':
+        lines = [
+            line for profiles in selected.values()
+            for profile in profiles for line in profile.folded()
+        ]
+        response = app.response_class('\n'.join(lines) + '\n', mimetype='text/plain')
+    elif format_ == 'json':
+        response = jsonify({
+            'threshold': profiler.threshold,
+            'profiles': {
+                domain: [profile.to_dict() for profile in profiles]
+                for domain, profiles in selected.items()
+            }
+        })
+    else:
+        abort(400, description=f'unknown profile format: {format_}')
+    response.headers['Cache-Control'] = 'no-store'
+    return response
@@ -0,0 +1,164 @@
+"""
+Process-level registry of plugin modules shared by managers.
+
+Several Flask apps served by one process, e.g. combined by
+:py:class:`werkzeug.middleware.dispatcher.DispatcherMiddleware`, have their own
+:py:class:`.PluginManager` each, and every manager imports plugins by itself,
+so a plugin module used by N apps is imported N times.
+
+With config ``shared_registry`` enabled, managers read config files and import
+plugin modules once through :py:data:`shared` registry, keyed by real path of plugin
+directory or bundle. Each manager registers its own copy of plugin created by
+:py:meth:`.Plugin.bind`, with its own status, routes, handlers and static files,
+configured by config of its own app, see :py:meth:`.PluginManager.load_config`.
+
+A cached module is imported again when plugin config file, ``__init__.py`` or bundle
+changed, but only while no manager has it loaded, so all apps run the same code.
+Finalizers of a shared module are executed, and module is purged, once the last
+manager using it unloaded the plugin.
+"""
+
+import os
+import threading
+import typing as t
+import weakref
+
+Signature = t.Tuple[t.Tuple[int, int], ...]
+
+
+def signature(location: str) -> Signature:
+    """
+    Modified time and size of plugin directory or bundle at ``location``,
+    with its config file and ``__init__.py`` when it is a directory.
+    """
+    paths = [location]
+    if os.path.isdir(location):
+        paths.extend(os.path.join(location, name) for name in ('plugin.json', '__init__.py'))
+    stats = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            stats.append((0, 0))
+        else:
+            stats.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(stats)
+
+
+class Entry:
+    """Cached module of a plugin and managers having it loaded."""
+
+    def __init__(self, signature: Signature) -> None:
+        self.signature = signature
+        self.manifest: t.Any = None
+        self.module: t.Any = None
+        self.imported: t.FrozenSet[str] = frozenset()
+        self.users: 'weakref.WeakSet[t.Any]' = weakref.WeakSet()
+        self.lock = threading.Lock()
+
+
+class PluginRegistry:
+    """
+    Cache of plugin config files and modules, safe to use from multiple threads
+    and shared by managers of different apps.
+    """
+
+    def __init__(self) -> None:
+        self._entries: t.Dict[str, Entry] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, location: str) -> bool:
+        return os.path.realpath(location) in self._entries
+
+    def _entry(self, location: str) -> Entry:
+        """Return entry of ``location``, a new one if changed and not used."""
+        key = os.path.realpath(location)
+        entry = self._entries.get(key)
+        if entry is None or (not entry.users and entry.signature != signature(key)):
+            entry = self._entries[key] = Entry(signature(key))
+        return entry
+
+    def manifest(self, location: str, reader: t.Callable[[str], t.Any]) -> t.Any:
+        """
+        Return config file of plugin at ``location``, read by ``reader`` once.
+
+        Raises:
+            Exception: anything raised by ``reader``, nothing cached.
+        """
+        with self._lock:
+            entry = self._entry(location)
+            if entry.manifest is None:
+                entry.manifest = reader(location)
+            return entry.manifest
+
+    def module(
+        self, location: str,
+        importer: t.Callable[[str], t.Tuple[t.Any, t.Iterable[str]]]
+    ) -> t.Tuple[t.Any, t.FrozenSet[str]]:
+        """
+        Return plugin module at ``location``, imported by ``importer`` once.
+
+        Args:
+            location (str): path of plugin directory or bundle.
+            importer (t.Callable[[str], t.Tuple[t.Any, t.Iterable[str]]]): function
+                importing module, returns module and names of its submodules.
+
+        Returns:
+            t.Tuple[t.Any, t.FrozenSet[str]]: module and names of its submodules.
+
+        Raises:
+            Exception: anything raised by ``importer``, nothing cached.
+        """
+        with self._lock:
+            entry = self._entry(location)
+
+        # Importing holds lock of entry only, different plugins are imported concurrently
+        with entry.lock:
+            if entry.module is None:
+                module, imported = importer(location)
+                entry.module, entry.imported = module, frozenset(imported)
+            return entry.module, entry.imported
+
+    def acquire(self, location: str, user: t.Any) -> None:
+        """Record ``user`` having plugin at ``location`` loaded, held by weak reference."""
+        with self._lock:
+            self._entry(location).users.add(user)
+
+    def release(self, location: str, user: t.Any) -> bool:
+        """
+        Remove ``user`` of plugin at ``location``.
+
+        Returns:
+            bool: True if no other user remains, module is dropped from registry
+            and should be finalized and purged by caller.
+        """
+        with self._lock:
+            key = os.path.realpath(location)
+            entry = self._entries.get(key)
+            if entry is None:
+                return True
+            entry.users.discard(user)
+            if entry.users:
+                return False
+            self._entries.pop(key)
+            return True
+
+    def users(self, location: str) -> int:
+        """Count users of plugin at ``location``."""
+        with self._lock:
+            entry = self._entries.get(os.path.realpath(location))
+            return len(entry.users) if entry is not None else 0
+
+    def clear(self) -> None:
+        """Drop all cached modules not used by anyone."""
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if not entry.users:
+                    self._entries.pop(key)
+
+
+shared = PluginRegistry()
+"""Registry shared by all managers of process with config ``shared_registry`` enabled."""
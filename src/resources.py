@@ -0,0 +1,215 @@
+"""
+Shared resources declared by plugins.
+
+Plugins holding expensive resources themselves, e.g. a database engine created
+at module level, keep them after unloading, and plugins connecting to the same
+database open separate connection pools. Instead, plugins declare resources
+with :py:meth:`.Plugin.resource`, which are managed by :py:class:`ResourcePool`
+of :py:class:`.PluginManager`:
+
+.. code-block:: python
+
+    engine = plugin.resource('engine', create_engine, 'sqlite:///accounts.db')
+
+    @plugin.route('/')
+    def index():
+        with engine.get().connect() as connection:
+            ...
+
+- created lazily by first :py:meth:`Resource.get`, never when plugin only discovered.
+- shared by all plugins declaring a resource with the same factory and arguments,
+  so they use one connection pool.
+- disposed when the last plugin using it is cleaned, see :py:meth:`.Plugin.clean`,
+  by ``dispose`` given, otherwise by its ``dispose()`` or ``close()`` method.
+- disposed in parent process before forking workers and created again
+  in each worker, see :py:meth:`.PluginManager.prefork`.
+
+Resources are used by concurrent requests, so they should be thread-safe,
+like engines or connection pools.
+"""
+
+import threading
+import typing as t
+import weakref
+
+
+def _freeze(value: t.Any) -> t.Hashable:
+    """Convert ``value`` to a hashable key, containers are compared by content."""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(item) for item in value)
+    hash(value)
+    return value
+
+
+class Resource:
+    """
+    Handle of a resource declared by plugin, created by ``factory(*args, **kwargs)``.
+
+    Args:
+        name (str): name of resource, for reporting.
+        factory (t.Callable[..., t.Any]): function creating resource.
+        dispose (t.Callable[[t.Any], None], optional): function releasing resource,
+            defaults to calling its ``dispose()`` or ``close()`` method if any.
+
+    Raises:
+        ValueError: when arguments are not hashable, so cannot be compared.
+    """
+
+    def __init__(
+        self, name: str, factory: t.Callable[..., t.Any], *args: t.Any,
+        dispose: t.Optional[t.Callable[[t.Any], None]] = None, **kwargs: t.Any
+    ) -> None:
+        self.name = name
+        self.factory = factory
+        self.args = args
+        self.kwargs = kwargs
+        self.dispose = dispose
+        try:
+            self.key = (factory, _freeze(args), _freeze(kwargs))
+        except TypeError:
+            raise ValueError(f'arguments of resource {name} are not hashable') from None
+        self._pool: t.Optional['ResourcePool'] = None
+
+    def __repr__(self) -> str:
+        return f'<Resource {self.name}>'
+
+    def bind(self, pool: 'ResourcePool', user: t.Any) -> None:
+        """Record ``user`` using this resource from ``pool``."""
+        pool.acquire(self, user)
+        self._pool = pool
+
+    def release(self, user: t.Any) -> t.List[Exception]:
+        """
+        Remove ``user`` of this resource, disposed if nobody else uses it.
+
+        Returns:
+            t.List[Exception]: exceptions raised while disposing.
+        """
+        if self._pool is None:
+            return []
+        return self._pool.release(self, user)
+
+    def get(self) -> t.Any:
+        """
+        Return resource, created at the first call.
+
+        Raises:
+            RuntimeError: when plugin declaring it not loaded.
+        """
+        if self._pool is None:
+            raise RuntimeError(f'resource {self.name} used before plugin loaded')
+        return self._pool.get(self)
+
+    __call__ = get
+
+
+class _Entry:
+    """Resource instance shared by resources with the same key."""
+
+    def __init__(self, resource: Resource) -> None:
+        self.resource = resource
+        self.value: t.Any = None
+        self.created = False
+        self.users: 'weakref.WeakSet[t.Any]' = weakref.WeakSet()
+        self.lock = threading.Lock()
+
+    def dispose(self) -> t.List[Exception]:
+        if not self.created:
+            return []
+        value, self.value, self.created = self.value, None, False
+        try:
+            if self.resource.dispose is not None:
+                self.resource.dispose(value)
+            else:
+                dispose = getattr(value, 'dispose', None) or getattr(value, 'close', None)
+                if callable(dispose):
+                    dispose()
+        except Exception as error:
+            return [error]
+        return []
+
+
+class ResourcePool:
+    """Resources used by loaded plugins, safe to use from multiple threads."""
+
+    def __init__(self) -> None:
+        self._entries: t.Dict[t.Hashable, _Entry] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def acquire(self, resource: Resource, user: t.Any) -> None:
+        """Record ``user`` using ``resource``, nothing created."""
+        with self._lock:
+            entry = self._entries.get(resource.key)
+            if entry is None:
+                entry = self._entries[resource.key] = _Entry(resource)
+            entry.users.add(user)
+
+    def get(self, resource: Resource) -> t.Any:
+        """
+        Return instance of ``resource``, created once by the first caller.
+
+        Raises:
+            RuntimeError: when no plugin using ``resource``.
+        """
+        entry = self._entries.get(resource.key)
+        if entry is None:
+            raise RuntimeError(f'resource {resource.name} not used by any loaded plugin')
+        if not entry.created:
+            with entry.lock:
+                if not entry.created:
+                    entry.value = resource.factory(*resource.args, **resource.kwargs)
+                    entry.created = True
+        return entry.value
+
+    def release(self, resource: Resource, user: t.Any) -> t.List[Exception]:
+        """
+        Remove ``user`` of ``resource``, dispose it if nobody else uses it.
+
+        Returns:
+            t.List[Exception]: exceptions raised while disposing.
+        """
+        with self._lock:
+            entry = self._entries.get(resource.key)
+            if entry is None:
+                return []
+            entry.users.discard(user)
+            if entry.users:
+                return []
+            self._entries.pop(resource.key)
+        with entry.lock:
+            return entry.dispose()
+
+    def reset(self) -> t.List[Exception]:
+        """
+        Dispose all created instances, kept used and created again by next
+        :py:meth:`get`, e.g. before forking, so workers never share connections.
+
+        Returns:
+            t.List[Exception]: exceptions raised while disposing.
+        """
+        errors = []
+        with self._lock:
+            entries = list(self._entries.values())
+        for entry in entries:
+            with entry.lock:
+                errors.extend(entry.dispose())
+        return errors
+
+    def usage(self) -> t.List[t.Dict[str, t.Any]]:
+        """Name, count of plugins using and if created of each resource."""
+        with self._lock:
+            return [
+                {'name': entry.resource.name, 'users': len(entry.users), 'created': entry.created}
+                for entry in self._entries.values()
+            ]
+
+
+shared = ResourcePool()
+"""Pool shared by all managers of process with config ``shared_registry`` enabled."""
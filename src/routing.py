@@ -0,0 +1,436 @@
+"""
+Copy-on-write routing snapshots for lock-free request path.
+
+Lifecycle operations of plugins change ``app.url_map``, ``app.view_functions``,
+``app.error_handler_spec`` and handler dicts of Flask application. Changing them in place
+while serving requests lets concurrent requests see half-applied changes, e.g. a rule
+matched in ``url_map`` whose view function has not been registered yet.
+
+Here all of these containers are gathered in one immutable :py:class:`Snapshot`,
+with jinja loaders of running plugins keyed by domain.
+Writers apply changes on copies inside :py:meth:`Router.update` under a writer lock,
+and publish a new snapshot with one reference swap into ``app.extensions``. Every request
+pins the snapshot published when it began with :py:class:`PinningMiddleware`, so it always
+reads one consistent routing state without any lock. Routing attributes of application
+stay public, they are :py:class:`SnapshotAttribute` reading the pinned snapshot:
+
+>>> router = Router(app)
+>>> with router.update() as staging:
+        plugin.register(staging, config)
+"""
+
+import contextlib
+import contextvars
+import copy
+import threading
+import typing as t
+
+from flask import Flask
+from flask.scaffold import Scaffold
+from werkzeug.routing import Map, Rule
+
+RoutingContainers: t.Dict[str, int] = {
+    'view_functions': 1,
+    'error_handler_spec': 3,
+    'before_request_funcs': 2,
+    'after_request_funcs': 2,
+    'teardown_request_funcs': 2,
+    'template_context_processors': 2,
+    'url_value_preprocessors': 2,
+    'url_default_functions': 2
+}
+"""Containers of Flask application changed by plugins, with nesting depth to be copied."""
+
+RoutingAttributes = ('url_map',) + tuple(RoutingContainers)
+"""All application attributes managed by :py:class:`Snapshot`."""
+
+PluginContainers: t.Dict[str, int] = {
+    'jinja_loaders': 1
+}
+"""Containers of plugins only kept in :py:class:`Snapshot`, with nesting depth to be copied."""
+
+SnapshotFields = RoutingAttributes + tuple(PluginContainers)
+"""All fields of :py:class:`Snapshot`."""
+
+RoutingExtension = 'plugin_routing'
+"""Key of ``app.extensions`` storing published :py:class:`Snapshot`."""
+
+
+def duplicate(container: t.Any, depth: int) -> t.Any:
+    """
+    Copy ``container`` and its nested containers down to ``depth`` levels,
+    types like ``defaultdict`` are kept. Immutable containers returning themselves
+    when copied, e.g. :py:class:`.handlers.ErrorHandlerTable`, are shared.
+    """
+    duplicated = copy.copy(container)
+    if duplicated is container:
+        return duplicated
+    if depth > 1 and isinstance(duplicated, dict):
+        for key, value in duplicated.items():
+            duplicated[key] = duplicate(value, depth - 1)
+    return duplicated
+
+
+def copy_rule(rule: Rule) -> Rule:
+    """Return an unbound copy of ``rule``, keeping options set by Flask."""
+    copied = rule.empty()
+    copied.provide_automatic_options = getattr(  # type: ignore
+        rule, 'provide_automatic_options', False)
+    return copied
+
+
+def copy_url_map(
+    url_map: Map, rules: t.Optional[t.Iterable[Rule]] = None,
+    map_class: t.Optional[t.Callable[..., Map]] = None
+) -> Map:
+    """
+    Build a new map with settings of ``url_map``.
+
+    Rules cannot be removed from a bound ``werkzeug.routing.Map``, so removing
+    or isolating rules always means building a new map.
+
+    Args:
+        url_map (Map): map whose settings are copied.
+        rules (t.Iterable[Rule], optional): rules of new map, defaults to all
+            rules inside ``url_map``.
+        map_class (t.Callable[..., Map], optional): class creating new map,
+            defaults to type of ``url_map``.
+
+    Returns:
+        Map: new map.
+    """
+    if isinstance(url_map, SnapshotAttribute):
+        url_map = url_map._get_current_object()
+    if rules is None:
+        rules = url_map.iter_rules()
+    map_class = map_class or type(url_map)
+    return map_class(
+        (copy_rule(rule) for rule in rules),
+        default_subdomain=url_map.default_subdomain,
+        strict_slashes=url_map.strict_slashes,
+        merge_slashes=getattr(url_map, 'merge_slashes', True),
+        redirect_defaults=url_map.redirect_defaults,
+        converters=url_map.converters,
+        sort_parameters=url_map.sort_parameters,
+        sort_key=url_map.sort_key,
+        host_matching=url_map.host_matching
+    )
+
+
+class Snapshot(t.NamedTuple):
+    """Routing and handler containers read by request path, never changed once published."""
+    url_map: Map
+    view_functions: t.Dict
+    error_handler_spec: t.Dict
+    before_request_funcs: t.Dict
+    after_request_funcs: t.Dict
+    teardown_request_funcs: t.Dict
+    template_context_processors: t.Dict
+    url_value_preprocessors: t.Dict
+    url_default_functions: t.Dict
+    jinja_loaders: t.Dict
+
+
+_pinned: contextvars.ContextVar[t.Optional[t.Tuple[Flask, Snapshot]]] = \
+    contextvars.ContextVar('plugin_routing_snapshot', default=None)
+
+
+_previewed: contextvars.ContextVar[t.Optional[t.Tuple[Flask, Snapshot]]] = \
+    contextvars.ContextVar('plugin_routing_preview', default=None)
+
+PreviewEnviron = 'plugin_routing.preview'
+"""
+Key of WSGI environ marking requests sent against a previewed snapshot, e.g. warmups.
+They are not counted by canary metrics, access records, traces or profiles,
+see :py:func:`is_preview`.
+"""
+
+
+def current(app: Flask) -> Snapshot:
+    """Snapshot pinned by current request of ``app``, or the published one."""
+    pinned = _pinned.get()
+    if pinned is not None and pinned[0] is app:
+        return pinned[1]
+    return app.extensions[RoutingExtension]
+
+
+def _reading(app: Flask) -> bool:
+    """If current context reads a snapshot pinned for requests of ``app``."""
+    pinned = _pinned.get()
+    return pinned is not None and pinned[0] is app
+
+
+class SnapshotAttribute:
+    """
+    Routing attribute ``name`` of application installed by :py:func:`install`,
+    delegating everything to the container inside snapshot of :py:func:`current`.
+
+    Setting up application, e.g. registering blueprints before serving, still changes
+    the published containers in place, lifecycle operations go through :py:class:`Router`.
+    """
+
+    __slots__ = ('_app', '_name')
+
+    def __init__(self, app: Flask, name: str) -> None:
+        object.__setattr__(self, '_app', app)
+        object.__setattr__(self, '_name', name)
+
+    def _get_current_object(self) -> t.Any:
+        """Container read by current context."""
+        return getattr(current(self._app), self._name)
+
+    def __getattr__(self, name: str) -> t.Any:
+        return getattr(self._get_current_object(), name)
+
+    def __setattr__(self, name: str, value: t.Any) -> None:
+        setattr(self._get_current_object(), name, value)
+
+    def __getitem__(self, key: t.Any) -> t.Any:
+        return self._get_current_object()[key]
+
+    def __setitem__(self, key: t.Any, value: t.Any) -> None:
+        self._get_current_object()[key] = value
+
+    def __delitem__(self, key: t.Any) -> None:
+        del self._get_current_object()[key]
+
+    def __contains__(self, key: t.Any) -> bool:
+        return key in self._get_current_object()
+
+    def __iter__(self) -> t.Iterator[t.Any]:
+        return iter(self._get_current_object())
+
+    def __len__(self) -> int:
+        return len(self._get_current_object())
+
+    def __bool__(self) -> bool:
+        return bool(self._get_current_object())
+
+    def __eq__(self, other: object) -> bool:
+        return self._get_current_object() == other
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self) -> str:
+        return repr(self._get_current_object())
+
+
+class _ReadOnlyHandlers:
+    """Error handlers of one blueprint by code, missing codes read as empty without inserting."""
+
+    __slots__ = ('_mapping',)
+
+    def __init__(self, mapping: t.Mapping) -> None:
+        self._mapping = mapping
+
+    def __getitem__(self, code: t.Optional[int]) -> t.Mapping:
+        return self._mapping.get(code) or {}
+
+
+class ErrorHandlerSpec(SnapshotAttribute):
+    """
+    ``app.error_handler_spec`` installed by :py:func:`install`.
+
+    Flask looks up error handlers with ``error_handler_spec[name][code]``, which inserts
+    missing keys into ``defaultdict``. While serving requests lookups are read only,
+    so published snapshots are never changed by requests, nor copied by writers
+    while being changed.
+    """
+
+    __slots__ = ()
+
+    def __getitem__(self, key: t.Any) -> t.Any:
+        spec = self._get_current_object()
+        if not _reading(self._app):
+            return spec[key]
+        return _ReadOnlyHandlers(spec.get(key) or {})
+
+
+class PinningMiddleware:
+    """
+    WSGI middleware installed as ``app.wsgi_app`` by :py:func:`install`, pinning
+    the snapshot published when request began for the whole request,
+    or the one pinned by :py:func:`pin` in current context.
+
+    Args:
+        app (Flask): Flask application.
+        wsgi_app (t.Callable): WSGI application wrapped.
+    """
+
+    def __init__(self, app: Flask, wsgi_app: t.Callable) -> None:
+        self.app, self.wsgi_app = app, wsgi_app
+
+    def __call__(self, environ: t.Dict, start_response: t.Callable) -> t.Any:
+        snapshot = self.app.extensions[RoutingExtension]
+        if previewing(self.app):
+            snapshot = t.cast(t.Tuple[Flask, Snapshot], _previewed.get())[1]
+        token = _pinned.set((self.app, snapshot))
+        try:
+            return self.wsgi_app(environ, start_response)
+        finally:
+            _pinned.reset(token)
+
+
+@contextlib.contextmanager
+def pin(app: Flask, snapshot: Snapshot) -> t.Iterator[Snapshot]:
+    """
+    Pin ``snapshot`` for requests handled by ``app`` in current context,
+    e.g. requesting a staging snapshot through test client before publishing it.
+    """
+    tokens = _pinned.set((app, snapshot)), _previewed.set((app, snapshot))
+    try:
+        yield snapshot
+    finally:
+        _previewed.reset(tokens[1])
+        _pinned.reset(tokens[0])
+
+
+def is_preview(environ: t.Dict[str, t.Any]) -> bool:
+    """
+    If request of ``environ`` is sent against a previewed snapshot, marked with
+    :py:data:`PreviewEnviron` or sent while :py:func:`pin` is active in current context.
+    """
+    return bool(environ.get(PreviewEnviron)) or _previewed.get() is not None
+
+
+def previewing(app: Flask) -> bool:
+    """If requests handled by ``app`` in current context read a snapshot pinned by :py:func:`pin`."""
+    previewed = _previewed.get()
+    return previewed is not None and previewed[0] is app
+
+
+def install(app: Flask) -> None:
+    """
+    Install snapshot reading into ``app``: current routing attributes of ``app``
+    become the first published snapshot, and are replaced by :py:class:`SnapshotAttribute`,
+    then ``app.wsgi_app`` is wrapped by :py:class:`PinningMiddleware`.
+    Installing twice does nothing.
+    """
+    if RoutingExtension in app.extensions:
+        return
+    app.extensions[RoutingExtension] = Snapshot(
+        **{name: getattr(app, name) for name in RoutingAttributes},
+        **{name: {} for name in PluginContainers})
+    for name in RoutingAttributes:
+        attribute = ErrorHandlerSpec if name == 'error_handler_spec' else SnapshotAttribute
+        setattr(app, name, attribute(app, name))
+    app.wsgi_app = PinningMiddleware(app, app.wsgi_app)  # type: ignore
+
+
+class Staging:
+    """
+    Application-like object passed to deferred functions of plugins instead of app.
+
+    Routing attributes are copied from published snapshot at first access,
+    others are read from application. Setup methods like ``add_url_rule`` and ``endpoint``
+    are executed on the copies, and work even after application handled its first request.
+    """
+
+    add_url_rule = Flask.add_url_rule
+    endpoint = Scaffold.endpoint
+
+    def __init__(self, app: Flask, snapshot: Snapshot) -> None:
+        self.__dict__['_app'] = app
+        self.__dict__['_snapshot'] = snapshot
+
+    def _check_setup_finished(self, f_name: str) -> None:
+        return
+
+    def __getattr__(self, name: str) -> t.Any:
+        snapshot: Snapshot = self.__dict__['_snapshot']
+        if name == 'url_map':
+            value = copy_url_map(snapshot.url_map)
+        elif name in RoutingContainers:
+            value = duplicate(getattr(snapshot, name), RoutingContainers[name])
+        elif name in PluginContainers:
+            value = duplicate(getattr(snapshot, name), PluginContainers[name])
+        else:
+            return getattr(self.__dict__['_app'], name)
+        self.__dict__[name] = value
+        return value
+
+    @property
+    def changed(self) -> bool:
+        """If any routing attribute accessed, which means copied and possibly changed."""
+        return any(name in self.__dict__ for name in SnapshotFields)
+
+    def build(self) -> Snapshot:
+        """Build new snapshot from changed copies and unchanged published containers."""
+        snapshot: Snapshot = self.__dict__['_snapshot']
+        changes = {
+            name: self.__dict__[name] for name in SnapshotFields if name in self.__dict__
+        }
+        return snapshot._replace(**changes)
+
+
+class Router:
+    """
+    Writer side of routing snapshots.
+
+    All writers are serialized by :py:attr:`lock`, readers never wait for it.
+
+    Args:
+        app (Flask): Flask application, :py:func:`install` will be applied on it.
+    """
+
+    def __init__(self, app: Flask) -> None:
+        install(app)
+        self._app = app
+        self._lock = threading.RLock()
+        self._version = 0
+
+    def reinit(self) -> None:
+        """
+        Create a new writer lock, called in forked child process,
+        where lock held by another thread of parent would never be released.
+        """
+        self._lock = threading.RLock()
+
+    @property
+    def lock(self) -> threading.RLock:
+        """Writer lock, hold it when changing anything related with routing."""
+        return self._lock
+
+    @property
+    def snapshot(self) -> Snapshot:
+        """Current published snapshot."""
+        return self._app.extensions[RoutingExtension]
+
+    @property
+    def version(self) -> int:
+        """Counter increased by every published snapshot."""
+        return self._version
+
+    @contextlib.contextmanager
+    def update(self) -> t.Iterator[Staging]:
+        """
+        Acquire writer lock and yield a :py:class:`Staging` for applying changes,
+        publish it when block exits normally; when any exception raised
+        the staging will be discarded, nothing published.
+        """
+        with self._lock:
+            staging = Staging(self._app, self.snapshot)
+            yield staging
+            if staging.changed:
+                self.publish(staging.build())
+
+    def preview(self, staging: Staging) -> Snapshot:
+        """
+        Build snapshot from ``staging`` without publishing it, for requests pinning it
+        with :py:func:`pin`. Routing map is compiled, so it's ready when published later.
+        """
+        snapshot = staging.build()
+        snapshot.url_map.update()
+        return snapshot
+
+    def publish(self, snapshot: Snapshot) -> None:
+        """
+        Publish ``snapshot`` with one reference swap.
+
+        Routing map is compiled before publishing, so first request after
+        swapping don't need to do it.
+        """
+        with self._lock:
+            snapshot.url_map.update()
+            self._app.extensions[RoutingExtension] = snapshot
+            self._version += 1
@@ -91,6 +91,16 @@ class StateMachine:
         raise RuntimeError(
             f"cannot transfer state from '{self._current.name}' to '{state}'")
 
+    def restore(self, state: PluginStatus) -> None:
+        """Restore current state without checking transfer table.
+
+        Used by :py:class:`.transaction.Transaction` for rolling back failed operations.
+
+        Args:
+            state (PluginStatus): state going to be restored.
+        """
+        self._current = state
+
     def allow(self, operation: str) -> bool:
         """Check if operation allow in current state.
 
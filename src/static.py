@@ -0,0 +1,322 @@
+"""
+Static file pipeline for plugins.
+
+When plugin loaded, all files inside its static folder are prepared once:
+
+- strong ``ETag`` computed from file content, each precompressed variant has its own
+  one suffixed by encoding, like ``"3f2a9c1d...-gz"``.
+- fingerprinted filename like ``style.3f2a9c1d.css``, served with
+  ``Cache-Control: immutable`` so browsers never revalidate it.
+- small files are cached in memory, compressible ones also precompressed
+  with gzip (and brotli, if the ``brotli`` library installed).
+- large files could be offloaded to front server with ``X-Sendfile``
+  or ``X-Accel-Redirect`` header.
+
+Files added into static folder after loading are prepared on their first request.
+Large files not offloaded are sent with ``Range`` and ``If-Modified-Since`` support.
+
+Static folder of plugins deployed as bundles is read from the archive,
+see :py:mod:`.bundle`, large files there are streamed from the archive
+instead of being offloaded.
+"""
+
+import datetime
+import functools
+import gzip
+import hashlib
+import mimetypes
+import os
+import typing as t
+
+from flask import abort, current_app, request, send_file
+from flask.wrappers import Response
+from werkzeug.security import safe_join
+
+from .bundle import Bundle
+
+try:
+    import brotli  # type: ignore
+except ImportError:  # pragma: no cover
+    brotli = None
+
+FingerprintLength = 8
+"""Length of content hash inserted into fingerprinted filename."""
+
+CompressMinSize = 512
+"""Files smaller than it are not worth compressing."""
+
+ImmutableMaxAge = 365 * 24 * 60 * 60
+"""``max-age`` for fingerprinted files, one year."""
+
+OffloadHeaders = {
+    'x-sendfile': 'X-Sendfile',
+    'x-accel-redirect': 'X-Accel-Redirect'
+}
+"""Supported offload modes and header used by them."""
+
+EncodingSuffixes = {
+    'br': 'br',
+    'gzip': 'gz'
+}
+"""Precompressed encodings in preferred order, with suffix of their ``ETag``."""
+
+_CompressibleTypes = (
+    'application/javascript',
+    'application/json',
+    'application/xml',
+    'image/svg+xml'
+)
+
+
+class Asset(t.NamedTuple):
+    """Prepared static file."""
+    filename: str
+    path: str
+    size: int
+    mtime: float
+    mimetype: str
+    etag: str
+    fingerprint: str
+    content: t.Optional[bytes]
+    encodings: t.Dict[str, bytes]
+
+
+def _compressible(mimetype: str) -> bool:
+    return mimetype.startswith('text/') or mimetype in _CompressibleTypes
+
+
+class StaticFiles:
+    """
+    Static files of one plugin, prepared at load time.
+
+    Args:
+        directory (str): absolute path of plugin static folder.
+        cache_size (int, optional): files not larger than it are kept in memory
+            with their compressed variants. Defaults to 64KB.
+        compress (bool, optional): if precompress cached files. Defaults to True.
+        offload (str, optional): offload mode, one of :py:const:`OffloadHeaders`,
+            files not cached in memory will be served by front server. Defaults to None.
+        offload_prefix (str, optional): internal location prefix used
+            by ``X-Accel-Redirect``. Defaults to '/'.
+        bundle (Bundle, optional): bundle containing ``directory``,
+            files are read from it instead of disk. Defaults to None.
+
+    Raises:
+        ValueError: when given unknown offload mode.
+    """
+
+    def __init__(
+        self, directory: str,
+        cache_size: int = 64 * 1024,
+        compress: bool = True,
+        offload: t.Optional[str] = None,
+        offload_prefix: str = '/',
+        bundle: t.Optional[Bundle] = None
+    ) -> None:
+        if offload and offload not in OffloadHeaders:
+            raise ValueError(f'unknown static offload mode: {offload}')
+        self._directory = os.path.abspath(directory)
+        self._bundle = bundle
+        self._cache_size, self._compress = cache_size, compress
+        self._offload, self._offload_prefix = offload, offload_prefix
+        self._assets: t.Dict[str, Asset] = {}
+        self._fingerprinted: t.Dict[str, Asset] = {}
+        self.prepare()
+
+    @property
+    def assets(self) -> t.Dict[str, Asset]:
+        """All prepared files, keyed by filename relative to static folder."""
+        return self._assets
+
+    @property
+    def memory(self) -> int:
+        """Bytes of file contents and compressed variants kept in memory."""
+        return sum(
+            len(asset.content or b'') + sum(len(data) for data in asset.encodings.values())
+            for asset in self._assets.values()
+        )
+
+    def prepare(self) -> None:
+        """Walk static folder and prepare all files inside."""
+        self._assets.clear()
+        self._fingerprinted.clear()
+        if self._bundle is not None:
+            self._prepare_bundle(self._bundle)
+            return
+        if not os.path.isdir(self._directory):
+            return
+        for root, _dirs, files in os.walk(self._directory):
+            for name in files:
+                path = os.path.join(root, name)
+                filename = os.path.relpath(path, self._directory).replace(os.sep, '/')
+                asset = self._prepare_file(filename, path)
+                self._assets[filename] = asset
+                self._fingerprinted[self._fingerprint_filename(asset)] = asset
+
+    def _prepare_bundle(self, bundle: Bundle) -> None:
+        directory = bundle.member(self._directory)
+        for filename in bundle.walk(directory):
+            path = directory + '/' + filename
+            info = bundle.getinfo(path)
+            mtime = datetime.datetime(*info.date_time).timestamp()
+            asset = self._prepare_file(
+                filename, path, info.file_size, mtime, functools.partial(bundle.open, path))
+            self._assets[filename] = asset
+            self._fingerprinted[self._fingerprint_filename(asset)] = asset
+
+    def _prepare_file(
+        self, filename: str, path: str,
+        size: t.Optional[int] = None, mtime: t.Optional[float] = None,
+        opener: t.Optional[t.Callable[[], t.IO[bytes]]] = None
+    ) -> Asset:
+        if size is None or mtime is None:
+            stat = os.stat(path)
+            size, mtime = stat.st_size, stat.st_mtime
+        if opener is None:
+            opener = functools.partial(open, path, 'rb')
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        digest, content = hashlib.sha256(), None
+        if size <= self._cache_size:
+            with opener() as handler:
+                content = handler.read()
+            digest.update(content)
+        else:
+            with opener() as handler:
+                for chunk in iter(lambda: handler.read(64 * 1024), b''):
+                    digest.update(chunk)
+        hexdigest = digest.hexdigest()
+
+        # Precompress cached files, keep variants only when they are smaller
+        encodings: t.Dict[str, bytes] = {}
+        if content is not None and self._compress and \
+                len(content) >= CompressMinSize and _compressible(mimetype):
+            variants = {'gzip': gzip.compress(content, mtime=0)}
+            if brotli is not None:
+                variants['br'] = brotli.compress(content)
+            for encoding, compressed in variants.items():
+                if len(compressed) < len(content):
+                    encodings[encoding] = compressed
+
+        return Asset(
+            filename, path, size, mtime, mimetype,
+            '"' + hexdigest[:32] + '"', hexdigest[:FingerprintLength],
+            content, encodings
+        )
+
+    @staticmethod
+    def _fingerprint_filename(asset: Asset) -> str:
+        head, slash, name = asset.filename.rpartition('/')
+        stem, dot, suffix = name.partition('.')
+        return head + slash + stem + '.' + asset.fingerprint + dot + suffix
+
+    def fingerprint(self, filename: str) -> str:
+        """
+        Return fingerprinted filename, e.g. ``css/style.css`` to ``css/style.3f2a9c1d.css``.
+
+        Unknown filename is returned as it is.
+
+        Args:
+            filename (str): filename relative to static folder.
+
+        Returns:
+            str: fingerprinted filename.
+        """
+        asset = self._assets.get(filename)
+        if asset is None:
+            return filename
+        return self._fingerprint_filename(asset)
+
+    def resolve(self, filename: str) -> t.Tuple[t.Optional[Asset], bool]:
+        """
+        Find prepared file by plain or fingerprinted filename.
+
+        Returns:
+            t.Tuple[t.Optional[Asset], bool]: asset and if requested with fingerprint.
+        """
+        asset = self._fingerprinted.get(filename)
+        if asset is not None:
+            return asset, True
+        return self._assets.get(filename), False
+
+    def send(self, filename: str) -> Response:
+        """
+        Build response for requested file.
+
+        Raises:
+            NotFound: when file not exists.
+        """
+        asset, immutable = self.resolve(filename)
+        if asset is None:
+            asset = self._discover(filename)
+        if asset is None:
+            abort(404)
+
+        if immutable:
+            cache_control = f'public, max-age={ImmutableMaxAge}, immutable'
+        else:
+            max_age = current_app.get_send_file_max_age(asset.filename)
+            cache_control = 'no-cache' if max_age is None else f'public, max-age={max_age}'
+
+        # Validate with precomputed ETag of representation selected
+        encoding = self._negotiate(asset)
+        etag = asset.etag
+        if encoding is not None:
+            etag = etag[:-1] + '-' + EncodingSuffixes[encoding] + '"'
+        if request.if_none_match.contains_weak(etag.strip('"')):
+            response = current_app.response_class(status=304)
+        else:
+            response = self._send_content(asset, encoding)
+        response.headers['ETag'] = etag
+        response.headers['Cache-Control'] = cache_control
+        if asset.encodings:
+            response.vary.add('Accept-Encoding')
+        return response
+
+    def _discover(self, filename: str) -> t.Optional[Asset]:
+        """Prepare file added into static folder after loading, None if not exists."""
+        if self._bundle is not None:
+            return None
+        path = safe_join(self._directory, filename)
+        if path is None or not os.path.isfile(path):
+            return None
+        asset = self._prepare_file(filename, path)
+        self._assets[filename] = asset
+        self._fingerprinted[self._fingerprint_filename(asset)] = asset
+        return asset
+
+    @staticmethod
+    def _negotiate(asset: Asset) -> t.Optional[str]:
+        """Precompressed encoding of ``asset`` accepted by client, None for identity."""
+        for encoding in EncodingSuffixes:
+            if encoding in asset.encodings and encoding in request.accept_encodings:
+                return encoding
+        return None
+
+    def _send_content(self, asset: Asset, encoding: t.Optional[str]) -> Response:
+        if encoding is not None:
+            response = current_app.response_class(
+                asset.encodings[encoding], mimetype=asset.mimetype)
+            response.headers['Content-Encoding'] = encoding
+            return response
+        if asset.content is not None:
+            return current_app.response_class(asset.content, mimetype=asset.mimetype)
+
+        # Files of bundles cannot be offloaded, stream them from archive
+        if self._bundle is not None:
+            return send_file(
+                self._bundle.open(asset.path), mimetype=asset.mimetype,
+                conditional=False, etag=False, last_modified=asset.mtime
+            )
+        if self._offload == 'x-sendfile':
+            response = current_app.response_class(mimetype=asset.mimetype)
+            response.headers['X-Sendfile'] = asset.path
+            return response
+        if self._offload == 'x-accel-redirect':
+            response = current_app.response_class(mimetype=asset.mimetype)
+            response.headers['X-Accel-Redirect'] = \
+                self._offload_prefix.rstrip('/') + '/' + asset.filename
+            return response
+        return send_file(
+            asset.path, mimetype=asset.mimetype, conditional=True,
+            etag=asset.etag.strip('"'), last_modified=asset.mtime
+        )
@@ -0,0 +1,135 @@
+"""
+Per-request jinja loader selection for plugins.
+
+Replacing global ``app.jinja_env.loader`` for each plugin request lets concurrent
+requests render templates of another plugin. :py:class:`PluginJinjaLoader` is installed
+once as ``app.jinja_env.loader``, and delegates to the loader selected for current request,
+which is stored in ``flask.g`` by :py:class:`.PluginManager` before the request.
+
+Templates of plugins are cached by :py:class:`PluginJinjaLoader` keyed by their loader,
+:py:class:`PluginTemplateCache` keeps them out of ``app.jinja_env.cache``, which still
+caches templates of application.
+"""
+
+import typing as t
+import weakref
+
+from flask import g, has_app_context
+from jinja2 import BaseLoader, Environment, Template, TemplateNotFound
+from jinja2.utils import LRUCache
+
+SelectedLoader = '_plugin_jinja_loader'
+"""Attribute name of ``flask.g`` storing jinja loader selected for current request."""
+
+
+def select_loader(loader: t.Optional[BaseLoader]) -> None:
+    """Select ``loader`` for templates rendered by current request."""
+    setattr(g, SelectedLoader, loader)
+
+
+class PluginJinjaLoader(BaseLoader):
+    """
+    Jinja loader delegating to loader selected for current request,
+    or to ``default`` when nothing selected.
+
+    Jinja environment caches templates by loader and name, which makes no sense
+    for a delegating loader, so templates of plugins are cached here by the selected loader,
+    and kept out of environment cache by :py:class:`PluginTemplateCache`.
+    Templates of ``default`` are loaded by it and cached by environment as usual.
+
+    Args:
+        default (BaseLoader, optional): loader of application.
+        cache_size (int, optional): max compiled templates kept. Defaults to 400.
+    """
+
+    def __init__(self, default: t.Optional[BaseLoader], cache_size: int = 400) -> None:
+        self._default = default
+        self._cache = LRUCache(cache_size)
+
+    def reinit(self) -> None:
+        """
+        Replace template cache with a copy, called in forked child process
+        as lock inside the cache may have been held while forking.
+        Compiled templates are kept and shared with parent.
+        """
+        self._cache = self._cache.copy()
+
+    @property
+    def default(self) -> t.Optional[BaseLoader]:
+        """Loader used when nothing selected."""
+        return self._default
+
+    def plugin_selected(self) -> bool:
+        """If a loader other than ``default`` is selected for current request."""
+        return self.selected() is not self._default
+
+    def selected(self) -> t.Optional[BaseLoader]:
+        """Return loader selected for current request, or ``default``."""
+        if has_app_context() and SelectedLoader in g:
+            return g.get(SelectedLoader)
+        return self._default
+
+    def get_source(
+        self, environment: Environment, template: str
+    ) -> t.Tuple[str, t.Optional[str], t.Optional[t.Callable[[], bool]]]:
+        loader = self.selected()
+        if loader is None:
+            raise TemplateNotFound(template)
+        return loader.get_source(environment, template)
+
+    def list_templates(self) -> t.List[str]:
+        if self._default is None:
+            return []
+        return self._default.list_templates()
+
+    def load(
+        self, environment: Environment, name: str,
+        globals: t.Optional[t.MutableMapping[str, t.Any]] = None
+    ) -> Template:
+        loader = self.selected()
+        if loader is None:
+            raise TemplateNotFound(name)
+        if loader is self._default:
+            return loader.load(environment, name, globals)
+        key = (weakref.ref(loader), name)
+        template: t.Optional[Template] = self._cache.get(key)
+        if template is not None and (
+                not environment.auto_reload or template.is_up_to_date):
+            if globals:
+                template.globals.update(globals)
+            return template
+        template = loader.load(environment, name, globals)
+        self._cache[key] = template
+        return template
+
+
+class PluginTemplateCache:
+    """
+    Template cache of jinja environment wrapping ``cache`` configured by application,
+    bypassed while a plugin loader is selected by ``loader``, whose templates are cached
+    by :py:class:`PluginJinjaLoader` instead.
+
+    Args:
+        cache (t.MutableMapping): cache created by jinja environment.
+        loader (PluginJinjaLoader): loader installed into the environment.
+    """
+
+    def __init__(self, cache: t.MutableMapping, loader: PluginJinjaLoader) -> None:
+        self._cache, self._loader = cache, loader
+
+    def reinit(self) -> None:
+        """Replace wrapped cache with a copy, called in forked child process."""
+        if isinstance(self._cache, LRUCache):
+            self._cache = self._cache.copy()
+
+    def get(self, key: t.Any, default: t.Any = None) -> t.Any:
+        if self._loader.plugin_selected():
+            return default
+        return self._cache.get(key, default)
+
+    def __setitem__(self, key: t.Any, template: Template) -> None:
+        if not self._loader.plugin_selected():
+            self._cache[key] = template
+
+    def clear(self) -> None:
+        self._cache.clear()
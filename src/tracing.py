@@ -0,0 +1,385 @@
+"""
+Tracing spans of plugin requests and lifecycle operations.
+
+With config ``trace_sink`` set, or a sink given to :py:attr:`.PluginManager.tracer`,
+:py:class:`.PluginManager` records spans of:
+
+- ``plugin.dispatch``: a request routed to plugin, from before request functions
+  of manager blueprint until its teardown, with ``plugin.select_loader`` for selecting
+  jinja loader, ``plugin.view`` for view function and ``plugin.render`` for each
+  template rendered inside it.
+- ``plugins.load``, ``plugins.start``, ``plugins.stop`` and ``plugins.unload`` for
+  batches, with ``plugin.load``, ``plugin.register``, ``plugin.unregister``,
+  ``plugin.clean`` and ``plugin.warmup`` for each plugin inside them.
+- ``plugin.scan`` for importing each plugin found by :py:meth:`.PluginManager.scan`.
+
+Requests of warmups are covered by ``plugin.warmup`` only, they have no dispatch spans.
+Spans of plugins carry attributes ``plugin.id`` and ``plugin.domain``. Finished spans
+are exported to a sink as dicts following JSON encoding of OpenTelemetry protocol,
+so they could be sent to any collector, or inspected without one:
+
+.. code-block:: python
+
+    sink = tracing.MemorySink()
+    manager.tracer.sink = sink
+    client.get('/plugins/hello/Doge')
+    [span.name for span in sink.spans]
+
+Without a sink tracing costs almost nothing, no span is created.
+"""
+
+import collections
+import contextlib
+import contextvars
+import json
+import os
+import queue
+import random
+import threading
+import time
+import typing as t
+
+from flask import Blueprint, Flask, g, has_request_context, request
+from flask import before_render_template, template_rendered
+
+from .routing import is_preview
+
+SpanKindInternal = 'SPAN_KIND_INTERNAL'
+SpanKindServer = 'SPAN_KIND_SERVER'
+
+StatusUnset = 'STATUS_CODE_UNSET'
+StatusOk = 'STATUS_CODE_OK'
+StatusError = 'STATUS_CODE_ERROR'
+
+_current: 'contextvars.ContextVar[t.Optional[Span]]' = contextvars.ContextVar(
+    'plugin_span', default=None)
+
+
+def _value(value: t.Any) -> t.Dict[str, t.Any]:
+    """Encode attribute value as ``AnyValue`` of OpenTelemetry protocol."""
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+class Span:
+    """
+    One timed operation, child of the span current when started.
+
+    Args:
+        name (str): name of operation.
+        parent (Span, optional): parent span, a new trace is started without it.
+        kind (str, optional): span kind of OpenTelemetry. Defaults to internal.
+        attributes (t.Dict[str, t.Any], optional): initial attributes.
+    """
+
+    def __init__(
+        self, name: str, parent: t.Optional['Span'] = None,
+        kind: str = SpanKindInternal, attributes: t.Optional[t.Dict[str, t.Any]] = None
+    ) -> None:
+        self.name = name
+        self.parent = parent
+        self.kind = kind
+        self.trace_id = parent.trace_id if parent is not None else f'{random.getrandbits(128):032x}'
+        self.span_id = f'{random.getrandbits(64):016x}'
+        self.attributes: t.Dict[str, t.Any] = dict(attributes or {})
+        self.status = StatusUnset
+        self.message = ''
+        self.start = time.time_ns()
+        self.end: t.Optional[int] = None
+
+    def __repr__(self) -> str:
+        return f'<Span {self.name} {self.span_id}>'
+
+    def set_attribute(self, key: str, value: t.Any) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, error: BaseException) -> None:
+        self.status, self.message = StatusError, repr(error)
+
+    @property
+    def duration(self) -> t.Optional[float]:
+        """Seconds spent, None if not ended."""
+        return None if self.end is None else (self.end - self.start) / 1e9
+
+    def to_dict(self) -> t.Dict[str, t.Any]:
+        """Encode as ``Span`` of OpenTelemetry protocol in JSON."""
+        return {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'parentSpanId': self.parent.span_id if self.parent is not None else '',
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start),
+            'endTimeUnixNano': str(self.end or self.start),
+            'attributes': [
+                {'key': key, 'value': _value(value)} for key, value in self.attributes.items()
+            ],
+            'status': {'code': self.status, 'message': self.message}
+        }
+
+
+class _NoopSpan:
+    """Span returned when tracing disabled, ignores everything."""
+
+    def set_attribute(self, key: str, value: t.Any) -> None:
+        pass
+
+    def set_error(self, error: BaseException) -> None:
+        pass
+
+
+NoopSpan = _NoopSpan()
+
+
+class Sink:
+    """Receiver of finished spans, should be safe to use from multiple threads."""
+
+    def export(self, span: Span) -> None:
+        raise NotImplementedError
+
+
+class MemorySink(Sink):
+    """
+    Keep latest finished spans in memory, e.g. for tests.
+
+    Args:
+        capacity (int, optional): max spans kept, oldest are dropped. Defaults to 4096.
+    """
+
+    def __init__(self, capacity: int = 4096) -> None:
+        self._spans: t.Deque[Span] = collections.deque(maxlen=capacity)
+
+    def export(self, span: Span) -> None:
+        self._spans.append(span)
+
+    @property
+    def spans(self) -> t.List[Span]:
+        """Finished spans, oldest first."""
+        return list(self._spans)
+
+    def clear(self) -> None:
+        self._spans.clear()
+
+
+class FileSink(Sink):
+    """
+    Append finished spans to file at ``path`` as JSON lines, one span each line.
+
+    Spans are queued, and encoded and written in batches by a background thread,
+    so requests never wait for the file. :py:meth:`close` writes spans queued before
+    closing file.
+
+    Args:
+        path (str): path of file, created if not exists.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._writer: t.Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        self._queue.put(span)
+        writer = self._writer
+        if writer is None or not writer.is_alive():
+            with self._lock:
+                # Writer thread is not inherited by forked process, start it again
+                if self._writer is writer:
+                    self._writer = threading.Thread(target=self._write, daemon=True)
+                    self._writer.start()
+
+    def _write(self) -> None:
+        with open(self.path, 'a', encoding='utf-8') as handler:
+            closing = False
+            while not closing:
+                spans = [self._queue.get()]
+                while True:
+                    try:
+                        spans.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                closing = None in spans
+                handler.writelines(
+                    json.dumps(span.to_dict(), separators=(',', ':')) + '\n'
+                    for span in spans if span is not None)
+                handler.flush()
+
+    def close(self) -> None:
+        """Write spans queued, then stop writer thread and close file."""
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None and writer.is_alive():
+            self._queue.put(None)
+            writer.join()
+
+
+def create_sink(value: t.Optional[str], root_path: str) -> t.Optional[Sink]:
+    """
+    Create sink configured by ``trace_sink``: None, ``'memory'``, or path of
+    JSON lines file relative to ``root_path``.
+    """
+    if value is None:
+        return None
+    if value == 'memory':
+        return MemorySink()
+    return FileSink(os.path.join(root_path, value))
+
+
+def current() -> t.Optional[Span]:
+    """Span current in this context, None if nothing started."""
+    return _current.get()
+
+
+class Tracer:
+    """
+    Start and end spans, exporting finished ones to :py:attr:`sink`.
+
+    Args:
+        sink (Sink, optional): receiver of spans, tracing disabled when None.
+    """
+
+    def __init__(self, sink: t.Optional[Sink] = None) -> None:
+        self.sink = sink
+
+    @property
+    def enabled(self) -> bool:
+        return self.sink is not None
+
+    def start(
+        self, name: str, kind: str = SpanKindInternal, **attributes: t.Any
+    ) -> t.Optional[Span]:
+        """
+        Start a span as child of current one and make it current,
+        None if tracing disabled. Should be ended by :py:meth:`end`.
+        """
+        if self.sink is None:
+            return None
+        span = Span(name, _current.get(), kind, attributes)
+        _current.set(span)
+        return span
+
+    def end(self, span: t.Optional[Span], error: t.Optional[BaseException] = None) -> None:
+        """End ``span``, export it and make its parent current again."""
+        if span is None or span.end is not None:
+            return
+        span.end = time.time_ns()
+        if error is not None:
+            span.set_error(error)
+        elif span.status == StatusUnset:
+            span.status = StatusOk
+        if _current.get() is span:
+            _current.set(span.parent)
+        sink = self.sink
+        if sink is not None:
+            sink.export(span)
+
+    @contextlib.contextmanager
+    def span(
+        self, name: str, kind: str = SpanKindInternal, **attributes: t.Any
+    ) -> t.Iterator[t.Union[Span, _NoopSpan]]:
+        """
+        Context manager tracing a span, ended with error if anything raised inside.
+        Yields :py:data:`NoopSpan` when tracing disabled.
+        """
+        span = self.start(name, kind, **attributes)
+        if span is None:
+            yield NoopSpan
+            return
+        try:
+            yield span
+        except BaseException as error:
+            self.end(span, error)
+            raise
+        self.end(span)
+
+
+def plugin_attributes(plugin: t.Any) -> t.Dict[str, t.Any]:
+    """Attributes identifying ``plugin``."""
+    return {'plugin.id': plugin.id_, 'plugin.domain': plugin.domain}
+
+
+DispatchSpan = '_plugin_dispatch_span'
+"""Attribute name of ``flask.g`` storing dispatch span of current request."""
+
+
+def instrument(
+    app: Flask, blueprint: Blueprint, tracer: Tracer,
+    attributes: t.Callable[[], t.Dict[str, t.Any]]
+) -> None:
+    """
+    Trace requests routed to plugins under ``blueprint`` of manager.
+
+    Must be called before any other before request function registered on ``blueprint``,
+    so dispatch span covers them. ``app.dispatch_request`` is wrapped for tracing views,
+    and template rendering is traced by signals of Flask.
+
+    Args:
+        attributes (t.Callable[[], t.Dict[str, t.Any]]): attributes of plugin
+            requested by current request.
+    """
+
+    def _routed() -> bool:
+        return tracer.enabled and has_request_context() and len(request.blueprints) == 2 \
+            and not is_preview(request.environ)
+
+    @blueprint.before_request
+    def _start_dispatch() -> None:
+        if not _routed():
+            return
+        span = tracer.start('plugin.dispatch', SpanKindServer, **attributes())
+        if span is not None:
+            span.set_attribute('http.request.method', request.method)
+            span.set_attribute('url.path', request.path)
+            if request.url_rule is not None:
+                span.set_attribute('http.route', request.url_rule.rule)
+        setattr(g, DispatchSpan, span)
+
+    @blueprint.after_request
+    def _record_status(response: t.Any) -> t.Any:
+        span = g.get(DispatchSpan)
+        if span is not None:
+            span.set_attribute('http.response.status_code', response.status_code)
+        return response
+
+    @blueprint.teardown_request
+    def _end_dispatch(error: t.Optional[BaseException]) -> None:
+        span = g.pop(DispatchSpan, None)
+        if span is None:
+            return
+        # Spans left open by failures inside the request, e.g. rendering
+        while True:
+            opened = _current.get()
+            if opened is None or opened is span or opened.trace_id != span.trace_id:
+                break
+            tracer.end(opened, error)
+        tracer.end(span, error)
+
+    dispatch_request = app.dispatch_request
+
+    def _dispatch_request() -> t.Any:
+        if not _routed():
+            return dispatch_request()
+        with tracer.span('plugin.view', endpoint=request.endpoint, **attributes()):
+            return dispatch_request()
+
+    app.dispatch_request = _dispatch_request  # type: ignore
+
+    def _start_render(sender: Flask, template: t.Any, **_kwargs: t.Any) -> None:
+        if _routed():
+            tracer.start('plugin.render', **{'template.name': template.name}, **attributes())
+
+    def _end_render(sender: Flask, template: t.Any, **_kwargs: t.Any) -> None:
+        span = _current.get()
+        if span is not None and span.name == 'plugin.render':
+            tracer.end(span)
+
+    # Receivers are weakly referenced by signals, kept alive with app
+    app.extensions['plugin_tracing'] = (_start_render, _end_render)
+    before_render_template.connect(_start_render, app)
+    template_rendered.connect(_end_render, app)
@@ -0,0 +1,101 @@
+"""
+Undo log for lifecycle operations of plugins.
+
+Deferred functions of :py:class:`.Plugin` change routing data in a
+:py:class:`.routing.Staging`, which is simply discarded when one of them raises halfway.
+Everything else changed by lifecycle operations, e.g. status and prepared static files
+of plugins, or containers of manager, is recorded by :py:class:`Transaction` before
+operating, so a failed operation could be rolled back cleanly:
+
+>>> with router.update() as staging, Transaction(app) as transaction:
+        transaction.record_plugin(plugin)
+        plugin.register(staging, config)
+"""
+
+import typing as t
+
+from flask import Flask
+
+from . import states
+from .routing import duplicate
+
+if t.TYPE_CHECKING:
+    from .plugin import Plugin
+
+
+def _restore(container: t.Any, saved: t.Any) -> None:
+    """Restore container in place with saved contents.
+
+    Args:
+        container (t.Any): list or dict going to be restored.
+        saved (t.Any): contents copied before changing.
+    """
+    if isinstance(container, list):
+        container[:] = saved
+    else:
+        container.clear()
+        container.update(saved)
+
+
+class Transaction:
+    """
+    Transaction keeps an undo log of changes going to be made by lifecycle operations.
+
+    Each record pushes an undo function into the log, they will be executed in reverse
+    order when :py:meth:`rollback` called. Used as context manager, it rolls back
+    automatically when an exception raised inside, and the exception will be re-raised.
+
+    Args:
+        app (Flask): Flask application to be operated.
+    """
+
+    def __init__(self, app: Flask) -> None:
+        self._app = app
+        self._undo: t.List[t.Callable[[], None]] = []
+
+    def __enter__(self) -> 'Transaction':
+        return self
+
+    def __exit__(self, exc_type, _exc_value, _traceback) -> None:
+        if exc_type is not None:
+            self.rollback()
+
+    def journal(self, undo: t.Callable[[], None]) -> None:
+        """
+        Push a custom undo function into log.
+
+        Args:
+            undo (t.Callable[[], None]): function restoring changed state.
+        """
+        self._undo.append(undo)
+
+    def record(self, container: t.Any, depth: int = 1) -> None:
+        """
+        Record contents of a ``dict``, ``list`` or ``set``,
+        rollback restores it in place.
+
+        Args:
+            container (t.Any): container going to be changed.
+            depth (int, optional): nesting levels to be copied. Defaults to 1.
+        """
+        saved = duplicate(container, depth)
+        self.journal(lambda: _restore(container, saved))
+
+    def record_plugin(self, plugin: 'Plugin') -> None:
+        """
+        Record status, prepared static files and compiled handlers of plugin.
+
+        Args:
+            plugin (Plugin): plugin going to be operated.
+        """
+        status: states.PluginStatus = plugin.status.value
+        static, handlers = plugin._static, plugin._handlers
+        self.journal(lambda: plugin.status.restore(status))
+        self.journal(lambda: setattr(plugin, '_static', static))
+        self.journal(lambda: setattr(plugin, '_handlers', handlers))
+        self.record(plugin._endpoints)
+
+    def rollback(self) -> None:
+        """Execute all undo functions in reverse order, then clear log."""
+        while self._undo:
+            self._undo.pop()()
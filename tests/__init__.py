@@ -58,6 +58,22 @@ def suite() -> unittest.TestSuite:
     from . import test_plugin
     from . import test_utils
     from . import test_config
+    from . import test_static
+    from . import test_dispatch
+    from . import test_routing
+    from . import test_dependencies
+    from . import test_isolation
+    from . import test_bundle
+    from . import test_bytecode
+    from . import test_api
+    from . import test_events
+    from . import test_cli
+    from . import test_registry
+    from . import test_resources
+    from . import test_warmup
+    from . import test_canary
+    from . import test_tracing
+    from . import test_profiling
 
     testcases = [
         test_utils.TestUtils,
@@ -67,7 +83,23 @@ def suite() -> unittest.TestSuite:
         test_manager.TestManagerApp,
         test_manager.TestInvalidImportManagerApp,
         test_manager.TestNonExistDirectoryManagerApp,
-        test_plugin.TestPluginApp
+        test_plugin.TestPluginApp,
+        test_static.TestStaticFiles,
+        test_dispatch.TestDispatch,
+        test_routing.TestRouting,
+        test_dependencies.TestDependencies,
+        test_isolation.TestIsolation,
+        test_bundle.TestBundle,
+        test_bytecode.TestBytecode,
+        test_api.TestApi,
+        test_events.TestEvents,
+        test_cli.TestCli,
+        test_registry.TestRegistry,
+        test_resources.TestResources,
+        test_warmup.TestWarmup,
+        test_canary.TestCanary,
+        test_tracing.TestTracing,
+        test_profiling.TestProfiling
     ]
 
     loader = SequentialTestLoader()
@@ -18,3 +18,61 @@ class InvalidPluginImportConfig(BaseDevelopmentConfig):
 
 class NonExistDirectoryConfig(BaseDevelopmentConfig):
     PLUGINS_DIRECTORY = 'non_exist_plugin_directory'
+
+
+class AsyncSignalConfig(BaseDevelopmentConfig):
+    PLUGINS_SIGNAL_DISPATCH = 'async'
+
+
+class DependencyConfig(BaseDevelopmentConfig):
+    PLUGINS_DIRECTORY = 'dependency_plugins'
+
+
+class IsolatedConfig(BaseDevelopmentConfig):
+    PLUGINS_ISOLATED = ['hello']
+
+
+class BundleConfig(BaseDevelopmentConfig):
+    PLUGINS_DIRECTORY = 'bundle_plugins'
+    PLUGINS_STATIC_CACHE_SIZE = 0
+
+
+class BytecodeConfig(BaseDevelopmentConfig):
+    PLUGINS_DIRECTORY = 'bytecode_plugins'
+    PLUGINS_PYCACHE_PREFIX = 'bytecode_cache'
+    PLUGINS_PRECOMPILE = True
+
+
+class ApiConfig(BaseDevelopmentConfig):
+    PLUGINS_API = True
+
+
+class SharedConfig(BaseDevelopmentConfig):
+    PLUGINS_SHARED_REGISTRY = True
+
+
+class SharedExtensionsConfig(SharedConfig):
+    PLUGINS_BLUEPRINT = 'extensions'
+
+
+class WarmupConfig(BaseDevelopmentConfig):
+    PLUGINS_WARMUP_TIMEOUT = 0.5
+
+
+class EvictionConfig(BaseDevelopmentConfig):
+    PLUGINS_MEMORY_BUDGET = 1
+
+
+class CanaryConfig(BaseDevelopmentConfig):
+    PLUGINS_DIRECTORY = 'canary_plugins'
+
+
+class TracingConfig(BaseDevelopmentConfig):
+    PLUGINS_TRACE_SINK = 'memory'
+
+
+class ProfilingConfig(BaseDevelopmentConfig):
+    PLUGINS_API = True
+    PLUGINS_SLOW_REQUEST_THRESHOLD = 0.05
+    PLUGINS_PROFILE_INTERVAL = 0.002
+    PLUGINS_PROFILES_SIZE = 2
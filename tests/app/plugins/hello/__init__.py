@@ -1,5 +1,5 @@
 from src import Plugin
-from flask import redirect, url_for, render_template, abort
+from flask import redirect, url_for, render_template, abort, request
 
 plugin = Plugin(
     static_folder='static',
@@ -22,6 +22,11 @@ def static_file():
     return plugin.send_static_file('file.txt')
 
 
+@plugin.route('/environ', methods=['GET'])
+def environ():
+    return f'{request.scheme} {request.remote_addr}'
+
+
 @plugin.route('/403', methods=['GET'])
 def test_forbidden():
     abort(403)
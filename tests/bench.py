@@ -0,0 +1,195 @@
+"""
+Benchmarks for hot paths of plugin manager.
+
+Generate N synthetic plugins with :py:func:`tests.create_empty_plugin` and measure
+scanning, finding, lifecycle operations and request throughput, results are
+dumped as JSON so runs before and after a change can be compared:
+
+    python -m tests.bench --sizes 10 100 1000 --output before.json
+    python -m tests.bench --sizes 10 100 1000 --baseline before.json
+"""
+
+import argparse
+import json
+from importlib import metadata
+import os
+import platform
+import random
+import sys
+import time
+import typing as t
+
+from flask import Flask
+
+from src import PluginManager, __version__, utils
+
+from . import create_empty_plugin, workdir
+
+BenchDirectory = 'benchmark'
+"""Directory inside ``tests/app`` storing generated plugins."""
+
+PluginCode = '''from src import Plugin
+plugin = Plugin()
+
+
+@plugin.route('/', methods=['GET'])
+def index():
+    return plugin.domain
+'''
+
+
+def create_plugins(count: int) -> t.List[str]:
+    """Create ``count`` synthetic plugins, return their domains."""
+    os.makedirs(os.path.join(workdir, 'app', BenchDirectory), exist_ok=True)
+    domains = []
+    for index in range(count):
+        domain = f'bench{index:04d}'
+        create_empty_plugin(domain, {
+            'id': domain,
+            'domain': domain,
+            'plugin': {
+                'name': domain,
+                'author': 'bench',
+                'summary': 'benchmark plugin.'
+            },
+            'releases': []
+        }, casesdir=os.path.join('app', BenchDirectory), code=PluginCode)
+        domains.append(domain)
+    return domains
+
+
+def create_app() -> Flask:
+    app = Flask('tests.app', root_path=os.path.join(workdir, 'app'))
+    app.config.update(
+        TESTING=True,
+        PLUGINS_DIRECTORY=BenchDirectory,
+        PLUGINS_EXCLUDES_DIRECTORY=['__pycache__']
+    )
+    app.logger.disabled = True
+    PluginManager(app)
+    return app
+
+
+def timeit(function: t.Callable[[], t.Any], repeat: int = 1) -> t.Dict[str, float]:
+    """Run ``function`` for ``repeat`` times, return best and mean seconds."""
+    costs = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        function()
+        costs.append(time.perf_counter() - began)
+    return {'best': min(costs), 'mean': sum(costs) / len(costs)}
+
+
+def bench(count: int, repeat: int, requests: int) -> t.Dict[str, t.Any]:
+    """Measure all hot paths with ``count`` plugins installed."""
+    domains = create_plugins(count)
+    app = create_app()
+    manager: PluginManager = app.plugin_manager  # type: ignore
+    result: t.Dict[str, t.Any] = {'plugins': count}
+
+    # Scanning imports all unloaded plugins
+    result['scan'] = timeit(lambda: list(manager.scan()), repeat)
+
+    # Lifecycle operations one by one
+    plugins = list(manager.scan())
+    operations = {}
+    for operation in ('load', 'start', 'stop', 'unload'):
+        control = getattr(manager, operation)
+        cost = timeit(lambda: [control(plugin) for plugin in plugins])['best']
+        operations[operation] = count / cost
+    result['ops_per_second'] = operations
+
+    # Batched lifecycle operations
+    plugins = list(manager.scan())
+    operations = {}
+    for operation in ('load', 'start', 'stop', 'unload'):
+        control = getattr(manager, operation + '_many')
+        cost = timeit(lambda: control(plugins))['best']
+        operations[operation] = count / cost
+    result['batched_ops_per_second'] = operations
+
+    # Finding plugin with all plugins loaded
+    plugins = list(manager.scan())
+    manager.load_many(plugins)
+    manager.start_many(plugins)
+    target = domains[-1]
+    cost = timeit(lambda: [manager.find(domain=target) for _ in range(100)], repeat)
+    result['find_latency'] = {key: value / 100 for key, value in cost.items()}
+
+    # Request throughput through plugin blueprint
+    client = app.test_client()
+    urls = [f'/plugins/{random.choice(domains)}/' for _ in range(requests)]
+
+    def _requests() -> None:
+        for url in urls:
+            response = client.get(url)
+            assert response.status_code == 200, url
+    cost = timeit(_requests)['best']
+    result['requests_per_second'] = requests / cost
+
+    manager.stop_many(plugins)
+    manager.unload_many(plugins)
+    return result
+
+
+def compare(results: t.List[t.Dict], baseline: t.List[t.Dict]) -> None:
+    """Print ratio of current results to baseline, >1 means faster for rates."""
+    baselines = {item['plugins']: item for item in baseline}
+    for result in results:
+        base = baselines.get(result['plugins'])
+        if base is None:
+            continue
+        print(f"plugins: {result['plugins']}")
+        for key in ('scan', 'find_latency'):
+            print(f"  {key}: {base[key]['best'] / result[key]['best']:.2f}x")
+        for key in ('ops_per_second', 'batched_ops_per_second'):
+            for operation, rate in result[key].items():
+                print(f"  {key}.{operation}: {rate / base[key][operation]:.2f}x")
+        rate = result['requests_per_second'] / base['requests_per_second']
+        print(f'  requests_per_second: {rate:.2f}x')
+
+
+def run() -> None:
+    parser = argparse.ArgumentParser(description='benchmark plugin manager')
+    parser.add_argument(
+        '--sizes', help='numbers of plugins, defaults to 10 100 1000',
+        default=[10, 100, 1000], type=int, nargs='+')
+    parser.add_argument(
+        '--repeat', help='repeat times of each measure, defaults to 3', default=3, type=int)
+    parser.add_argument(
+        '--requests', help='requests sent for throughput, defaults to 1000',
+        default=1000, type=int)
+    parser.add_argument('--output', help='dump results into JSON file, defaults to stdout')
+    parser.add_argument('--baseline', help='compare with results of a previous run')
+    args = parser.parse_args()
+
+    results = []
+    casesdir = os.path.join(workdir, 'app', BenchDirectory)
+    try:
+        for size in args.sizes:
+            results.append(bench(size, args.repeat, args.requests))
+            utils.rmdir(casesdir)
+    finally:
+        if os.path.isdir(casesdir):
+            utils.rmdir(casesdir)
+
+    report = {
+        'version': __version__,
+        'python': platform.python_version(),
+        'flask': metadata.version('flask'),
+        'timestamp': time.time(),
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w') as handler:
+            json.dump(report, handler, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if args.baseline:
+        with open(args.baseline) as handler:
+            compare(results, json.load(handler)['results'])
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,197 @@
+"""
+Concurrency stress harness for lifecycle churn under live traffic.
+
+Requests are sent concurrently through Flask test clients in a thread pool,
+while another thread keeps stopping and starting (optionally also unloading
+and loading) part of the plugins. Every plugin renders a template containing
+its own domain, so a response rendered with template of another plugin is
+detected as a wrong render:
+
+    python -m tests.stress --plugins 20 --threads 8 --duration 5
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import typing as t
+from concurrent import futures
+
+from src import PluginManager, states, utils
+
+from . import workdir
+from .bench import BenchDirectory, create_app, create_plugins
+
+PluginCode = '''from src import Plugin
+from flask import render_template
+
+plugin = Plugin(template_folder='templates')
+
+
+@plugin.route('/', methods=['GET'])
+def index():
+    return render_template('index.html')
+'''
+
+
+def create_template_plugins(count: int) -> t.List[str]:
+    """Create plugins rendering a template with their own domain."""
+    domains = create_plugins(count)
+    for domain in domains:
+        casedir = os.path.join(workdir, 'app', BenchDirectory, domain)
+        with open(os.path.join(casedir, '__init__.py'), 'w') as handler:
+            handler.write(PluginCode)
+        os.makedirs(os.path.join(casedir, 'templates'), exist_ok=True)
+        with open(os.path.join(casedir, 'templates', 'index.html'), 'w') as handler:
+            handler.write(domain)
+    return domains
+
+
+def percentile(values: t.List[float], percent: float) -> float:
+    if not values:
+        return 0.
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def stress(
+    count: int, threads: int, duration: float,
+    churn_ratio: float, unload: bool
+) -> t.Dict[str, t.Any]:
+    """Send requests for ``duration`` seconds while churning plugins states."""
+    domains = create_template_plugins(count)
+    app = create_app()
+    manager: PluginManager = app.plugin_manager  # type: ignore
+    plugins = list(manager.scan())
+    manager.load_many(plugins)
+    manager.start_many(plugins)
+    churned = {
+        plugin.domain: plugin for plugin in plugins[:max(1, int(count * churn_ratio))]
+    }
+
+    finished = threading.Event()
+    operations: t.List[str] = []
+    failures: t.List[str] = []
+
+    def _churn() -> None:
+        while not finished.is_set():
+            for domain, plugin in list(churned.items()):
+                try:
+                    if plugin.status.allow('stop'):
+                        manager.stop(plugin)
+                        operations.append('stop')
+                    if unload and plugin.status.allow('unload'):
+                        manager.unload(plugin)
+                        operations.append('unload')
+                    if plugin.status.value == states.PluginStatus.Unloaded:
+                        plugin = manager.find(domain=domain)
+                        assert plugin, domain
+                        churned[domain] = plugin
+                        manager.load(plugin)
+                        operations.append('load')
+                    manager.start(plugin)
+                    operations.append('start')
+                except Exception as error:
+                    failures.append(f'{domain}: {error!r}')
+
+    def _request() -> t.Dict[str, t.Any]:
+        client = app.test_client()
+        latencies: t.List[float] = []
+        codes: t.Dict[str, int] = {}
+        wrong, stable_errors = 0, 0
+        while not finished.is_set():
+            domain = random.choice(domains)
+            began = time.perf_counter()
+            try:
+                response = client.get(f'/plugins/{domain}/')
+                code, data = response.status_code, response.data
+            except Exception:
+                # Testing app propagates exceptions instead of responding 500
+                code, data = 500, b''
+            latencies.append(time.perf_counter() - began)
+            codes[str(code)] = codes.get(str(code), 0) + 1
+            if code == 200 and data.decode() != domain:
+                wrong += 1
+            if code != 200 and domain not in churned:
+                stable_errors += 1
+        return {
+            'latencies': latencies, 'codes': codes,
+            'wrong': wrong, 'stable_errors': stable_errors
+        }
+
+    churner = threading.Thread(target=_churn, name='plugin-churn', daemon=True)
+    with futures.ThreadPoolExecutor(max_workers=threads) as executor:
+        tasks = [executor.submit(_request) for _ in range(threads)]
+        churner.start()
+        finished.wait(duration)
+        finished.set()
+        reports = [task.result() for task in tasks]
+    churner.join()
+
+    latencies = [value for report in reports for value in report['latencies']]
+    codes: t.Dict[str, int] = {}
+    for report in reports:
+        for code, number in report['codes'].items():
+            codes[code] = codes.get(code, 0) + number
+    total = max(1, len(latencies))
+    return {
+        'plugins': count,
+        'threads': threads,
+        'churned': len(churned),
+        'requests': len(latencies),
+        'requests_per_second': len(latencies) / duration,
+        'lifecycle_ops_per_second': len(operations) / duration,
+        'latency_p50': percentile(latencies, 50),
+        'latency_p99': percentile(latencies, 99),
+        'status_codes': codes,
+        'rate_404': codes.get('404', 0) / total,
+        'rate_500': codes.get('500', 0) / total,
+        'wrong_renders': sum(report['wrong'] for report in reports),
+        'stable_plugin_errors': sum(report['stable_errors'] for report in reports),
+        'lifecycle_failures': len(failures),
+        'lifecycle_failure_samples': sorted(set(failures))[:10]
+    }
+
+
+def run() -> None:
+    parser = argparse.ArgumentParser(description='stress plugin lifecycle under traffic')
+    parser.add_argument(
+        '--plugins', help='number of plugins, defaults to 20', default=20, type=int)
+    parser.add_argument(
+        '--threads', help='request threads, defaults to 8', default=8, type=int)
+    parser.add_argument(
+        '--duration', help='seconds to run, defaults to 5', default=5., type=float)
+    parser.add_argument(
+        '--churn', help='ratio of churned plugins, defaults to 0.25', default=.25, type=float)
+    parser.add_argument(
+        '--unload', help='also unload and load churned plugins', action='store_true')
+    parser.add_argument('--output', help='dump report into JSON file, defaults to stdout')
+    parser.add_argument(
+        '--strict', help='exit with 1 when any wrong render, 500 or failure found',
+        action='store_true')
+    args = parser.parse_args()
+
+    casesdir = os.path.join(workdir, 'app', BenchDirectory)
+    try:
+        report = stress(args.plugins, args.threads, args.duration, args.churn, args.unload)
+    finally:
+        if os.path.isdir(casesdir):
+            utils.rmdir(casesdir)
+    if args.output:
+        with open(args.output, 'w') as handler:
+            json.dump(report, handler, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if args.strict and any((
+        report['wrong_renders'], report['rate_500'],
+        report['stable_plugin_errors'], report['lifecycle_failures']
+    )):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    run()
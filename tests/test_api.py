@@ -0,0 +1,91 @@
+import unittest
+from unittest import mock
+
+from src import PluginManager
+
+from .app import init_app
+
+
+class TestApi(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.app = init_app('ApiConfig')
+        self.client = self.app.test_client()
+        self.manager: PluginManager = self.app.plugin_manager  # type: ignore
+
+    def test_api_disabled(self) -> None:
+        app = init_app('BaseDevelopmentConfig')
+        self.assertEqual(app.test_client().get('/plugins/.status').status_code, 404)
+
+    def test_status(self) -> None:
+        response = self.client.get('/plugins/.status')
+        self.assertEqual(response.status_code, 200)
+        domains = [plugin['domain'] for plugin in response.json['plugins']]
+        self.assertListEqual(domains, sorted(domains))
+        self.assertEqual(response.json['total'], len(domains))
+        self.assertSetEqual(
+            set(domains), set(plugin.domain for plugin in self.manager.plugins))
+        self.assertEqual(response.headers['Cache-Control'], 'no-cache')
+
+    def test_fields_filter_and_pagination(self) -> None:
+        hello = self.manager.find(domain='hello')
+        assert hello
+        self.manager.load(hello)
+        self.manager.start(hello)
+        response = self.client.get('/plugins/.status?status=running&fields=domain,status')
+        self.assertDictEqual(response.json, {
+            'total': 1, 'page': 1, 'per_page': 50,
+            'plugins': [{'domain': 'hello', 'status': 'Running'}]
+        })
+
+        response = self.client.get('/plugins/.status?domain=hello,goodbye&fields=id&per_page=1')
+        self.assertEqual(response.json['total'], 2)
+        self.assertListEqual(response.json['plugins'], [{'id': 'goodbye'}])
+        response = self.client.get('/plugins/.status?domain=hello,goodbye&fields=id&per_page=1&page=2')
+        self.assertListEqual(response.json['plugins'], [{'id': 'hello'}])
+        response = self.client.get('/plugins/.status?domain=hello&page=3')
+        self.assertListEqual(response.json['plugins'], [])
+
+    def test_bad_request(self) -> None:
+        for query in ('fields=secret', 'status=paused', 'page=0', 'per_page=1000', 'page=one'):
+            self.assertEqual(self.client.get(f'/plugins/.status?{query}').status_code, 400)
+
+    def test_etag_follows_state_version(self) -> None:
+        response = self.client.get('/plugins/.status')
+        etag = response.headers['ETag']
+        version = self.manager.state_version
+        catalog = self.manager.catalog()
+        self.assertIs(self.manager.catalog(), catalog)
+
+        cached = self.client.get('/plugins/.status', headers={'If-None-Match': etag})
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.headers['ETag'], etag)
+        other = self.client.get('/plugins/.status?fields=id')
+        self.assertNotEqual(other.headers['ETag'], etag)
+
+        hello = self.manager.find(domain='hello')
+        assert hello
+        self.manager.load(hello)
+        self.assertGreater(self.manager.state_version, version)
+        self.assertIsNot(self.manager.catalog(), catalog)
+        response = self.client.get('/plugins/.status', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+        # Same state produces same tag in another application
+        app = init_app('ApiConfig')
+        self.assertEqual(app.test_client().get('/plugins/.status').headers['ETag'], etag)
+
+    def test_status_never_imports_plugins(self) -> None:
+        with mock.patch.object(self.manager, '_import') as imported:
+            response = self.client.get('/plugins/.status?domain=hello&fields=id,status')
+            self.client.get('/plugins/.status')
+        imported.assert_not_called()
+        self.assertListEqual(response.json['plugins'], [{'id': 'hello', 'status': 'Unloaded'}])
+
+    def test_deferred_plugins(self) -> None:
+        self.manager.defer(['goodbye'])
+        response = self.client.get('/plugins/.status?domain=goodbye&fields=id,status,deferred')
+        self.assertListEqual(response.json['plugins'], [
+            {'id': 'goodbye', 'status': 'Unloaded', 'deferred': True}
+        ])
@@ -0,0 +1,98 @@
+import os
+import sys
+import unittest
+import zipfile
+
+from src import PluginManager, utils
+from src.bundle import BundleLoader, close_bundle, open_bundle
+
+from . import workdir
+from .app import init_app
+
+CasesDirectory = os.path.join('app', 'bundle_plugins')
+
+
+def create_bundle(basedir: str, source: str) -> str:
+    """Pack plugin directory ``source`` as bundle ``basedir.zip``."""
+    archive = os.path.join(workdir, CasesDirectory, basedir + '.zip')
+    with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as bundle:
+        for root, dirs, files in os.walk(source):
+            dirs[:] = [name for name in dirs if name != '__pycache__']
+            for name in files:
+                path = os.path.join(root, name)
+                bundle.write(path, os.path.join(basedir, os.path.relpath(path, source)))
+    return archive
+
+
+class TestBundle(unittest.TestCase):
+
+    def setUp(self) -> None:
+        os.makedirs(os.path.join(workdir, CasesDirectory), exist_ok=True)
+        self.archive = create_bundle(
+            'hello', os.path.join(workdir, 'app', 'plugins', 'hello'))
+        self.app = init_app('BundleConfig')
+        self.client = self.app.test_client()
+        self.manager: PluginManager = self.app.plugin_manager  # type: ignore
+
+    def tearDown(self) -> None:
+        self.manager.shutdown()
+        close_bundle(self.archive)
+        utils.rmdir(os.path.join(workdir, CasesDirectory))
+
+    def test_read_bundle(self) -> None:
+        bundle = open_bundle(os.path.join(self.archive, 'hello', 'static'))
+        assert bundle
+        self.assertIs(open_bundle(self.archive), bundle)
+        self.assertIsNone(open_bundle(workdir))
+        self.assertEqual(bundle.member(os.path.join(self.archive, 'hello')), 'hello')
+        self.assertTrue(bundle.isdir('hello/templates'))
+        self.assertTrue(bundle.isfile('hello/plugin.json'))
+        self.assertEqual(bundle.read('hello/static/file.txt'), b'HELLO!')
+        self.assertListEqual(list(bundle.walk('hello/static')), ['file.txt'])
+        self.assertRaises(FileNotFoundError, bundle.read, 'hello/missing')
+        self.assertRaises(ValueError, bundle.member, workdir)
+
+    def test_scan_bundle(self) -> None:
+        plugins = list(self.manager.scan())
+        self.assertEqual(len(plugins), 1)
+        hello = plugins[0]
+        self.assertEqual(hello.basedir, 'hello')
+        self.assertEqual(hello.root_path, os.path.join(self.archive, 'hello'))
+        assert hello.bundle
+        self.assertEqual(hello.bundle.archive, self.archive)
+        self.assertIsInstance(hello.jinja_loader, BundleLoader)
+        self.assertListEqual(hello.jinja_loader.list_templates(), ['index.html'])
+
+    def test_bundle_lifecycle(self) -> None:
+        self.manager.boot()
+        hello = self.manager.find(domain='hello')
+        assert hello
+        self.assertEqual(self.client.get('/plugins/hello/Doge').data, b'HELLO Doge!')
+        self.assertEqual(self.client.get('/plugins/hello/staticfile').data, b'HELLO!')
+        response = self.client.get('/plugins/hello/static/file.txt')
+        self.assertEqual(response.data, b'HELLO!')
+        self.assertIn('ETag', response.headers)
+        self.assertEqual(self.client.get('/plugins/hello/static/missing').status_code, 404)
+
+        self.manager.shutdown()
+        self.assertFalse(any(
+            name.endswith('bundle_plugins.hello') for name in sys.modules))
+        self.assertIsNot(open_bundle(self.archive), hello.bundle)
+
+    def test_defer_bundle(self) -> None:
+        self.assertListEqual(self.manager.defer(), ['hello'])
+        self.assertEqual(self.client.get('/plugins/hello/admin').data, b'HELLO admin!')
+        self.assertListEqual(self.manager.deferred, [])
+
+    def test_directory_shadows_bundle(self) -> None:
+        directory = os.path.join(workdir, CasesDirectory, 'hello')
+        os.makedirs(directory)
+        with open(os.path.join(workdir, 'app', 'plugins', 'hello', 'plugin.json')) as handler:
+            config = handler.read()
+        with open(os.path.join(directory, 'plugin.json'), 'w') as handler:
+            handler.write(config)
+        with open(os.path.join(directory, '__init__.py'), 'w') as handler:
+            handler.write('from src import Plugin\nplugin = Plugin()')
+        plugins = list(self.manager.scan())
+        self.assertEqual(len(plugins), 1)
+        self.assertIsNone(plugins[0].bundle)
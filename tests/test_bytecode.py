@@ -0,0 +1,133 @@
+import os
+import sys
+import unittest
+
+from src import PluginManager, utils
+from src.bytecode import (
+    PluginLoader, cache_from_source, compile_directory, finder, is_stale, scope
+)
+
+from . import create_empty_plugin, workdir
+from .app import init_app
+
+CasesDirectory = os.path.join('app', 'bytecode_plugins')
+CacheDirectory = os.path.join('app', 'bytecode_cache')
+
+
+class TestBytecode(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.pycache_prefix = sys.pycache_prefix
+        self.prefix = os.path.join(workdir, CacheDirectory)
+        os.makedirs(os.path.join(workdir, CasesDirectory), exist_ok=True)
+        self.app = init_app('BytecodeConfig')
+        self.manager: PluginManager = self.app.plugin_manager  # type: ignore
+
+    def tearDown(self) -> None:
+        sys.pycache_prefix = self.pycache_prefix
+        utils.rmdir(os.path.join(workdir, CasesDirectory))
+        utils.rmdir(os.path.join(workdir, CacheDirectory))
+
+    def create_plugin(self, id_: str, code: str = 'from src import Plugin\nplugin = Plugin()') -> str:
+        return create_empty_plugin(id_, {
+            'id': id_,
+            'domain': id_,
+            'plugin': {
+                'name': id_,
+                'author': 'test',
+                'summary': 'test.'
+            },
+            'releases': []
+        }, casesdir=CasesDirectory, code=code)
+
+    def test_precompile_on_discovery(self) -> None:
+        directory = self.create_plugin(
+            'alpha', code='from src import Plugin\nfrom . import views\nplugin = Plugin()')
+        with open(os.path.join(directory, 'views.py'), 'w') as handler:
+            handler.write('index = None\n')
+        self.assertIn('alpha', self.manager.stale_bytecode())
+        with self.assertLogs(self.app.logger, 'INFO') as logs:
+            self.assertEqual([plugin.id_ for plugin in self.manager.scan()], ['alpha'])
+        self.assertIn('compiled plugin: alpha', '\n'.join(logs.output))
+
+        # Cached inside prefix only for plugin modules, process prefix untouched
+        self.assertEqual(sys.pycache_prefix, self.pycache_prefix)
+        for name in ('__init__.py', 'views.py'):
+            cached = cache_from_source(os.path.join(directory, name), self.prefix)
+            self.assertTrue(cached.startswith(self.prefix))
+            with open(cached, 'rb') as handler:
+                self.assertEqual(int.from_bytes(handler.read(8)[4:], 'little'), 0b11)
+        self.assertFalse(os.path.exists(os.path.join(directory, '__pycache__')))
+        self.assertDictEqual(self.manager.stale_bytecode(), {})
+
+        # Sources changed later are compiled by loader, not by scanning again
+        with open(os.path.join(directory, '__init__.py'), 'a') as handler:
+            handler.write('\nchanged = True\n')
+        with self.assertLogs(self.app.logger, 'INFO') as logs:
+            self.assertEqual([plugin.id_ for plugin in self.manager.scan()], ['alpha'])
+        self.assertNotIn('compiled plugin', '\n'.join(logs.output))
+        if not sys.dont_write_bytecode:
+            self.assertDictEqual(self.manager.stale_bytecode(), {})
+
+    def test_stale_with_same_mtime(self) -> None:
+        directory = self.create_plugin('alpha')
+        source = os.path.join(directory, '__init__.py')
+        self.assertDictEqual(self.manager.precompile(), {})
+        self.assertFalse(is_stale(source, self.prefix))
+
+        stat = os.stat(source)
+        with open(source, 'a') as handler:
+            handler.write('\nchanged = True\n')
+        os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertDictEqual(self.manager.stale_bytecode(), {'alpha': [source]})
+        self.manager.precompile(['alpha'])
+        self.assertDictEqual(self.manager.stale_bytecode(), {})
+
+    def test_timestamp_invalidation(self) -> None:
+        directory = self.create_plugin('alpha')
+        source = os.path.join(directory, '__init__.py')
+        compiled, errors = compile_directory(directory, 'timestamp', prefix=self.prefix)
+        self.assertListEqual(compiled, [source])
+        self.assertListEqual(errors, [])
+        self.assertFalse(is_stale(source, self.prefix))
+        self.assertListEqual(compile_directory(directory, 'timestamp', prefix=self.prefix)[0], [])
+        self.assertRaises(ValueError, compile_directory, directory, 'unknown')
+
+    def test_report_syntax_error(self) -> None:
+        self.create_plugin('alpha')
+        self.create_plugin('broken', code='def broken(:\n')
+        failed = self.manager.precompile()
+        self.assertListEqual(list(failed), ['broken'])
+        self.assertIn('SyntaxError', str(failed['broken'][0]))
+
+    def test_corrupt_bytecode_recompiled(self) -> None:
+        directory = self.create_plugin('alpha', code='value = 1\n')
+        source = os.path.join(directory, '__init__.py')
+        self.manager.precompile(['alpha'])
+        cached = cache_from_source(source, self.prefix)
+        with open(cached, 'rb') as handler:
+            data = handler.read()
+        with open(cached, 'wb') as handler:
+            handler.write(data[:20])
+        loader = PluginLoader('alpha', source, self.prefix, 'unchecked-hash')
+        namespace: dict = {}
+        exec(loader.get_code('alpha'), namespace)
+        self.assertEqual(namespace['value'], 1)
+        if not sys.dont_write_bytecode:
+            with open(cached, 'rb') as handler:
+                self.assertEqual(handler.read(), data)
+
+    def test_scope_keyed_by_directory(self) -> None:
+        os.makedirs(self.prefix, exist_ok=True)
+        other = os.path.join(workdir, 'app', 'other_plugins')
+        scope(other, self.manager._package(), os.path.join(workdir, 'other_cache'))
+        try:
+            scopes = {
+                directory: prefix for directory, (_package, prefix, _mode)
+                in finder.directories.items()
+            }
+            self.assertEqual(scopes[os.path.abspath(self.manager.basedir)], self.prefix)
+            self.assertEqual(scopes[other], os.path.join(workdir, 'other_cache'))
+        finally:
+            scope(other, self.manager._package(), None)
+        self.assertNotIn(other, finder.directories)
@@ -0,0 +1,121 @@
+import os
+import shutil
+import unittest
+
+from src import Plugin, PluginManager, utils
+from src.canary import Canary, CanarySuffix, VersionMetrics
+
+from . import workdir
+from .app import init_app
+
+CasesDirectory = os.path.join('app', 'canary_plugins')
+
+Release = '''
+
+@plugin.route('/version/current', methods=['GET'])
+def version():
+    return 'v2'
+
+
+plugin.add_warmup_url('/version/current')
+'''
+
+
+class TestCanary(unittest.TestCase):
+
+    def setUp(self) -> None:
+        source = os.path.join(workdir, 'app', 'plugins', 'hello')
+        ignore = shutil.ignore_patterns('__pycache__')
+        shutil.copytree(source, os.path.join(workdir, CasesDirectory, 'hello'), ignore=ignore)
+        shutil.copytree(source, os.path.join(workdir, CasesDirectory, 'hello-v2'), ignore=ignore)
+        with open(os.path.join(workdir, CasesDirectory, 'hello-v2', '__init__.py'), 'a') as f:
+            f.write(Release)
+        self.app = init_app('CanaryConfig')
+        self.client = self.app.test_client()
+        self.manager: PluginManager = self.app.plugin_manager  # type: ignore
+        self.stable = self.scanned('hello')
+        self.manager.load(self.stable)
+        self.manager.start(self.stable)
+
+    def tearDown(self) -> None:
+        for domain in list(self.manager.canaries):
+            self.manager.rollback(domain)
+        self.manager.shutdown()
+        utils.rmdir(os.path.join(workdir, CasesDirectory))
+
+    def scanned(self, basedir: str) -> Plugin:
+        return next(plugin for plugin in self.manager.scan() if plugin.basedir == basedir)
+
+    def version(self, **kwargs) -> int:
+        return self.client.get('/plugins/hello/version/current', **kwargs).status_code
+
+    def test_split_traffic(self) -> None:
+        release = self.manager.canary(self.scanned('hello-v2'))
+        self.assertIsInstance(release, Canary)
+        self.assertEqual(release.shadow.domain, 'hello' + CanarySuffix)
+        self.assertRaises(RuntimeError, self.manager.canary, self.stable)
+        self.assertEqual(self.version(), 404)
+        self.assertEqual(self.version(headers={'X-Plugin-Canary': '1'}), 200)
+        self.client.set_cookie('plugin-canary', 'canary')
+        self.assertEqual(self.version(), 200)
+        self.assertEqual(self.version(headers={'X-Plugin-Canary': 'stable'}), 404)
+        self.client.delete_cookie('plugin-canary')
+        release.weight = 1
+        self.assertEqual(self.version(), 200)
+        self.assertEqual(self.client.get('/plugins/hello/Doge').data, b'HELLO Doge!')
+        self.assertRaises(ValueError, setattr, release, 'weight', 2)
+        self.assertRaises(
+            ValueError, Canary, release.stable, release.plugin, release.shadow, min_requests=0)
+
+        metrics = release.to_dict()['metrics']
+        self.assertEqual(metrics['stable']['requests'], 2)
+        self.assertEqual(metrics['canary']['requests'], 4)
+        self.assertEqual(metrics['canary']['errors'], 0)
+        self.assertGreater(metrics['canary']['p99'], 0)
+
+        release.weight = 0
+        response = self.client.get('/plugins/hello' + CanarySuffix + '/version/current')
+        self.assertEqual(response.data, b'v2')
+        self.assertEqual(release.metrics['canary'].requests, 5)
+
+    def test_trip_and_rollback(self) -> None:
+        release = self.manager.canary(
+            self.scanned('hello-v2'), weight=1, max_error_rate=0.5, min_requests=2)
+        self.assertEqual(self.client.get('/plugins/hello/endpoints/raise').status_code, 502)
+        self.assertEqual(self.version(), 200)
+        self.assertFalse(release.tripped)
+        self.assertEqual(self.client.get('/plugins/hello/endpoints/raise').status_code, 502)
+        self.assertTrue(release.tripped)
+        self.assertEqual(release.metrics['canary'].errors, 2)
+        self.assertEqual(self.version(headers={'X-Plugin-Canary': '1'}), 404)
+
+        # Shadow domain requested directly is served by stable version once tripped
+        shadow = '/plugins/hello' + CanarySuffix
+        self.assertEqual(self.client.get(shadow + '/version/current').status_code, 404)
+        self.assertEqual(self.client.get(shadow + '/Doge').data, b'HELLO Doge!')
+        self.assertEqual(release.metrics['canary'].requests, 3)
+
+        self.manager.rollback('hello')
+        self.assertDictEqual(self.manager.canaries, {})
+        self.assertIsNone(self.manager.find(domain='hello' + CanarySuffix))
+        self.assertEqual(self.scanned('hello-v2').domain, 'hello')
+        self.assertRaises(RuntimeError, self.manager.rollback, 'hello')
+
+    def test_version_metrics(self) -> None:
+        metrics = VersionMetrics()
+        self.assertFalse(metrics.record(0.1, True, max_error_rate=0.5, min_requests=2))
+        self.assertTrue(metrics.record(0.1, True, max_error_rate=0.5, min_requests=2))
+        self.assertFalse(metrics.record(0.1, False))
+        self.assertEqual(metrics.requests, 3)
+
+    def test_promote(self) -> None:
+        self.manager.canary(self.scanned('hello-v2'))
+        plugin = self.manager.promote('hello')
+        self.assertEqual(plugin.basedir, 'hello-v2')
+        self.assertEqual(plugin.domain, 'hello')
+        self.assertDictEqual(self.manager.canaries, {})
+        self.assertEqual(self.version(), 200)
+        self.assertListEqual(
+            sorted(item.basedir for item in self.manager.scan()), ['hello'])
+        self.assertTrue(self.manager.modules(plugin))
+        self.assertEqual(self.client.get('/plugins/hello/Doge').data, b'HELLO Doge!')
@@ -0,0 +1,138 @@
+import json
+import os
+import tempfile
+import unittest
+import zipfile
+from unittest import mock
+
+from src import PluginManager, utils
+from src.states import PluginStatus
+
+from . import workdir
+from .app import init_app
+from .test_bundle import CasesDirectory, create_bundle
+
+
+class TestCli(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.app = init_app('BaseDevelopmentConfig')
+        self.runner = self.app.test_cli_runner()
+        self.manager: PluginManager = self.app.plugin_manager  # type: ignore
+
+    def tearDown(self) -> None:
+        self.manager.shutdown()
+
+    def invoke(self, *args: str) -> str:
+        result = self.runner.invoke(args=['plugins', *args])
+        self.assertEqual(result.exit_code, 0, result.output)
+        return result.output
+
+    def test_list(self) -> None:
+        output = self.invoke('list')
+        self.assertIn('hello', output)
+        self.assertIn('Unloaded', output)
+        entries = json.loads(self.invoke('list', '--json'))
+        self.assertIn('hello', [entry['domain'] for entry in entries])
+        self.invoke('start', 'hello')
+        self.assertEqual(
+            [entry['domain'] for entry in json.loads(self.invoke('list', '--json', '--status', 'running'))],
+            ['hello'])
+
+    def test_lifecycle(self) -> None:
+        with mock.patch.object(self.manager, '_import', wraps=self.manager._import) as imported:
+            output = self.invoke('start', 'hello')
+        self.assertListEqual(
+            [os.path.basename(call.args[0]) for call in imported.call_args_list], ['hello'])
+        hello = self.manager.find(domain='hello')
+        assert hello
+        self.assertEqual(hello.status.value, PluginStatus.Running)
+        self.assertRegex(output, r'load\s+hello\s+[\d.]+ms')
+        self.assertRegex(output, r'start\s+hello\s+[\d.]+ms')
+        self.assertIn('load', self.manager.timings['hello'])
+        self.assertRegex(self.invoke('start', 'hello'), r'skip\s+hello\s+running')
+        self.assertListEqual([plugin.domain for plugin in self.manager.loaded], ['hello'])
+
+        # Offline tooling never stops plugins
+        for command in ('stop', 'unload'):
+            self.assertNotEqual(self.runner.invoke(args=['plugins', command, 'hello']).exit_code, 0)
+
+        result = self.runner.invoke(args=['plugins', 'start', 'missing'])
+        self.assertNotEqual(result.exit_code, 0)
+        self.assertIn('plugin not found: missing', result.output)
+
+    def test_warmup_and_bench(self) -> None:
+        output = self.invoke('warmup', 'hello', '--url', '/plugins/hello/Doge')
+        self.assertRegex(output, r'200\s+/plugins/hello/Doge')
+        output = self.invoke('bench', '/plugins/hello/Doge', '-n', '5', '--no-boot')
+        self.assertIn('5 requests, 0 failed', output)
+        self.assertIn('p99', output)
+
+    def test_install(self) -> None:
+        directory = os.path.join(workdir, CasesDirectory)
+        os.makedirs(directory, exist_ok=True)
+        self.addCleanup(utils.rmdir, directory)
+        app = init_app('BundleConfig')
+        manager: PluginManager = app.plugin_manager  # type: ignore
+        self.addCleanup(manager.shutdown)
+        runner = app.test_cli_runner()
+        with tempfile.TemporaryDirectory() as temporary:
+            archive = create_bundle('hello', os.path.join(workdir, 'app', 'plugins', 'hello'))
+            source = os.path.join(temporary, 'hello.zip')
+            os.replace(archive, source)
+
+            result = runner.invoke(args=['plugins', 'install', source])
+            self.assertEqual(result.exit_code, 0, result.output)
+            self.assertTrue(os.path.isfile(os.path.join(directory, 'hello', 'plugin.json')))
+            self.assertDictEqual(manager.stale_bytecode(), {})
+
+            result = runner.invoke(args=['plugins', 'install', source, '--bundle'])
+            self.assertNotEqual(result.exit_code, 0)
+            self.assertIn('already installed', result.output)
+            result = runner.invoke(args=['plugins', 'install', source, '--bundle', '--force'])
+            self.assertEqual(result.exit_code, 0, result.output)
+            self.assertFalse(os.path.exists(os.path.join(directory, 'hello')))
+            self.assertTrue(os.path.isfile(os.path.join(directory, 'hello.zip')))
+
+        result = runner.invoke(args=['plugins', 'start', 'hello'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(app.test_client().get('/plugins/hello/Doge').status_code, 200)
+        result = runner.invoke(args=['plugins', 'install', os.path.join(directory, 'hello.zip'), '--force'])
+        self.assertIn('cannot replace loaded plugin', result.output)
+
+    def test_install_crafted_archive(self) -> None:
+        directory = os.path.join(workdir, CasesDirectory)
+        os.makedirs(directory, exist_ok=True)
+        self.addCleanup(utils.rmdir, directory)
+        app = init_app('BundleConfig')
+        manager: PluginManager = app.plugin_manager  # type: ignore
+        self.addCleanup(manager.shutdown)
+        installed = os.path.join(directory, 'goodbye')
+        os.makedirs(installed)
+        with open(os.path.join(workdir, 'app', 'plugins', 'hello', 'plugin.json'), 'rb') as f:
+            manifest = f.read()
+        with tempfile.TemporaryDirectory() as temporary:
+            for top in ('.', '..', '.temp'):
+                source = os.path.join(temporary, 'crafted.zip')
+                with zipfile.ZipFile(source, 'w') as bundle:
+                    bundle.writestr(top + '/plugin.json', manifest)
+                    bundle.writestr(top + '/__init__.py', '')
+                with self.assertRaises(RuntimeError):
+                    manager.install(source, force=True)
+                self.assertTrue(os.path.isdir(installed))
+                self.assertTrue(os.path.isdir(directory))
+            result = app.test_cli_runner().invoke(args=['plugins', 'install', source, '--force'])
+            self.assertIn('invalid plugin directory name', result.output)
+
+            # Broken archives and configs are reported without traceback
+            with open(source, 'wb') as f:
+                f.write(b'not a zip')
+            result = app.test_cli_runner().invoke(args=['plugins', 'install', source])
+            self.assertEqual(result.exit_code, 1)
+            self.assertIn('File is not a zip file', result.output)
+            with zipfile.ZipFile(source, 'w') as bundle:
+                bundle.writestr('invalid/plugin.json', '{"id": 1}')
+                bundle.writestr('invalid/__init__.py', '')
+            result = app.test_cli_runner().invoke(args=['plugins', 'install', source])
+            self.assertEqual(result.exit_code, 1)
+            self.assertIn('invalid plugin config', result.output)
@@ -0,0 +1,141 @@
+import os
+import threading
+import unittest
+
+from src import PluginManager, signals, states, utils
+from src.dependencies import levels, order
+
+from . import create_empty_plugin, workdir
+from .app import init_app
+
+CasesDirectory = os.path.join('app', 'dependency_plugins')
+
+
+class TestDependencies(unittest.TestCase):
+
+    def setUp(self) -> None:
+        os.makedirs(os.path.join(workdir, CasesDirectory), exist_ok=True)
+        self.app = init_app('DependencyConfig')
+        self.manager: PluginManager = self.app.plugin_manager  # type: ignore
+
+    def tearDown(self) -> None:
+        utils.rmdir(os.path.join(workdir, CasesDirectory))
+
+    def create_plugin(self, id_: str, version: str = '1.0.0', **dependencies: str) -> None:
+        create_empty_plugin(id_, {
+            'id': id_,
+            'domain': id_,
+            'version': version,
+            'dependencies': dependencies,
+            'plugin': {
+                'name': id_,
+                'author': 'test',
+                'summary': 'test.'
+            },
+            'releases': []
+        }, casesdir=CasesDirectory)
+
+    def plugins(self):
+        return {plugin.id_: plugin for plugin in self.manager.scan()}
+
+    def test_levels(self) -> None:
+        self.create_plugin('auth')
+        self.create_plugin('blog', auth='>=1.0')
+        self.create_plugin('comment', auth='', blog='')
+        self.create_plugin('static')
+        grouped = [
+            sorted(plugin.id_ for plugin in level)
+            for level in levels(self.plugins().values())
+        ]
+        self.assertListEqual(grouped, [['auth', 'static'], ['blog'], ['comment']])
+
+    def test_cycle(self) -> None:
+        self.create_plugin('auth', blog='')
+        self.create_plugin('blog', auth='')
+        self.create_plugin('comment', blog='')
+        with self.assertRaises(RuntimeError) as context:
+            order(self.plugins().values())
+        self.assertIn('cycle', str(context.exception))
+        self.assertRaises(RuntimeError, self.manager.boot)
+        self.assertListEqual(list(self.manager._loaded), [])
+
+    def test_boot_and_shutdown(self) -> None:
+        self.create_plugin('auth')
+        self.create_plugin('blog', auth='~=1.0')
+        self.create_plugin('comment', blog='')
+        started, stopped = [], []
+
+        def _started(sender, plugin):
+            started.append(plugin.id_)
+
+        def _stopped(sender, plugin):
+            stopped.append(plugin.id_)
+        signals.started.connect(_started)
+        signals.stopped.connect(_stopped)
+        try:
+            self.manager.boot()
+            self.manager.shutdown()
+        finally:
+            signals.started.disconnect(_started)
+            signals.stopped.disconnect(_stopped)
+        self.assertListEqual(started, ['auth', 'blog', 'comment'])
+        self.assertListEqual(stopped, ['comment', 'blog', 'auth'])
+        self.assertListEqual(list(self.manager._loaded), [])
+
+    def test_load_as_soon_as_dependencies_loaded(self) -> None:
+        self.create_plugin('auth')
+        self.create_plugin('blog', auth='')
+        self.create_plugin('slow')
+        plugins = self.plugins()
+        blog_loaded = threading.Event()
+        load_blog, load_slow = plugins['blog'].load, plugins['slow'].load
+
+        def _load_blog(*args, **kwargs):
+            load_blog(*args, **kwargs)
+            blog_loaded.set()
+
+        def _load_slow(*args, **kwargs):
+            # Waiting for a plugin of next level never returns with a barrier per level
+            self.assertTrue(blog_loaded.wait(5))
+            load_slow(*args, **kwargs)
+        plugins['blog'].load, plugins['slow'].load = _load_blog, _load_slow
+        self.manager.boot(plugins.values())
+        self.assertEqual(plugins['slow'].status.value, states.PluginStatus.Running)
+        self.manager.shutdown()
+
+    def test_boot_rejects_duplicated_id(self) -> None:
+        self.create_plugin('auth')
+        self.create_plugin('blog', auth='')
+        plugins = self.plugins()
+        with self.assertRaises(RuntimeError) as context:
+            self.manager.boot([plugins['auth'], plugins['blog'], plugins['auth']])
+        self.assertIn('duplicated plugin id', str(context.exception))
+        self.assertListEqual(list(self.manager._loaded), [])
+
+    def test_missing_or_unsatisfied(self) -> None:
+        self.create_plugin('auth', version='2.1.0')
+        self.create_plugin('blog', auth='<2')
+        self.create_plugin('comment', forum='')
+        plugins = self.plugins()
+        self.assertRaises(RuntimeError, lambda: self.manager.load(plugins['blog']))
+        self.assertRaises(RuntimeError, lambda: self.manager.load(plugins['comment']))
+        self.assertRaises(
+            RuntimeError, lambda: self.manager.load_many([plugins['auth'], plugins['blog']]))
+        self.assertEqual(plugins['auth'].status.value, states.PluginStatus.Unloaded)
+
+    def test_dependents_block_stop_and_unload(self) -> None:
+        self.create_plugin('auth')
+        self.create_plugin('blog', auth='')
+        plugins = self.plugins()
+        self.manager.load_many(plugins.values())
+        self.assertRaises(RuntimeError, lambda: self.manager.start(plugins['blog']))
+        self.manager.start_many([plugins['blog'], plugins['auth']])
+        self.assertRaises(RuntimeError, lambda: self.manager.stop(plugins['auth']))
+        self.manager.stop(plugins['blog'])
+        self.manager.stop(plugins['auth'])
+        self.assertRaises(RuntimeError, lambda: self.manager.unload(plugins['auth']))
+        self.manager.unload_many([plugins['auth'], plugins['blog']])
+
+    def test_invalid_constraint(self) -> None:
+        self.create_plugin('blog', auth='not a constraint')
+        self.assertRaises(ValueError, self.plugins)
@@ -0,0 +1,67 @@
+import threading
+import time
+import unittest
+
+from src import PluginManager, signals
+from src.dispatch import AsyncDispatcher, create_dispatcher
+
+from .app import init_app
+
+
+class TestDispatch(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.app = init_app('AsyncSignalConfig')
+        self.manager: PluginManager = self.app.plugin_manager  # type: ignore
+        self.received = []
+        self.released = threading.Event()
+
+    def _slow_receiver(self, sender, plugin) -> None:
+        self.released.wait(5)
+        self.received.append((plugin.domain, plugin.status.value.name))
+
+    def test_create_dispatcher(self) -> None:
+        self.assertIsInstance(self.manager._dispatcher, AsyncDispatcher)
+        self.assertRaises(ValueError, lambda: create_dispatcher('invalid'))
+        self.assertRaises(ValueError, lambda: AsyncDispatcher(workers=0))
+
+    def test_async_signals_not_blocking(self) -> None:
+        signals.loaded.connect(self._slow_receiver)
+        try:
+            plugins = list(self.manager.plugins)
+            began = time.monotonic()
+            self.manager.load_many(plugins)
+            self.assertLess(time.monotonic() - began, 1)
+            self.assertFalse(self.manager.flush_signals(timeout=0.05))
+            self.released.set()
+            self.assertTrue(self.manager.flush_signals(timeout=5))
+            self.assertSetEqual(
+                set(domain for domain, _ in self.received),
+                set(plugin.domain for plugin in plugins))
+        finally:
+            signals.loaded.disconnect(self._slow_receiver)
+
+    def test_async_signals_ordered_per_plugin(self) -> None:
+        events = []
+
+        def _receiver(name):
+            def _receive(sender, plugin):
+                events.append((plugin.domain, name))
+            return _receive
+        receivers = {name: _receiver(name) for name in ('loaded', 'started', 'stopped')}
+        for name, receiver in receivers.items():
+            getattr(signals, name).connect(receiver)
+        try:
+            plugins = list(self.manager.plugins)
+            self.manager.load_many(plugins)
+            self.manager.start_many(plugins)
+            self.manager.stop_many(plugins)
+            self.manager.flush_signals()
+        finally:
+            for name, receiver in receivers.items():
+                getattr(signals, name).disconnect(receiver)
+        for plugin in plugins:
+            self.assertEqual(
+                [name for domain, name in events if domain == plugin.domain],
+                ['loaded', 'started', 'stopped'])
+        self.manager._dispatcher.close()
@@ -0,0 +1,87 @@
+import threading
+import time
+import unittest
+
+from src import PluginManager, signals
+from src.events import EventLog
+
+from .app import init_app
+
+
+class TestEvents(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.app = init_app('ApiConfig')
+        self.client = self.app.test_client()
+        self.manager: PluginManager = self.app.plugin_manager  # type: ignore
+        self.hello = self.manager.find(domain='hello')
+        assert self.hello
+
+    def test_ring_buffer(self) -> None:
+        log = EventLog(capacity=3)
+        self.assertRaises(ValueError, EventLog, 0)
+        for index in range(5):
+            log.append('plugin-loaded', str(index), str(index), str(index))
+        self.assertEqual(log.last, 5)
+        events, truncated = log.since(0)
+        self.assertListEqual([event.seq for event in events], [3, 4, 5])
+        self.assertTrue(truncated)
+        events, truncated = log.since(3, limit=1)
+        self.assertListEqual([event.seq for event in events], [4])
+        self.assertFalse(truncated)
+        self.assertEqual(log.since(5), ([], False))
+        self.assertEqual(log.since(9), ([], True))
+
+    def test_wait(self) -> None:
+        log = EventLog()
+        self.assertEqual(log.wait(0, 0.01), ([], False))
+        timer = threading.Timer(0.05, log.append, ('plugin-started', 'a', 'a', 'a'))
+        timer.start()
+        began = time.monotonic()
+        events, _ = log.wait(0, 5)
+        self.assertLess(time.monotonic() - began, 5)
+        self.assertEqual(events[0].event, 'plugin-started')
+        timer.join()
+
+    def test_record_lifecycle(self) -> None:
+        self.manager.load(self.hello)
+        self.manager.start(self.hello)
+        self.manager.defer(['goodbye'])
+        events, _ = self.manager.events.since(0)
+        self.assertListEqual(
+            [(event.event, event.domain) for event in events], [
+                (signals.loaded.name, 'hello'),
+                (signals.started.name, 'hello'),
+                ('plugin-deferred', 'goodbye')
+            ])
+        self.assertListEqual([event.seq for event in events], [1, 2, 3])
+
+    def test_long_poll(self) -> None:
+        response = self.client.get('/plugins/.events?timeout=0')
+        self.assertDictEqual(response.json, {'events': [], 'next': 0, 'truncated': False})
+        self.manager.load(self.hello)
+        response = self.client.get('/plugins/.events?since=0')
+        self.assertEqual(response.json['next'], 1)
+        self.assertEqual(response.json['events'][0]['event'], signals.loaded.name)
+
+        timer = threading.Timer(0.05, self.manager.start, (self.hello,))
+        timer.start()
+        response = self.client.get('/plugins/.events?since=1&timeout=5')
+        timer.join()
+        self.assertEqual(response.json['next'], 2)
+        self.assertEqual(response.json['events'][0]['event'], signals.started.name)
+
+        response = self.client.get('/plugins/.events?since=7&timeout=0')
+        self.assertDictEqual(response.json, {'events': [], 'next': 2, 'truncated': True})
+        for query in ('since=-1', 'since=one', 'timeout=-1', 'limit=0'):
+            self.assertEqual(self.client.get(f'/plugins/.events?{query}').status_code, 400)
+
+    def test_server_sent_events(self) -> None:
+        self.manager.load(self.hello)
+        self.manager.start(self.hello)
+        headers = {'Accept': 'text/event-stream', 'Last-Event-ID': '1'}
+        response = self.client.get('/plugins/.events?timeout=0.05', headers=headers)
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        body = response.get_data(as_text=True)
+        self.assertIn(f'id: 2\nevent: {signals.started.name}\n', body)
+        self.assertNotIn('id: 1\n', body)
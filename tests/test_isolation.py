@@ -0,0 +1,123 @@
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+
+from src import PluginManager, states
+from src.isolation import Worker, receive_frame, send_frame
+
+from .app import init_app
+
+
+class TestIsolation(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.app = init_app('IsolatedConfig')
+        self.client = self.app.test_client()
+        self.manager: PluginManager = self.app.plugin_manager  # type: ignore
+
+    def tearDown(self) -> None:
+        self.manager._workers.close()
+
+    def test_frame(self) -> None:
+        left, right = socket.socketpair()
+        with left, right:
+            send_frame(left, {'status': 200}, b'body' * 1024)
+            header, body = receive_frame(right)
+        self.assertDictEqual(header, {'status': 200})
+        self.assertEqual(body, b'body' * 1024)
+
+    def _serve(self, respond: bool, requests: list, closed: threading.Event) -> Worker:
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        address = os.path.join(directory, 'worker.sock')
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(address)
+        server.listen()
+
+        def _accept() -> None:
+            with server:
+                while True:
+                    try:
+                        connection, _address = server.accept()
+                    except OSError:
+                        return
+                    with connection:
+                        try:
+                            header, _body = receive_frame(connection)
+                        except ConnectionError:
+                            continue
+                        requests.append(header)
+                        if respond:
+                            # Respond once, then close as a restarted worker would
+                            send_frame(connection, {'status': 200}, b'OK')
+                        else:
+                            connection.recv(1)
+                    closed.set()
+
+        threading.Thread(target=_accept, daemon=True).start()
+        self.addCleanup(server.close)
+        return Worker(None, address, 2, .2)  # type: ignore
+
+    def test_request_not_retried_after_timeout(self) -> None:
+        requests: list = []
+        worker = self._serve(False, requests, threading.Event())
+        with self.assertRaises(socket.timeout):
+            worker.request({'method': 'POST'}, b'body')
+        self.assertEqual(len(requests), 1)
+
+    def test_stale_connection_replaced(self) -> None:
+        requests: list = []
+        closed = threading.Event()
+        worker = self._serve(True, requests, closed)
+        for _ in range(2):
+            self.assertEqual(worker.request({'method': 'POST'}, b'body'), ({'status': 200}, b'OK'))
+            self.assertTrue(closed.wait(1))
+            closed.clear()
+        self.assertEqual(len(requests), 2)
+        worker.disconnect()
+
+    def test_isolated_plugin_lifecycle(self) -> None:
+        hello = self.manager.find(domain='hello')
+        goodbye = self.manager.find(domain='goodbye')
+        assert hello and goodbye
+        self.assertTrue(self.manager.isolated(hello))
+        self.assertFalse(self.manager.isolated(goodbye))
+        self.manager.load_many([hello, goodbye])
+        self.manager.start_many([hello, goodbye])
+        self.assertIn('hello', self.manager._workers)
+        self.assertNotIn('plugins.hello.index', self.app.view_functions)
+        self.assertEqual(hello.status.value, states.PluginStatus.Running)
+
+        # Requests served by worker, connections reused
+        for _ in range(3):
+            self.assertEqual(self.client.get('/plugins/hello/admin').data, b'HELLO admin!')
+        response = self.client.get('/plugins/hello/doge', follow_redirects=True)
+        self.assertEqual(response.data, b'HELLO Doge!')
+        response = self.client.get('/plugins/hello/403')
+        self.assertEqual((response.status_code, response.data), (403, b'Hello Forbidden!'))
+        self.assertEqual(self.client.get('/plugins/hello/static/file.txt').data, b'HELLO!')
+        self.assertEqual(self.client.get('/plugins/goodbye/admin').data, b'GOODBYE admin!')
+        response = self.client.get(
+            '/plugins/hello/environ', base_url='https://localhost/',
+            environ_base={'REMOTE_ADDR': '10.0.0.1'})
+        self.assertEqual(response.data, b'https 10.0.0.1')
+
+        worker = self.manager._workers._workers['hello']
+        self.manager.stop(hello)
+        self.assertIsNotNone(worker.process.poll())
+        self.assertEqual(self.client.get('/plugins/hello/admin').status_code, 404)
+        self.manager.start(hello)
+        self.assertEqual(self.client.get('/plugins/hello/admin').data, b'HELLO admin!')
+
+        # Crashed worker is spawned again
+        worker = self.manager._workers._workers['hello']
+        worker.process.kill()
+        worker.process.wait()
+        self.assertEqual(self.client.get('/plugins/hello/admin').data, b'HELLO admin!')
+        self.assertIsNot(self.manager._workers._workers['hello'], worker)
+        self.manager.stop_many([hello, goodbye])
+        self.manager.unload_many([hello, goodbye])
+        self.assertNotIn('plugins.hello.__proxy__', self.app.view_functions)
@@ -1,8 +1,12 @@
 
+import gc
+import os
+import sys
 import unittest
+from concurrent import futures
 from os import path
 
-from src import PluginManager, utils
+from src import PluginManager, signals, states, utils
 
 from . import create_empty_plugin
 from .app import init_app
@@ -27,6 +31,13 @@ class TestManagerApp(unittest.TestCase):
             self.assertNotIn(
                 plugin.basedir, self.app.config['PLUGINS_EXCLUDES_DIRECTORY'])
 
+    def test_scan_selected_plugins_by_manifests(self) -> None:
+        manifests = self.manager.manifests()
+        self.assertEqual(manifests['hello'].domain, 'hello')
+        selected = [name for name, manifest in manifests.items() if manifest.id == 'goodbye']
+        plugins = list(self.manager.scan(selected))
+        self.assertListEqual([plugin.basedir for plugin in plugins], ['goodbye'])
+
     def test_no_plugins_loaded(self) -> None:
         all_plugins_name = set(plugin.name for plugin in self.manager.plugins)
         all_scanned_name = set(plugin.name for plugin in self.manager.scan())
@@ -126,6 +137,230 @@ class TestManagerApp(unittest.TestCase):
         self.assertRaises(RuntimeError, self.load_all_plugins)
         utils.rmdir(path.join(self.manager.basedir, dirname))
 
+    def test_batched_lifecycle(self) -> None:
+        plugins = list(self.manager.plugins)
+        self.manager.load_many(plugins)
+        self.manager.start_many(plugins)
+        self.assertEqual(self.client.get('/plugins/hello/admin').data, b'HELLO admin!')
+        self.manager.stop_many(plugins)
+        self.assertEqual(self.client.get('/plugins/hello/admin').status_code, 404)
+        self.manager.unload_many(plugins)
+        for rule in self.app.url_map.iter_rules():
+            self.assertNotIn(self.manager.domain, rule.rule)
+        self.assertEqual(len(list(self.manager.scan())), len(plugins))
+
+    def test_batched_unload_rebuild_url_map_once(self) -> None:
+        plugins = list(self.manager.plugins)
+        self.manager.load_many(plugins)
+        self.manager.start_many(plugins)
+        self.manager.stop_many(plugins)
+        url_map_class, rebuilds = self.app.url_map_class, []
+
+        def _counting_url_map_class(*args, **kwargs):
+            rebuilds.append(None)
+            return url_map_class(*args, **kwargs)
+        self.app.url_map_class = _counting_url_map_class  # type: ignore
+        self.manager.unload_many(plugins)
+        self.assertEqual(len(rebuilds), 1)
+
+    def test_batched_load_validate_before_applying(self) -> None:
+        plugins = list(self.manager.plugins)
+        self.assertRaises(RuntimeError, lambda: self.manager.load_many(plugins + plugins[:1]))
+        self.assertEqual(len(list(self.manager.scan())), len(plugins))
+
+    def test_failed_start_rollback(self) -> None:
+        plugins = list(self.manager.plugins)
+        self.manager.load_many(plugins)
+        hello = self.manager.find(domain='hello')
+        assert hello
+        url_rules = [rule.rule for rule in self.app.url_map.iter_rules()]
+        view_functions = self.app.view_functions.copy()
+
+        def _failed_register(app, config):
+            raise RuntimeError('failed register')
+        hello._register.append(_failed_register)
+        self.assertRaises(RuntimeError, lambda: self.manager.start_many(plugins))
+        self.assertEqual(
+            [rule.rule for rule in self.app.url_map.iter_rules()], url_rules)
+        self.assertEqual(self.app.view_functions, view_functions)
+        self.assertNotIn('plugins.hello', self.app.error_handler_spec)
+        self.assertNotIn('plugins.hello', self.app.before_request_funcs)
+        for plugin in plugins:
+            self.assertEqual(plugin.status.value, states.PluginStatus.Loaded)
+
+        hello._register.remove(_failed_register)
+        self.manager.start_many(plugins)
+        self.assertEqual(self.client.get('/plugins/hello/403').data, b'Hello Forbidden!')
+
+    def test_failed_unload_rollback(self) -> None:
+        plugins = list(self.manager.plugins)
+        self.manager.load_many(plugins)
+        self.manager.start_many(plugins)
+        self.manager.stop_many(plugins)
+        hello = self.manager.find(domain='hello')
+        assert hello
+
+        def _failed_clean(app, config):
+            raise RuntimeError('failed clean')
+        hello._clean['failed_clean'] = _failed_clean
+        self.assertRaises(RuntimeError, lambda: self.manager.unload_many(plugins))
+        self.assertIn(hello, self.manager._loaded)
+        self.assertEqual(hello.status.value, states.PluginStatus.Stopped)
+        self.assertNotEqual(hello.endpoints, set())
+        self.assertIn('plugins.hello', self.app.error_handler_spec)
+
+        hello._clean.pop('failed_clean')
+        self.manager.start(hello)
+        self.assertEqual(self.client.get('/plugins/hello/admin').data, b'HELLO admin!')
+
+    def test_unload_purge_modules(self) -> None:
+        dirname = 'test-purge-modules'
+        casedir = create_empty_plugin(dirname, {
+                'id': 'test-purge-modules',
+                'domain': 'purge',
+                'plugin': {
+                    'name': 'purge',
+                    'author': 'test',
+                    'summary': 'test.'
+                },
+                'releases': []
+        }, code='from src import Plugin\nfrom . import helpers\nplugin = Plugin()\n'
+                'plugin.finalizer(helpers.finalize)')
+        with open(path.join(casedir, 'helpers.py'), 'w') as handler:
+            handler.write('finalized = []\ndef finalize():\n    finalized.append(True)')
+
+        plugin = self.manager.find(domain='purge')
+        assert plugin
+        modules = self.manager.modules(plugin)
+        self.assertEqual(len(modules), 2)
+        helpers = sys.modules[modules[-1]]
+        self.manager.load(plugin)
+        self.manager.unload(plugin)
+        utils.rmdir(casedir)
+        self.assertEqual(helpers.finalized, [True])
+        for name in modules:
+            self.assertNotIn(name, sys.modules)
+        self.assertIn(modules[-1], self.manager.leaks())
+        del plugin, helpers
+        self.assertEqual(self.manager.leaks(), [])
+
+    def test_defer_and_activate_on_request(self) -> None:
+        deferred = self.manager.defer(['hello', 'goodbye'])
+        self.assertSetEqual(set(deferred), {'hello', 'goodbye'})
+        self.assertSetEqual(set(self.manager.deferred), {'hello', 'goodbye'})
+        self.assertNotIn('hello', set(plugin.domain for plugin in self.manager.plugins))
+        self.assertEqual(self.manager.defer(['hello']), [])
+        self.assertFalse(any(name.endswith('.hello') for name in sys.modules))
+
+        response = self.client.get('/plugins/hello/admin')
+        self.assertEqual(response.data, b'HELLO admin!')
+        hello = self.manager.find(domain='hello')
+        assert hello
+        self.assertEqual(hello.status.value, states.PluginStatus.Running)
+        self.assertListEqual(self.manager.deferred, ['goodbye'])
+        self.assertNotIn('plugins.hello.__lazy__', self.app.view_functions)
+        self.assertEqual(self.client.get('/plugins/hello/').status_code, 404)
+        self.assertEqual(self.manager.activate('hello'), hello)
+
+    def test_concurrent_activation_once(self) -> None:
+        self.manager.defer(['hello'])
+        activated = []
+
+        def _started(sender, plugin):
+            activated.append(plugin.domain)
+        signals.started.connect(_started)
+        try:
+            with futures.ThreadPoolExecutor(8) as executor:
+                responses = list(executor.map(
+                    lambda _: self.app.test_client().get('/plugins/hello/doge',
+                                                         follow_redirects=True),
+                    range(16)))
+        finally:
+            signals.started.disconnect(_started)
+        self.assertListEqual(activated, ['hello'])
+        for response in responses:
+            self.assertEqual(response.data, b'HELLO Doge!')
+
+    def test_evict_least_recently_used(self) -> None:
+        self.manager.defer(['hello', 'goodbye'])
+        self.assertEqual(self.client.get('/plugins/goodbye/admin').data, b'GOODBYE admin!')
+        self.assertEqual(self.client.get('/plugins/hello/admin').data, b'HELLO admin!')
+        usage = self.manager.usage()
+        self.assertGreater(usage['hello']['memory'], 0)
+        self.assertLess(usage['hello']['idle'], usage['goodbye']['idle'])
+        self.assertEqual(self.manager.evict(), [])
+
+        evicted = self.manager.evict(budget=usage['hello']['memory'])
+        self.assertListEqual(evicted, ['goodbye'])
+        self.assertListEqual(self.manager.deferred, ['goodbye'])
+        self.assertSetEqual(set(self.manager.usage()), {'hello'})
+        self.assertEqual(self.client.get('/plugins/goodbye/admin').data, b'GOODBYE admin!')
+        self.assertEqual(self.manager.evict(budget=0), ['hello', 'goodbye'])
+
+    def test_evict_over_budget_of_single_plugin(self) -> None:
+        app = init_app('EvictionConfig')
+        manager: PluginManager = app.plugin_manager  # type: ignore
+        self.addCleanup(manager.shutdown)
+        client = app.test_client()
+        manager.defer(['hello', 'goodbye'])
+
+        # Plugin just activated is kept even over budget
+        self.assertEqual(client.get('/plugins/hello/admin').data, b'HELLO admin!')
+        self.assertListEqual(manager.deferred, ['goodbye'])
+        self.assertEqual(client.get('/plugins/goodbye/admin').data, b'GOODBYE admin!')
+        self.assertListEqual(manager.deferred, ['hello'])
+
+        # Memory reclaimed after starting plugins without activation
+        manager.shutdown()
+        manager._deferred.clear()
+        goodbye = manager.find(domain='goodbye')
+        hello = manager.find(domain='hello')
+        assert goodbye and hello
+        manager.load(goodbye)
+        manager.start(goodbye)
+        manager.load(hello)
+        self.assertListEqual(manager.deferred, ['goodbye'])
+        manager.start(hello)
+        self.assertEqual(client.get('/plugins/hello/admin').data, b'HELLO admin!')
+
+    def test_prefork_and_postfork(self) -> None:
+        hello = self.manager.find(domain='hello')
+        assert hello
+        self.manager.load(hello)
+        self.manager.start(hello)
+        called = []
+        hello.before_fork(lambda: called.append(('prefork', os.getpid())))
+        hello.after_fork(lambda: called.append(('postfork', os.getpid())))
+
+        @hello.after_fork
+        def _failed():
+            raise RuntimeError('failed')
+
+        self.assertEqual(len(hello.postfork()), 1)
+        called.clear()
+        self.addCleanup(gc.enable)
+        self.addCleanup(gc.unfreeze)
+        self.manager.prefork()
+        self.assertFalse(gc.isenabled())
+        self.assertGreater(gc.get_freeze_count(), 0)
+        self.assertListEqual(called, [('prefork', os.getpid())])
+
+        pid = os.fork()
+        if not pid:
+            code = 1
+            try:
+                self.manager.postfork()
+                response = self.client.get('/plugins/hello/Doge')
+                if gc.isenabled() and called[-1] == ('postfork', os.getpid()) \
+                        and response.data == b'HELLO Doge!':
+                    code = 0
+            finally:
+                os._exit(code)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        self.assertListEqual(called, [('prefork', os.getpid())])
+        self.assertEqual(self.client.get('/plugins/hello/Doge').data, b'HELLO Doge!')
+
 
 class TestInvalidImportManagerApp(unittest.TestCase):
 
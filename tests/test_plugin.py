@@ -4,7 +4,9 @@ from os import path
 
 from src import PluginManager, utils
 from src import states
+from src.handlers import ErrorHandlerTable
 from src.plugin import Plugin
+from werkzeug.exceptions import Forbidden, NotFound
 
 from .app import init_app
 from . import create_empty_plugin
@@ -229,6 +231,36 @@ class TestPluginApp(unittest.TestCase):
                 self.fail(
                     f"'{endpoint}' still exists after '{plugin_endpoint}' unloaded")
 
+    def test_handlers_kept_after_restart(self) -> None:
+        hello = self.manager.find(domain='hello')
+        assert hello
+        called = []
+        hello.before_request(lambda: called.append('first'))
+        hello.before_request(lambda: called.append('second'))
+        self.manager.load(hello)
+        for _ in range(2):
+            self.manager.start(hello)
+            called.clear()
+            self.assertEqual(self.client.get('/plugins/hello/admin').status_code, 200)
+            self.assertListEqual(called, ['first', 'second'])
+            self.assertEqual(self.client.get('/plugins/hello/403').data, b'Hello Forbidden!')
+            self.manager.stop(hello)
+
+    def test_error_handler_table(self) -> None:
+        hello = self.manager.find(domain='hello')
+        assert hello
+        self.manager.load(hello)
+        self.manager.start(hello)
+        table = self.app.error_handler_spec['plugins.hello']
+        self.assertIsInstance(table, ErrorHandlerTable)
+        self.assertIs(table, hello._handlers.errors)  # type: ignore
+        handler = table.lookup(Forbidden, 403)
+        self.assertIsNotNone(handler)
+        self.assertIs(table.lookup(Forbidden, 403), handler)
+        self.assertIsNone(table.lookup(NotFound, 404))
+        self.assertDictEqual(table[500], {})
+        self.assertNotIn(500, table)
+
     def test_invalid_plugin_domain(self):
         dirname = 'invalid-plugin-domain'
         create_empty_plugin(dirname, {
@@ -0,0 +1,59 @@
+import time
+import unittest
+
+from src import Plugin, PluginManager, profiling
+
+from .app import init_app
+
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.app = init_app('ProfilingConfig')
+        self.client = self.app.test_client()
+        self.manager: PluginManager = self.app.plugin_manager  # type: ignore
+        hello = self.manager.find(domain='hello')
+        assert hello
+
+        def _sleeping() -> str:
+            time.sleep(0.15)
+            return 'slept'
+
+        hello.add_url_rule('/sleeping', 'sleeping', _sleeping)
+        self.manager.boot([hello])
+
+    def tearDown(self) -> None:
+        self.manager.shutdown()
+        self.manager.profiler.close()
+
+    def test_profile_slow_requests(self) -> None:
+        self.assertEqual(self.client.get('/plugins/hello/Doge').status_code, 200)
+        self.assertDictEqual(self.manager.profiler.profiles(), {})
+        for _ in range(3):
+            self.assertEqual(self.client.get('/plugins/hello/sleeping').data, b'slept')
+        profiles = self.manager.profiler.profiles()['hello']
+        self.assertEqual(len(profiles), 2)
+        profile = profiles[0]
+        self.assertIsInstance(profile, profiling.Profile)
+        self.assertEqual(profile.path, '/plugins/hello/sleeping')
+        self.assertEqual(profile.endpoint, 'plugins.hello.sleeping')
+        self.assertGreaterEqual(profile.duration, 0.15)
+        self.assertGreater(profile.samples, 0)
+        self.assertTrue(any(
+            frame.startswith('_sleeping ') for stack in profile.stacks for frame in stack))
+
+    def test_profiles_api(self) -> None:
+        self.client.get('/plugins/hello/sleeping')
+        response = self.client.get('/plugins/.profiles?domain=hello')
+        self.assertEqual(response.status_code, 200)
+        profile, = response.json['profiles']['hello']
+        self.assertEqual(profile['samples'], sum(item['count'] for item in profile['stacks']))
+        self.assertEqual(self.client.get('/plugins/.profiles?domain=goodbye').json['profiles'], {})
+        folded = self.client.get('/plugins/.profiles?format=folded').get_data(as_text=True)
+        self.assertIn('_sleeping (', folded)
+        self.assertEqual(self.client.get('/plugins/.profiles?format=xml').status_code, 400)
+
+        self.manager.profiler.threshold = None
+        self.manager.profiler.clear()
+        self.client.get('/plugins/hello/sleeping')
+        self.assertDictEqual(self.manager.profiler.profiles(), {})
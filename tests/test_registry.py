@@ -0,0 +1,85 @@
+import os
+import unittest
+
+from src import PluginManager, registry
+from src.states import PluginStatus
+
+from . import workdir
+from .app import init_app
+
+HelloDirectory = os.path.join(workdir, 'app', 'plugins', 'hello')
+
+
+class TestRegistry(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.first = init_app('SharedConfig')
+        self.second = init_app('SharedExtensionsConfig')
+        self.managers = [
+            app.plugin_manager for app in (self.first, self.second)  # type: ignore
+        ]
+
+    def tearDown(self) -> None:
+        for manager in self.managers:
+            manager.shutdown()
+        registry.shared.clear()
+
+    def start_hello(self, manager: PluginManager) -> None:
+        plugin = manager.find(domain='hello')
+        assert plugin
+        manager.load(plugin)
+        manager.start(plugin)
+
+    def test_import_once(self) -> None:
+        first, second = self.managers
+        self.assertIs(first.registry, registry.shared)
+        first_hello, second_hello = first.find(domain='hello'), second.find(domain='hello')
+        assert first_hello and second_hello
+        self.assertIsNot(first_hello, second_hello)
+        self.assertIn(HelloDirectory, registry.shared)
+
+        def _failed(location: str) -> None:
+            raise AssertionError('imported again')
+        module, _imported = registry.shared.module(HelloDirectory, _failed)
+        self.assertIsNot(module.plugin, first_hello)
+        self.assertEqual(first_hello.endpoints, module.plugin.endpoints)
+
+    def test_own_registration_state(self) -> None:
+        first, second = self.managers
+        self.start_hello(first)
+        self.assertEqual(second.find(domain='hello').status.value, PluginStatus.Unloaded)
+        first_client, second_client = self.first.test_client(), self.second.test_client()
+        self.assertEqual(first_client.get('/plugins/hello/Doge').status_code, 200)
+        self.assertEqual(second_client.get('/extensions/hello/Doge').status_code, 404)
+
+        self.start_hello(second)
+        self.assertEqual(second_client.get('/extensions/hello/Doge').status_code, 200)
+        self.assertEqual(second_client.get('/plugins/hello/Doge').status_code, 404)
+        self.assertIs(
+            self.first.view_functions['plugins.hello.index'],
+            self.second.view_functions['extensions.hello.index'])
+        response = second_client.get('/extensions/hello/static/file.txt')
+        self.assertEqual(response.data, b'HELLO!')
+        response.close()
+        self.assertEqual(first_client.get('/plugins/hello/403').data, b'Hello Forbidden!')
+        self.assertEqual(second_client.get('/extensions/hello/403').data, b'Hello Forbidden!')
+
+    def test_release_by_last_manager(self) -> None:
+        first, second = self.managers
+        self.start_hello(first)
+        self.start_hello(second)
+        self.assertEqual(registry.shared.users(HelloDirectory), 2)
+
+        finalized = []
+        hello = first.find(domain='hello')
+        assert hello
+        hello.finalizer(lambda: finalized.append(True))
+        first.stop(hello)
+        first.unload(hello)
+        self.assertEqual(registry.shared.users(HelloDirectory), 1)
+        self.assertListEqual(finalized, [])
+        self.assertEqual(self.second.test_client().get('/extensions/hello/Doge').status_code, 200)
+
+        second.shutdown()
+        self.assertListEqual(finalized, [True])
+        self.assertNotIn(HelloDirectory, registry.shared)
@@ -0,0 +1,85 @@
+import typing as t
+import unittest
+
+from src import PluginManager
+from src.resources import Resource, ResourcePool
+
+from .app import init_app
+
+
+class Connection:
+    """Fake pooled connection recording created and disposed instances."""
+    created: t.List['Connection'] = []
+
+    def __init__(self, url: str, **options: t.Any) -> None:
+        self.url, self.options = url, options
+        self.disposed = False
+        self.created.append(self)
+
+    def dispose(self) -> None:
+        self.disposed = True
+
+
+class TestResources(unittest.TestCase):
+
+    def setUp(self) -> None:
+        Connection.created.clear()
+        self.app = init_app('BaseDevelopmentConfig')
+        self.manager: PluginManager = self.app.plugin_manager  # type: ignore
+
+    def tearDown(self) -> None:
+        self.manager.shutdown()
+
+    def test_pool(self) -> None:
+        pool = ResourcePool()
+        first = Resource('db', Connection, 'sqlite://', options={'echo': False})
+        second = Resource('db', Connection, 'sqlite://', options={'echo': False})
+        other = Resource('db', Connection, 'sqlite:///other.db')
+        self.assertEqual(first.key, second.key)
+        self.assertRaises(RuntimeError, first.get)
+        self.assertRaises(ValueError, Resource, 'db', Connection, {'options': {}}, bad=bytearray())
+
+        users = [Connection('user') for _ in range(3)]
+        Connection.created.clear()
+        first.bind(pool, users[0])
+        second.bind(pool, users[1])
+        other.bind(pool, users[2])
+        self.assertEqual(len(Connection.created), 0)
+        self.assertIs(first.get(), second())
+        self.assertIsNot(first.get(), other.get())
+        self.assertEqual(len(Connection.created), 2)
+
+        shared = first.get()
+        self.assertListEqual(first.release(users[0]), [])
+        self.assertFalse(shared.disposed)
+        second.release(users[1])
+        self.assertTrue(shared.disposed)
+        self.assertRaises(RuntimeError, second.get)
+
+        created = other.get()
+        pool.reset()
+        self.assertTrue(created.disposed)
+        self.assertIsNot(other.get(), created)
+        self.assertListEqual(pool.usage(), [{'name': 'db', 'users': 1, 'created': True}])
+
+    def test_dispose_on_unload(self) -> None:
+        hello = self.manager.find(domain='hello')
+        goodbye = self.manager.find(domain='goodbye')
+        assert hello and goodbye
+        disposed = []
+        engine = hello.resource('engine', Connection, 'sqlite://')
+        goodbye.resource('engine', Connection, 'sqlite://')
+        cache = hello.resource('cache', dict, dispose=lambda value: disposed.append(value))
+        self.assertListEqual(hello.resources, [engine, cache])
+
+        self.manager.load_many([hello, goodbye])
+        self.assertEqual(len(Connection.created), 0)
+        connection = engine.get()
+        cache.get()['key'] = 'value'
+
+        self.manager.unload(hello)
+        self.assertListEqual(disposed, [{'key': 'value'}])
+        self.assertFalse(connection.disposed)
+        self.manager.unload(goodbye)
+        self.assertTrue(connection.disposed)
+        self.assertEqual(len(self.manager.resources), 0)
@@ -0,0 +1,130 @@
+import unittest
+
+from flask import Flask, current_app
+
+from src import PluginManager
+from src.routing import Router, Snapshot, SnapshotAttribute, Staging, copy_url_map, pin
+
+from .app import init_app
+
+
+class TestRouting(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.app = init_app('BaseDevelopmentConfig')
+        self.client = self.app.test_client()
+        self.manager: PluginManager = self.app.plugin_manager  # type: ignore
+        self.router: Router = self.manager._router
+        self.hello = self.manager.find(domain='hello')
+        assert self.hello
+
+    def test_snapshot_installed(self) -> None:
+        snapshot = self.router.snapshot
+        self.assertIsInstance(snapshot, Snapshot)
+        self.assertIs(type(self.app), Flask)
+        self.assertIsInstance(self.app.url_map, SnapshotAttribute)
+        self.assertIs(self.app.url_map._get_current_object(), snapshot.url_map)
+        self.assertIs(self.app.view_functions._get_current_object(), snapshot.view_functions)
+        self.assertIn('operate', self.app.view_functions)
+
+    def test_error_lookup_never_changes_snapshot(self) -> None:
+        self.manager.load(self.hello)
+        self.manager.start(self.hello)
+        spec = self.router.snapshot.error_handler_spec
+        names = {name: set(handlers) for name, handlers in spec.items()}
+        self.assertEqual(self.client.get('/plugins/hello/403').data, b'Hello Forbidden!')
+        self.assertEqual(self.client.get('/plugins/hello/endpoints/raise').status_code, 502)
+        self.assertEqual(self.client.get('/missing').status_code, 404)
+        self.assertDictEqual({name: set(handlers) for name, handlers in spec.items()}, names)
+
+    def test_jinja_cache_kept_for_application(self) -> None:
+        self.manager.load(self.hello)
+        self.manager.start(self.hello)
+        self.assertIsNotNone(self.app.jinja_env.cache)
+        cache = self.app.jinja_env.cache._cache
+        self.assertIn(b'HELLO Doge!', self.client.get('/plugins/hello/Doge').data)
+        self.assertEqual(len(cache), 0)
+        host = self.client.get('/').data
+        self.assertNotIn(b'HELLO', host)
+        self.assertListEqual([name for _loader, name in cache.keys()], ['index.html'])
+        self.assertEqual(self.client.get('/').data, host)
+        self.assertIn(b'HELLO Doge!', self.client.get('/plugins/hello/Doge').data)
+
+    def test_publish_one_snapshot_per_operation(self) -> None:
+        version = self.router.version
+        published = self.router.snapshot
+        self.manager.load(self.hello)
+        self.assertEqual(self.router.version, version)
+        self.manager.start(self.hello)
+        self.assertEqual(self.router.version, version + 1)
+        self.assertIsNot(self.router.snapshot, published)
+        # Published containers are never changed in place
+        self.assertNotIn('plugins.hello.index', published.view_functions)
+        self.assertIn('plugins.hello.index', self.app.view_functions)
+
+    def test_start_after_first_request(self) -> None:
+        self.assertEqual(self.client.get('/').status_code, 200)
+        self.manager.load(self.hello)
+        self.manager.start(self.hello)
+        response = self.client.get('/plugins/hello/Doge')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Doge', response.data)
+        self.manager.stop(self.hello)
+        self.assertEqual(self.client.get('/plugins/hello/Doge').status_code, 404)
+
+    def test_request_pinned_snapshot(self) -> None:
+        self.manager.load(self.hello)
+        self.manager.start(self.hello)
+        endpoint, seen = 'plugins.hello.index', {}
+
+        @self.app.after_request
+        def _inspect(response):
+            seen['pinned'] = current_app.view_functions[endpoint]
+            seen['published'] = self.router.snapshot.view_functions[endpoint]
+            return response
+
+        response = self.client.get(f'/stop/{self.hello.id_}')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNot(seen['pinned'], self.hello.notfound)
+        self.assertEqual(seen['published'], self.hello.notfound)
+        self.assertEqual(self.app.view_functions[endpoint], self.hello.notfound)
+
+    def test_jinja_loader_pinned(self) -> None:
+        self.manager.load(self.hello)
+        self.manager.start(self.hello)
+        pinned = self.router.snapshot
+        self.assertIs(pinned.jinja_loaders['hello'], self.hello.jinja_loader)
+        self.manager.stop(self.hello)
+        self.manager.unload(self.hello)
+        self.assertNotIn('hello', self.router.snapshot.jinja_loaders)
+        # Requests began before unloading still render templates of plugin
+        with pin(self.app, pinned):
+            response = self.client.get('/plugins/hello/Doge')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'HELLO Doge!', response.data)
+
+    def test_failed_update_not_published(self) -> None:
+        version, published = self.router.version, self.router.snapshot
+        with self.assertRaises(RuntimeError):
+            with self.router.update() as staging:
+                staging.add_url_rule('/staging', 'staging', lambda: 'staging')
+                raise RuntimeError('failed')
+        self.assertEqual(self.router.version, version)
+        self.assertIs(self.router.snapshot, published)
+        self.assertNotIn('staging', self.app.view_functions)
+
+    def test_staging_copy_on_access(self) -> None:
+        staging = Staging(self.app, self.router.snapshot)
+        self.assertFalse(staging.changed)
+        self.assertIs(staging.config, self.app.config)
+        self.assertIsNot(staging.view_functions, self.router.snapshot.view_functions)
+        self.assertTrue(staging.changed)
+        self.assertIs(staging.build().url_map, self.router.snapshot.url_map)
+
+    def test_copy_url_map_keep_settings(self) -> None:
+        self.app.url_map.strict_slashes = False
+        copied = copy_url_map(self.app.url_map)
+        self.assertFalse(copied.strict_slashes)
+        self.assertListEqual(
+            sorted(rule.rule for rule in copied.iter_rules()),
+            sorted(rule.rule for rule in self.app.url_map.iter_rules()))
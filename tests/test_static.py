@@ -0,0 +1,128 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from flask import Flask
+from werkzeug.exceptions import NotFound
+
+from src import PluginManager
+from src.static import StaticFiles
+
+from .app import init_app
+
+
+class TestStaticFiles(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.directory, 'css'))
+        with open(os.path.join(self.directory, 'css', 'style.css'), 'w') as handler:
+            handler.write('body { margin: 0; }\n' * 100)
+        with open(os.path.join(self.directory, 'large.js'), 'w') as handler:
+            handler.write('var a = 1;\n' * 1000)
+        self.app = Flask(__name__)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory)
+
+    def test_prepare_assets(self) -> None:
+        static = StaticFiles(self.directory, cache_size=4096)
+        self.assertSetEqual(set(static.assets), {'css/style.css', 'large.js'})
+        style = static.assets['css/style.css']
+        self.assertNotEqual(style.content, None)
+        self.assertIn('gzip', style.encodings)
+        self.assertEqual(static.assets['large.js'].content, None)
+        self.assertEqual(
+            static.fingerprint('css/style.css'), f'css/style.{style.fingerprint}.css')
+        self.assertEqual(static.fingerprint('non-exists.css'), 'non-exists.css')
+
+    def test_send_fingerprinted_and_compressed(self) -> None:
+        static = StaticFiles(self.directory, cache_size=4096)
+        with self.app.test_request_context(headers={'Accept-Encoding': 'gzip'}):
+            response = static.send(static.fingerprint('css/style.css'))
+            self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+            self.assertIn('immutable', response.headers['Cache-Control'])
+            self.assertIn('Accept-Encoding', response.headers['Vary'])
+        with self.app.test_request_context():
+            response = static.send('css/style.css')
+            self.assertNotIn('Content-Encoding', response.headers)
+            self.assertNotIn('immutable', response.headers['Cache-Control'])
+
+    def test_send_not_modified(self) -> None:
+        static = StaticFiles(self.directory)
+        etag = static.assets['large.js'].etag
+        with self.app.test_request_context(headers={'If-None-Match': etag}):
+            response = static.send('large.js')
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.headers['ETag'], etag)
+
+    def test_etag_of_each_encoding(self) -> None:
+        static = StaticFiles(self.directory, cache_size=4096)
+        identity = static.assets['css/style.css'].etag
+        gzipped = identity[:-1] + '-gz"'
+        with self.app.test_request_context(headers={'Accept-Encoding': 'gzip'}):
+            response = static.send('css/style.css')
+            self.assertEqual(response.headers['ETag'], gzipped)
+        with self.app.test_request_context(
+                headers={'Accept-Encoding': 'gzip', 'If-None-Match': identity}):
+            response = static.send('css/style.css')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        with self.app.test_request_context(headers={
+                'Accept-Encoding': 'gzip', 'If-None-Match': f'{identity}, W/{gzipped}'}):
+            self.assertEqual(static.send('css/style.css').status_code, 304)
+        with self.app.test_request_context(headers={'If-None-Match': gzipped}):
+            response = static.send('css/style.css')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.headers['ETag'], identity)
+
+    def test_send_range_and_added_file(self) -> None:
+        static = StaticFiles(self.directory, cache_size=4096)
+        with self.app.test_request_context(headers={'Range': 'bytes=0-9'}):
+            response = static.send('large.js')
+            response.direct_passthrough = False
+            self.assertEqual(response.status_code, 206)
+            self.assertEqual(response.get_data(), b'var a = 1;')
+            response.close()
+        with open(os.path.join(self.directory, 'css', 'added.css'), 'w') as handler:
+            handler.write('p { margin: 0; }\n')
+        with self.app.test_request_context():
+            response = static.send('css/added.css')
+            self.assertEqual(response.get_data(), b'p { margin: 0; }\n')
+            self.assertIn('css/added.css', static.assets)
+            self.assertRaises(NotFound, static.send, '../outside.css')
+
+    def test_send_offload(self) -> None:
+        static = StaticFiles(self.directory, cache_size=4096, offload='x-sendfile')
+        with self.app.test_request_context():
+            response = static.send('large.js')
+            self.assertEqual(
+                response.headers['X-Sendfile'], os.path.join(self.directory, 'large.js'))
+        static = StaticFiles(
+            self.directory, cache_size=4096,
+            offload='x-accel-redirect', offload_prefix='/internal/')
+        with self.app.test_request_context():
+            response = static.send('large.js')
+            self.assertEqual(response.headers['X-Accel-Redirect'], '/internal/large.js')
+        self.assertRaises(ValueError, lambda: StaticFiles(self.directory, offload='invalid'))
+
+    def test_plugin_static_pipeline(self) -> None:
+        app = init_app('BaseDevelopmentConfig')
+        client = app.test_client()
+        manager: PluginManager = app.plugin_manager  # type: ignore
+        for plugin in manager.plugins:
+            manager.load(plugin)
+            manager.start(plugin)
+        hello = manager.find(domain='hello')
+        assert hello
+        filename = hello.static_filename('file.txt')
+        self.assertNotEqual(filename, 'file.txt')
+        response = client.get('/plugins/hello/static/' + filename)
+        self.assertEqual(response.data, b'HELLO!')
+        self.assertIn('immutable', response.headers['Cache-Control'])
+        response = client.get(
+            '/plugins/hello/static/file.txt',
+            headers={'If-None-Match': response.headers['ETag']})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(client.get('/plugins/hello/static/missing.txt').status_code, 404)
@@ -0,0 +1,95 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from src import Plugin, PluginManager, tracing
+
+from .app import init_app
+
+
+class TestTracing(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.app = init_app('TracingConfig')
+        self.client = self.app.test_client()
+        self.manager: PluginManager = self.app.plugin_manager  # type: ignore
+        self.sink = self.manager.tracer.sink
+        assert isinstance(self.sink, tracing.MemorySink)
+
+    def tearDown(self) -> None:
+        self.manager.shutdown()
+
+    def find(self, domain: str) -> Plugin:
+        plugin = self.manager.find(domain=domain)
+        assert plugin
+        return plugin
+
+    def spans(self, name: str) -> list:
+        return [span for span in self.sink.spans if span.name == name]
+
+    def test_request_spans(self) -> None:
+        self.manager.boot([self.find('hello')])
+        self.sink.clear()
+        self.assertEqual(self.client.get('/plugins/hello/Doge').status_code, 200)
+        dispatch, = self.spans('plugin.dispatch')
+        view, = self.spans('plugin.view')
+        render, = self.spans('plugin.render')
+        select, = self.spans('plugin.select_loader')
+        self.assertIs(view.parent, dispatch)
+        self.assertIs(select.parent, dispatch)
+        self.assertIs(render.parent, view)
+        self.assertEqual(len(set(span.trace_id for span in self.sink.spans)), 1)
+        self.assertEqual(dispatch.attributes['plugin.id'], 'hello')
+        self.assertEqual(dispatch.attributes['plugin.domain'], 'hello')
+        self.assertEqual(dispatch.attributes['http.route'], '/plugins/hello/<string:name>')
+        self.assertEqual(dispatch.attributes['http.response.status_code'], 200)
+        self.assertEqual(render.attributes['template.name'], 'index.html')
+        self.assertIsNone(tracing.current())
+
+        self.sink.clear()
+        self.assertEqual(self.client.get('/plugins/hello/endpoints/raise').status_code, 502)
+        view, = self.spans('plugin.view')
+        self.assertEqual(view.status, tracing.StatusError)
+        self.assertEqual(view.to_dict()['status']['code'], 'STATUS_CODE_ERROR')
+        self.client.get('/plugins/.not-a-plugin')
+        self.assertEqual(len(self.spans('plugin.dispatch')), 1)
+
+    def test_lifecycle_spans(self) -> None:
+        hello = self.find('hello')
+        self.assertTrue(self.spans('plugin.scan'))
+        self.manager.load(hello)
+        self.manager.start(hello)
+        self.manager.stop(hello)
+        self.manager.unload(hello)
+        for batch, name in (('plugins.load', 'plugin.load'), ('plugins.start', 'plugin.register'),
+                            ('plugins.stop', 'plugin.unregister'), ('plugins.unload', 'plugin.clean')):
+            parent, = self.spans(batch)
+            span, = self.spans(name)
+            self.assertIs(span.parent, parent)
+            self.assertEqual(span.attributes['plugin.id'], 'hello')
+            self.assertEqual(span.status, tracing.StatusOk)
+            self.assertGreaterEqual(span.duration, 0)
+        encoded = self.spans('plugin.load')[0].to_dict()
+        self.assertEqual(len(encoded['traceId']), 32)
+        self.assertEqual(len(encoded['spanId']), 16)
+        self.assertIn({'key': 'plugin.domain', 'value': {'stringValue': 'hello'}},
+                      encoded['attributes'])
+
+    def test_file_sink_and_disable(self) -> None:
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        path = os.path.join(directory, 'spans.jsonl')
+        sink = self.manager.tracer.sink = tracing.FileSink(path)
+        self.addCleanup(sink.close)
+        self.manager.boot([self.find('hello')])
+        sink.close()
+        with open(path) as handler:
+            names = [json.loads(line)['name'] for line in handler]
+        self.assertIn('plugin.register', names)
+
+        self.manager.tracer.sink = None
+        with self.manager.tracer.span('ignored') as span:
+            self.assertIs(span, tracing.NoopSpan)
+        self.assertEqual(self.client.get('/plugins/hello/Doge').status_code, 200)
@@ -0,0 +1,72 @@
+import threading
+import time
+import unittest
+
+from flask import current_app, request
+
+from src import Plugin, PluginManager
+
+from .app import init_app
+
+
+class TestWarmup(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.app = init_app('WarmupConfig')
+        self.manager: PluginManager = self.app.plugin_manager  # type: ignore
+        self.requested = []
+        self.app.before_request(lambda: self.requested.append(request.path))
+
+    def tearDown(self) -> None:
+        self.manager.shutdown()
+
+    def find(self, domain: str) -> Plugin:
+        plugin = self.manager.find(domain=domain)
+        assert plugin
+        return plugin
+
+    def test_warmup_before_publish(self) -> None:
+        hello = self.find('hello')
+        observed = []
+
+        @hello.warmup
+        def _warmup() -> None:
+            published = self.manager._router.snapshot.view_functions
+            response = current_app.test_client().get('/plugins/hello/Doge')
+            observed.append(('plugins.hello.index' in published, response.status_code))
+
+        hello.add_warmup_url('staticfile')
+        self.manager.load(hello)
+        self.manager.start(hello)
+        self.assertListEqual(observed, [(False, 200)])
+        self.assertIn('/plugins/hello/staticfile', self.requested)
+        self.assertIn('warmup', self.manager.timings['hello'])
+
+        # Warmup requests are not recorded as accesses
+        self.assertNotIn('hello', self.manager._accessed)
+        self.app.test_client().get('/plugins/hello/Doge')
+        self.assertIn('hello', self.manager._accessed)
+
+    def test_failure_and_timeout(self) -> None:
+        hello, goodbye = self.find('hello'), self.find('goodbye')
+        released = threading.Event()
+
+        @hello.warmup
+        def _slow() -> None:
+            released.wait(5)
+
+        @goodbye.warmup
+        def _failed() -> None:
+            raise RuntimeError('failed')
+
+        goodbye.add_warmup_url('/not-found-but-fine')
+        self.manager.load_many([hello, goodbye])
+        began = time.perf_counter()
+        with self.assertLogs(self.app.logger, 'WARNING') as logs:
+            self.manager.start_many([hello, goodbye])
+        released.set()
+        self.assertLess(time.perf_counter() - began, 3)
+        self.assertTrue(any('warmup timed out: hello' in line for line in logs.output))
+        self.assertTrue(any('failed warmup plugin' in line for line in logs.output))
+        client = self.app.test_client()
+        self.assertEqual(client.get('/plugins/hello/Doge').status_code, 200)